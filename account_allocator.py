@@ -0,0 +1,167 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class BlockAllocator, which hands out account numbers in blocks (hi/lo style)
+from a high-water mark kept in a file, and class AllocatedBankAccount, a BankAccount that takes its
+account numbers from a BlockAllocator. Each process reserves a whole block under a file lock and then
+numbers accounts from it locally, so processes only coordinate once per block. Numbers left in a block
+when a process stops are never reused, so account numbers stay unique across restarts.
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Without fcntl (Windows) blocks are only coordinated between threads of one process
+    fcntl = None
+
+from bank import BankAccount
+from custom_errors import *
+
+class BlockAllocator:
+    """
+    Class for an account number allocator backed by a high-water mark file.
+
+    Instance Variables-
+        path (string): Location of the high-water mark file (path + ".lock" is used for locking)
+        block_size (int): Number of account numbers reserved at a time
+        blocks (int): Number of blocks reserved by this allocator
+    """
+
+    def __init__(self, path: str, block_size: int = 1000):
+        #Checking input type
+        if not isinstance(block_size, int):
+            raise CustomTypeError(f"Block size must be int, received {type(block_size)}")
+
+        #Checking input values
+        if block_size < 1:
+            raise CustomValueError(f"Block size must be at least 1, received {block_size}")
+
+        self.path = path
+        self.block_size = block_size
+        self.blocks = 0
+        self._next = 0
+        self._stop = 0
+        self._lock = threading.Lock()
+
+
+    def _locked(self):
+        """
+        Returns the open lock file, holding an exclusive lock on it when fcntl is available.
+        """
+        lock_file = open(self.path + ".lock", "a")
+
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+        return lock_file
+
+
+    def _read_mark(self) -> int:
+        try:
+            with open(self.path) as file:
+                return int(file.read())
+
+        except FileNotFoundError:
+            return 1045
+
+
+    def _write_mark(self, mark: int) -> None:
+        """
+        Writes the high-water mark next to path and renames it over path, so a crash never
+        leaves a missing or half written mark behind.
+        """
+        temporary_path = self.path + ".tmp"
+
+        with open(temporary_path, "w") as file:
+            file.write(f"{mark}\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary_path, self.path)
+
+
+    def reserve_block(self) -> range:
+        """
+        Method that reserves the next block of account numbers for this allocator and returns it.
+        """
+        with self._locked():
+            start = self._read_mark()
+            self._write_mark(start + self.block_size)
+
+        self.blocks += 1
+        return range(start, start + self.block_size)
+
+
+    def allocate(self) -> int:
+        """
+        Method that returns an unused account number, reserving a new block when the current one runs out.
+        """
+        with self._lock:
+            if self._next == self._stop:
+                block = self.reserve_block()
+                self._next, self._stop = block.start, block.stop
+
+            account_number = self._next
+            self._next += 1
+
+        return account_number
+
+
+    def reset(self, next_account_number: int) -> None:
+        """
+        Method that makes next_account_number the next number handed out, by this and every
+        other allocator sharing the file. Blocks already reserved by other allocators are not
+        taken back, so this is meant for tests and for setting up a new book.
+        """
+        #Checking input type
+        if not isinstance(next_account_number, int):
+            raise CustomTypeError(f"Account number must be int, received {type(next_account_number)}")
+
+        # Ensuring account numbers start from 1045
+        if next_account_number < 1045:
+            raise CustomValueError(f"Account numbers start from 1045, received {next_account_number}")
+
+        with self._lock, self._locked():
+            self._write_mark(next_account_number)
+            self._next = self._stop = 0
+
+
+    @property
+    def high_water_mark(self) -> int:
+        """
+        First account number that has not been reserved by any allocator.
+        """
+        with self._locked():
+            return self._read_mark()
+
+
+class AllocatedBankAccount(BankAccount):
+    """
+    Class for a bank account that takes its account number from a BlockAllocator.
+    Validation and error semantics are the same as BankAccount.
+
+    Class Variables-
+        allocator (BlockAllocator): Allocator used by all allocated accounts (None falls back to
+                                    the BankAccount counter)
+    """
+
+    allocator = None
+
+    @classmethod
+    def _allocate_account_number(cls) -> int:
+        if AllocatedBankAccount.allocator is None:
+            return super()._allocate_account_number()
+
+        return AllocatedBankAccount.allocator.allocate()
+
+
+    @classmethod
+    def set_next_account_number(cls, next_account_number: int) -> None:
+        if AllocatedBankAccount.allocator is None:
+            super().set_next_account_number(next_account_number)
+
+        else:
+            AllocatedBankAccount.allocator.reset(next_account_number)
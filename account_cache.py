@@ -0,0 +1,139 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class AccountCache, a bounded read-through cache of account objects in front
+of a SQLiteStore. A request for an account that is cached returns the same object without touching
+the database, and a miss loads the account (and its ban) from the store. When the cache is full the
+least recently used account is dropped. Changed accounts are written back by the store's write-behind
+batches, and the store returns an account waiting to be flushed instead of its stale row, so dropping
+a changed account never loses its balance. Bans invalidate cached accounts, so ban state is always
+read again after it changes.
+"""
+
+from collections import OrderedDict
+
+from bank import BankAccount
+from custom_errors import *
+from sqlite_store import SQLiteStore
+
+class AccountCache:
+    """
+    Class for a least recently used cache of accounts keyed by account number. Callers should get
+    the account for every request instead of keeping it, since a dropped account is loaded again as a new object.
+
+    Instance Variables-
+        store (SQLiteStore): Store the accounts are loaded from
+        capacity (int): Maximum number of cached accounts
+        hits (int): Number of requests answered from the cache
+        misses (int): Number of requests that loaded the account from the store
+        evictions (int): Number of accounts dropped because the cache was full
+        write_backs (int): Number of dropped accounts that were still waiting to be flushed
+        invalidations (int): Number of accounts dropped because their ban state changed
+    """
+
+    def __init__(self, store: SQLiteStore, capacity: int = 10_000):
+        #Checking input type
+        if not isinstance(store, SQLiteStore):
+            raise CustomTypeError(f"Store must be a SQLiteStore instance, received {type(store)}")
+
+        if not isinstance(capacity, int):
+            raise CustomTypeError(f"Capacity must be int, received {type(capacity)}")
+
+        #Checking input values
+        if capacity < 1:
+            raise CustomValueError(f"Capacity must be positive, received {capacity}")
+
+        self.store = store
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.write_backs = 0
+        self.invalidations = 0
+        self._accounts = OrderedDict()
+        store.listeners.append(self)
+
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+
+    def __contains__(self, account_number: int) -> bool:
+        return account_number in self._accounts
+
+
+    def get(self, account_number: int) -> BankAccount:
+        """
+        Method that returns the account with account_number, loading it from the store on a miss.
+        """
+        accounts = self._accounts
+        account = accounts.get(account_number)
+
+        if account is not None:
+            accounts.move_to_end(account_number)
+            self.hits += 1
+            return account
+
+        account = self.store.load_account(account_number)
+        self.store.restore_ban(account_number)
+        self.misses += 1
+        accounts[account_number] = account
+
+        if len(accounts) > self.capacity:
+            self._drop(accounts.popitem(last=False)[0])
+            self.evictions += 1
+
+        return account
+
+
+    def _drop(self, account_number: int) -> None:
+        # The store keeps an account that is waiting to be flushed, so it is written back with the next batch
+        if self.store.is_pending(account_number):
+            self.write_backs += 1
+
+
+    def invalidate(self, account_number: int) -> None:
+        """
+        Method that drops one account, so its next request reads it (and its ban) again.
+        """
+        if self._accounts.pop(account_number, None) is not None:
+            self._drop(account_number)
+            self.invalidations += 1
+
+
+    def invalidate_all(self) -> None:
+        """
+        Method that drops every account.
+        """
+        for account_number in self._accounts:
+            self._drop(account_number)
+
+        self.invalidations += len(self._accounts)
+        self._accounts.clear()
+
+
+    def stats(self) -> dict:
+        """
+        Method that returns the cache counters and hit rate.
+        """
+        requests = self.hits + self.misses
+
+        return {
+            "size": len(self._accounts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "write_backs": self.write_backs,
+            "invalidations": self.invalidations,
+        }
+
+
+    def close(self) -> None:
+        """
+        Method that stops listening to the store's ban changes and drops every account.
+        """
+        if self in self.store.listeners:
+            self.store.listeners.remove(self)
+
+        self._accounts.clear()
@@ -0,0 +1,504 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class AccountStore, a columnar account book that keeps every account's
+balance, transaction limit and ban flag in parallel typed arrays indexed by account number.
+It is meant for books with millions of accounts, where a full BankAccount object per account
+costs too much memory. AccountView gives the familiar BankAccount interface over a single row.
+"""
+
+from array import array
+from math import inf, nan
+
+import transaction_log
+from bank import BankAccount
+from custom_errors import *
+
+class AccountStore:
+    """
+    Class for a memory efficient account book. Row i of every column holds the state of
+    account number (first_account_number + i). Validation and error semantics match BankAccount.
+
+    Class Variables-
+        bonus (float): Bonus gift for opening account, shared with BankAccount
+
+    Instance Variables-
+        first_account_number (int): Account number stored in row 0
+        next_account_number (int): Account number that will be given to the next opened account
+        owners (list): Name of account owner per row (None for unallocated rows)
+        balances (array of float): Account balance per row
+        limits (array of float): Transaction limit per row (inf when there is no limit)
+        banned (bytearray): 1 if the account in the row is banned, else 0
+        ban_reasons (dictionary): Ban reasons of banned accounts, keyed by account number
+        journal (TransactionLog): Log that successful operations are written to (None disables logging)
+    """
+
+    bonus = BankAccount.bonus
+
+    def __init__(self, first_account_number: int = 1045, journal: transaction_log.TransactionLog | None = None):
+        """
+        Creates a new, empty AccountStore.
+
+        Arguments-
+            first_account_number (int): Account number given to the first opened account
+            journal (TransactionLog): Optional log that successful operations are written to
+        """
+        #Checking input type
+        if not isinstance(first_account_number, int):
+            raise CustomTypeError(f"Account number must be int, received {type(first_account_number)}")
+
+        # Ensuring account numbers start from 1045
+        if first_account_number < 1045:
+            raise CustomValueError(f"Account numbers start from 1045, received {first_account_number}")
+
+        self.first_account_number = first_account_number
+        self.next_account_number = first_account_number
+        self.owners = []
+        self.balances = array("d")
+        self.limits = array("d")
+        self.banned = bytearray()
+        self.ban_reasons = {}
+        self.journal = journal
+        self._count = 0
+
+
+    def open_account(self, owner: str, balance: float | int) -> int:
+        """
+        Method to open a new account, returns the account number of the new account.
+        """
+        # Checking input types
+        if not isinstance(owner, str):
+            raise CustomTypeError(f"Owner name must be string, received {type(owner)}")
+
+        if not isinstance(balance, (int,float)):
+            raise CustomTypeError(f"Balance amount must be int or float, received {type(balance)}")
+
+        # Checking input values
+        if balance < 0:
+            raise CustomValueError(f"Balance amount must be non-negative, received {balance}")
+
+        # Converting the balance before changing any column, so a failure (such as an int too large for a float) opens no account
+        opening_balance = float(balance + self.bonus)
+
+        account_number = self.next_account_number
+        self._grow_to(account_number + 1)
+
+        row = account_number - self.first_account_number
+        self.owners[row] = owner
+        self.balances[row] = opening_balance
+        self.next_account_number = account_number + 1
+        self._count += 1
+
+        # Ensuring bonus amount is correctly added to balance when opening new account
+        assert self.balances[row] == balance + self.bonus, "The bonus has not been correctly gifted"
+
+        if self.journal is not None:
+            self.journal.append(transaction_log.OPEN, account_number, 0, balance, owner)
+
+        return account_number
+
+
+    def open_accounts(self, owners, balances) -> range:
+        """
+        Method to open many accounts at once from columns of owners and opening balances, returns
+        the range of new account numbers in column order. The columns are checked as a whole before
+        any account is opened, so a rejected call opens none of them.
+        """
+        # Columns are read more than once, so other iterables are copied once up front
+        if not isinstance(owners, (list, tuple)):
+            owners = list(owners)
+
+        if not isinstance(balances, (list, tuple)):
+            balances = list(balances)
+
+        count = len(owners)
+
+        #Checking input values
+        if len(balances) != count:
+            raise CustomValueError(f"Owner and balance columns must have the same length, received {count} and {len(balances)}")
+
+        # Checking input types in bulk (join only accepts strings), a per row search only reports a failure
+        try:
+            "".join(owners)
+
+        except TypeError:
+            for owner in owners:
+                if not isinstance(owner, str):
+                    raise CustomTypeError(f"Owner name must be string, received {type(owner)}")
+
+        if not {*map(type, balances)} <= {int, float}:
+            for balance in balances:
+                if not isinstance(balance, (int,float)):
+                    raise CustomTypeError(f"Balance amount must be int or float, received {type(balance)}")
+
+        # Checking input values
+        if count and min(balances) < 0:
+            raise CustomValueError(f"Balance amount must be non-negative, received {min(balances)}")
+
+        # Building the new balances before changing any column, so a failure (such as an int too large for a float) opens no account
+        bonus = self.bonus
+        opening_balances = array("d", [balance + bonus for balance in balances])
+        start = self.next_account_number
+        row = start - self.first_account_number
+
+        # Rows skipped by set_next_account_number stay unallocated, the block itself is appended to every column
+        self._grow_to(start)
+        self.owners.extend(owners)
+        self.balances.extend(opening_balances)
+        self.limits.extend(array("d", [inf]) * count)
+        self.banned.extend(bytes(count))
+        self.next_account_number = start + count
+        self._count += count
+
+        # Ensuring bonus amount is correctly added to balance when opening new accounts
+        assert not count or self.balances[row + count - 1] == balances[-1] + self.bonus, "The bonus has not been correctly gifted"
+
+        if self.journal is not None:
+            append = self.journal.append
+
+            for account_number, owner, balance in zip(range(start, start + count), owners, balances):
+                append(transaction_log.OPEN, account_number, 0, balance, owner)
+
+        return range(start, start + count)
+
+
+    def set_next_account_number(self, next_account_number: int) -> None:
+        """
+        Method that sets the account number for the next account that will be opened.
+        Rows in between are left unallocated, as account numbers can not be reused in a store.
+        """
+        #Checking input type
+        if not isinstance(next_account_number, int):
+            raise CustomTypeError(f"Account number must be int, received {type(next_account_number)}")
+
+        if next_account_number < self.next_account_number:
+            raise CustomValueError(f"Account numbers up to {self.next_account_number - 1} are already allocated, received {next_account_number}")
+
+        self.next_account_number = next_account_number
+
+        if self.journal is not None:
+            self.journal.append(transaction_log.SET_NEXT_ACCOUNT_NUMBER, 0, next_account_number)
+
+
+    def _grow_to(self, end_account_number: int) -> None:
+        """
+        Extends every column so that rows exist up to (but excluding) end_account_number.
+        """
+        missing = end_account_number - self.first_account_number - len(self.owners)
+
+        if missing > 0:
+            self.owners.extend([None] * missing)
+            self.balances.extend(array("d", bytes(8 * missing)))
+            self.limits.extend(array("d", [inf]) * missing)
+            self.banned.extend(bytes(missing))
+
+
+    def _row(self, account_number: int) -> int:
+        """
+        Returns the row index of an existing account.
+        """
+        #Checking input type
+        if not isinstance(account_number, int):
+            raise CustomTypeError(f"Account number must be int, received {type(account_number)}")
+
+        row = account_number - self.first_account_number
+
+        if row < 0 or row >= len(self.owners) or self.owners[row] is None:
+            raise CustomKeyError(f"Account ({account_number}) does not exist", account_number=account_number)
+
+        return row
+
+
+    def _fast_row(self, account_number: int) -> int:
+        """
+        Same as _row, but only falls back to the full checks when the plain lookup fails.
+        Used on the deposit and withdrawal hot paths.
+        """
+        try:
+            row = account_number - self.first_account_number
+
+            if row >= 0 and self.owners[row] is not None:
+                return row
+
+        except (TypeError, IndexError):
+            pass
+
+        return self._row(account_number)
+
+
+    def __len__(self) -> int:
+        return self._count
+
+
+    def __contains__(self, account_number) -> bool:
+        row = account_number - self.first_account_number if isinstance(account_number, int) else -1
+        return 0 <= row < len(self.owners) and self.owners[row] is not None
+
+
+    def __getitem__(self, account_number: int) -> "AccountView":
+        self._row(account_number)
+        return AccountView(self, account_number)
+
+
+    def __iter__(self):
+        first = self.first_account_number
+
+        for row, owner in enumerate(self.owners):
+            if owner is not None:
+                yield AccountView(self, first + row)
+
+
+    def ban_account(self, account_number: int, reason: str) -> None:
+        """
+        Method used to flag an account as banned.
+        """
+        # Checking input types
+        if not isinstance(reason, str):
+            raise CustomTypeError(f"Reason to ban account must be string, received {type(reason)}")
+
+        row = self._row(account_number)
+
+        if self.banned[row]:
+            raise CustomOperationError("The account has already been banned")
+
+        self.banned[row] = 1
+        self.ban_reasons[account_number] = reason
+
+        if self.journal is not None:
+            self.journal.append(transaction_log.BAN, account_number, 0, 0.0, reason)
+
+
+    def unban_all(self) -> None:
+        """
+        Method that unbans every account in the store.
+        """
+        self.banned = bytearray(len(self.owners))
+        self.ban_reasons = {}
+
+        #Ensuring ban flags have been reset
+        assert not any(self.banned), "Ban flags have not been reset correctly"
+
+        if self.journal is not None:
+            self.journal.append(transaction_log.UNBAN_ALL)
+
+
+    def is_banned(self, account_number: int) -> bool:
+        """
+        Method to check if the account is banned
+        """
+        return self.banned[self._row(account_number)] == 1
+
+
+    def set_transaction_limit(self, account_number: int, limit: float | int | None) -> None:
+        """
+        Method to set the maximum transaction amount for withdrawals or transfers.
+        If limit is None, removes transaction limit.
+        """
+        #Checking input type
+        if limit is not None and not isinstance(limit, (int,float)):
+            raise CustomTypeError(f"Transaction limit must be a number, received {type(limit)}")
+
+        if limit is not None and limit < 0:
+            raise CustomValueError(f"Transaction limit must be non-negative, received {limit}")
+
+        self.limits[self._row(account_number)] = inf if limit is None else limit
+
+        if self.journal is not None:
+            self.journal.append(transaction_log.SET_LIMIT, account_number, 0, nan if limit is None else limit)
+
+
+    def transaction_limit(self, account_number: int) -> float | None:
+        """
+        Method that returns the transaction limit of an account (None if there is no limit).
+        """
+        limit = self.limits[self._row(account_number)]
+        return None if limit == inf else limit
+
+
+    def deposit(self, account_number: int, amount: float | int) -> None:
+        """
+        Method to add a specified non-negative amount to the balance of an account.
+        """
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Deposit amount must be int or float, received {type(amount)}", account_number=account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Deposit amount must be greater than 0, received {amount}", account_number=account_number, amount=amount)
+
+        row = self._fast_row(account_number)
+
+        #Checking if account is banned
+        if self.banned[row]:
+            raise CustomBannedError(f"Deposits restricted to Account ({account_number}) as it Banned", account_number=account_number, amount=amount)
+
+        self.balances[row] += amount
+
+        if self.journal is not None:
+            self.journal.append(transaction_log.DEPOSIT, account_number, 0, amount)
+
+
+    def withdraw(self, account_number: int, amount: float | int) -> None:
+        """
+        Method that deducts a specified non-negative amount from the balance of an account
+        if sufficient funds are available.
+        """
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Withdrawal amount must be int or float, received {type(amount)}", account_number=account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Withdrawal amount must be greater than 0, received {amount}", account_number=account_number, amount=amount)
+
+        row = self._fast_row(account_number)
+
+        #Checking if account is banned
+        if self.banned[row]:
+            raise CustomBannedError(f"Withdrawal restricted from Account ({account_number}) as it Banned", account_number=account_number, amount=amount)
+
+        starting_balance = self.balances[row]
+
+        #Checking sufficient balance
+        if amount > starting_balance:
+            raise CustomInsufficientFundsError(f"Insufficient funds in Account ({account_number}) for withdrawal", account_number=account_number, amount=amount)
+
+        #Checking transaction limits
+        if amount > self.limits[row]:
+            raise CustomLimitError(f"Withdrawal amount ${amount} exceeds maximum transaction limit ${self.limits[row]}", account_number=account_number, amount=amount, limit=self.limits[row])
+
+        self.balances[row] = starting_balance - amount
+
+        if self.journal is not None:
+            self.journal.append(transaction_log.WITHDRAW, account_number, 0, amount)
+
+
+    def transfer(self, source_account_number: int, target_account_number: int, amount: float | int) -> None:
+        """
+        Method that transfers a non-negative amount between two accounts of the store,
+        if enough funds exist.
+        """
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Transfer amount must be int or float, received {type(amount)}", account_number=source_account_number, amount=amount)
+
+        #Ensuring that target account is different from sending account
+        if source_account_number == target_account_number:
+            raise CustomValueError("Sender and receiver accounts must be different", account_number=source_account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Transfer amount must be greater than 0, received {amount}", account_number=source_account_number, amount=amount)
+
+        source_row = self._fast_row(source_account_number)
+        target_row = self._fast_row(target_account_number)
+
+        #Checking if either account is banned
+        if self.banned[source_row]:
+            raise CustomBannedError(f"Transfer restricted from Account ({source_account_number}) as it Banned", account_number=source_account_number, amount=amount)
+
+        if self.banned[target_row]:
+            raise CustomBannedError(f"Transfer restricted to Account ({target_account_number}) as it Banned", account_number=target_account_number, amount=amount)
+
+        starting_balance = self.balances[source_row]
+
+        #Checking sufficient balance
+        if amount > starting_balance:
+            raise CustomInsufficientFundsError(f"Transfer cannot be completed as insufficient funds in Account ({source_account_number})", account_number=source_account_number, amount=amount)
+
+        #Checking transaction limits
+        if amount > self.limits[source_row]:
+            raise CustomLimitError(f"Trasfer amount ${amount} exceeds maximum transaction limit ${self.limits[source_row]}", account_number=source_account_number, amount=amount, limit=self.limits[source_row])
+
+        self.balances[source_row] = starting_balance - amount
+        self.balances[target_row] += amount
+
+        if self.journal is not None:
+            self.journal.append(transaction_log.TRANSFER, source_account_number, target_account_number, amount)
+
+
+class AccountView:
+    """
+    Class for a lightweight view over a single row of an AccountStore. It offers the same
+    interface as BankAccount, but holds no account state of its own.
+
+    Instance Variables-
+        store (AccountStore): Store that holds the account
+        account_number (int): Account number of the viewed row
+    """
+
+    __slots__ = ("store", "account_number")
+
+    def __init__(self, store: AccountStore, account_number: int):
+        self.store = store
+        self.account_number = account_number
+
+
+    @property
+    def owner(self) -> str:
+        return self.store.owners[self.store._row(self.account_number)]
+
+
+    @property
+    def balance(self) -> float:
+        return self.store.balances[self.store._row(self.account_number)]
+
+
+    @property
+    def transaction_limit(self) -> float | None:
+        return self.store.transaction_limit(self.account_number)
+
+
+    def deposit(self, amount: float | int) -> None:
+        self.store.deposit(self.account_number, amount)
+
+
+    def withdraw(self, amount: float | int) -> None:
+        self.store.withdraw(self.account_number, amount)
+
+
+    def transfer_to(self, target_account: "AccountView", amount: float | int) -> None:
+        """
+        Method that transfers a non-negative amount to another account of the same store.
+        """
+        #Checking input type
+        if not isinstance(target_account, AccountView) or target_account.store is not self.store:
+            raise CustomTypeError("Target must be an AccountView of the same AccountStore")
+
+        self.store.transfer(self.account_number, target_account.account_number, amount)
+
+
+    def ban_account(self, reason: str) -> None:
+        self.store.ban_account(self.account_number, reason)
+
+
+    def set_transaction_limit(self, limit: float | int | None) -> None:
+        self.store.set_transaction_limit(self.account_number, limit)
+
+
+    def is_banned(self) -> bool:
+        return self.store.is_banned(self.account_number)
+
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, AccountView) and other.store is self.store and other.account_number == self.account_number
+
+
+    def __hash__(self) -> int:
+        return hash((id(self.store), self.account_number))
+
+
+    def __str__(self) -> str:
+
+        if self.transaction_limit is None:
+            limit = "N/A"
+
+        else:
+            limit = "{:,.2f}".format(self.transaction_limit)
+
+        if self.is_banned():
+            return f"{self.owner}'s account ({self.account_number}): Balance=${self.balance:,.2f} | Limit=${limit} | Banned=Yes | Ban Reason: {self.store.ban_reasons[self.account_number]}"
+
+        else:
+            return f"{self.owner}'s account ({self.account_number}): Balance=${self.balance:,.2f} | Limit=${limit} | Banned=No"
@@ -0,0 +1,187 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class AsyncAccountService, an asyncio front-end for BankAccount operations.
+Requests for the same account are queued and applied by one worker task in micro-batches, directly
+on the event loop, so no thread hopping is needed. Deposits and withdrawals of a plain BankAccount in
+one micro-batch are checked one by one against a running balance, which is written back once.
+A bounded queue per account provides backpressure.
+"""
+
+import asyncio
+
+from bank import BankAccount, _plain_deposit, _plain_withdraw
+from custom_errors import *
+from results import SUCCESS
+
+
+def _settle(future: asyncio.Future, operation, arguments: tuple) -> None:
+    """
+    Function that applies one request and sets its outcome on future. Errors are caught in this
+    function's own frame, so their tracebacks never hold the frame of the suspended worker task.
+    """
+    try:
+        future.set_result(operation(*arguments))
+
+    except Exception as error:
+        future.set_exception(error)
+
+
+class AsyncAccountService:
+    """
+    Class for an asyncio service that applies deposit, withdraw and transfer_to requests to
+    BankAccount instances. Errors raised by BankAccount are raised from the awaited call.
+
+    Instance Variables-
+        max_pending (int): Maximum number of queued requests per account before callers wait
+        max_batch (int): Maximum number of requests applied in one micro-batch
+        batches (int): Number of micro-batches applied so far
+    """
+
+    def __init__(self, max_pending: int = 1024, max_batch: int = 256):
+        """
+        Creates a new AsyncAccountService instance.
+
+        Arguments-
+            max_pending (int): Maximum number of queued requests per account
+            max_batch (int): Maximum number of requests applied in one micro-batch
+        """
+        #Checking input type
+        if not isinstance(max_pending, int) or not isinstance(max_batch, int):
+            raise CustomTypeError(f"Queue sizes must be int, received {type(max_pending)} and {type(max_batch)}")
+
+        #Checking input values
+        if max_pending < 1 or max_batch < 1:
+            raise CustomValueError(f"Queue sizes must be at least 1, received {max_pending} and {max_batch}")
+
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.batches = 0
+        self._queues = {}
+        self._workers = {}
+
+
+    async def deposit(self, account: BankAccount, amount: float | int) -> None:
+        await self._submit(account, "deposit", (amount,))
+
+
+    async def withdraw(self, account: BankAccount, amount: float | int) -> None:
+        await self._submit(account, "withdraw", (amount,))
+
+
+    async def transfer_to(self, account: BankAccount, target_account: BankAccount, amount: float | int) -> None:
+        # Transfers are ordered with the other requests of the sending account
+        await self._submit(account, "transfer_to", (target_account, amount))
+
+
+    async def _submit(self, account: BankAccount, operation: str, arguments: tuple) -> None:
+        """
+        Queues the named BankAccount method for account and waits for its outcome.
+        Waits while the account already has max_pending queued requests.
+        """
+        #Checking input type
+        if not isinstance(account, BankAccount):
+            raise CustomTypeError(f"Account must be a BankAccount instance, received {type(account)}")
+
+        queue = self._queues.get(account)
+
+        if queue is None:
+            queue = asyncio.Queue(self.max_pending)
+            self._queues[account] = queue
+            self._workers[account] = asyncio.create_task(self._drain(account, queue))
+
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((operation, arguments, future))
+
+        return await future
+
+
+    async def _drain(self, account: BankAccount, queue: asyncio.Queue) -> None:
+        """
+        Worker task for one account. Applies queued requests in micro-batches and exits
+        once the queue is empty, so idle accounts hold no task.
+        """
+        # Subclasses may add steps of their own (locking, journaling, limits) and Instrumentation records each call,
+        # so only accounts running the plain operations are coalesced
+        coalesce = type(account).deposit is _plain_deposit and type(account).withdraw is _plain_withdraw
+
+        while True:
+            batch = [await queue.get()]
+
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            if coalesce:
+                self._apply_coalesced(account, batch)
+
+            else:
+                for operation, arguments, future in batch:
+                    if not future.cancelled():
+                        _settle(future, getattr(account, operation), arguments)
+
+            self.batches += 1
+
+            # Giving other tasks a chance to queue more requests before checking for more work
+            await asyncio.sleep(0)
+
+            if queue.empty():
+                del self._queues[account]
+                del self._workers[account]
+                return
+
+
+    @staticmethod
+    def _apply_coalesced(account: BankAccount, batch: list) -> None:
+        """
+        Applies a micro-batch to a plain BankAccount. Each deposit and withdrawal is checked like
+        BankAccount checks it, against the balance left by the requests before it, and the balance
+        is written once. Transfers write the balance back first and go through transfer_to.
+        """
+        balance = account.balance
+
+        for operation, arguments, future in batch:
+            if future.cancelled():
+                continue
+
+            if operation == "deposit":
+                result = account._deposit_result(arguments[0])
+
+                if result is SUCCESS:
+                    balance += arguments[0]
+                    future.set_result(None)
+
+                else:
+                    future.set_exception(result.error())
+
+            elif operation == "withdraw":
+                result = account._withdrawal_result(arguments[0], balance)
+
+                if result is SUCCESS:
+                    balance -= arguments[0]
+                    future.set_result(None)
+
+                else:
+                    future.set_exception(result.error())
+
+            else:
+                account.balance = balance
+                _settle(future, getattr(account, operation), arguments)
+                balance = account.balance
+
+        account.balance = balance
+
+
+    async def close(self) -> None:
+        """
+        Method that waits until every queued request has been applied.
+        """
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()))
+
+
+    async def __aenter__(self) -> "AsyncAccountService":
+        return self
+
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
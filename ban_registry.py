@@ -0,0 +1,247 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class BanRegistry, a compact replacement for the banned accounts dictionary.
+Membership is a bitmap over the account number range and every ban reason is interned once and
+referred to by a small code, so large cohorts can be banned and unbanned in bulk. The registry
+behaves like a dictionary of account number -> reason, so it can be installed as
+BankAccount.banned_accounts without changing BankAccount.
+"""
+
+from array import array
+from collections.abc import MutableMapping
+from itertools import chain
+
+from custom_errors import *
+
+class BanRegistry(MutableMapping):
+    """
+    Class for a registry of banned accounts and their ban reasons.
+
+    Instance Variables-
+        first_account_number (int): Account number of bit 0 of the bitmap
+        reasons (list): Interned ban reasons, indexed by reason code
+    """
+
+    def __init__(self, first_account_number: int = 1045):
+        """
+        Creates a new, empty BanRegistry.
+
+        Arguments-
+            first_account_number (int): Lowest account number that can be banned
+        """
+        #Checking input type
+        if not isinstance(first_account_number, int):
+            raise CustomTypeError(f"Account number must be int, received {type(first_account_number)}")
+
+        self.first_account_number = first_account_number
+        self.reasons = []
+        self._reason_codes = {}
+        self._bits = bytearray()
+        self._codes = array("H")
+        self._count = 0
+
+
+    def _row(self, account_number: int) -> int:
+        """
+        Returns the bit index of an account number, growing the bitmap to cover it.
+        """
+        #Checking input type
+        if not isinstance(account_number, int):
+            raise CustomTypeError(f"Account number must be int, received {type(account_number)}")
+
+        row = account_number - self.first_account_number
+
+        if row < 0:
+            raise CustomValueError(f"Account numbers start from {self.first_account_number}, received {account_number}")
+
+        if row >= len(self._codes):
+            size = max(row + 1, 2 * len(self._codes), 1024)
+            size += -size % 8
+            self._bits.extend(bytes(size // 8 - len(self._bits)))
+            self._codes.extend(array("H", bytes(2 * (size - len(self._codes)))))
+
+        return row
+
+
+    def _reason_code(self, reason: str) -> int:
+        """
+        Returns the code of a ban reason, interning the reason on first use.
+        """
+        #Checking input type
+        if not isinstance(reason, str):
+            raise CustomTypeError(f"Reason to ban account must be string, received {type(reason)}")
+
+        code = self._reason_codes.get(reason)
+
+        if code is None:
+            if len(self.reasons) > 0xFFFF:
+                raise CustomValueError("A ban registry can hold at most 65536 distinct ban reasons")
+
+            code = len(self.reasons)
+            self.reasons.append(reason)
+            self._reason_codes[reason] = code
+
+        return code
+
+
+    def is_banned(self, account_number: int) -> bool:
+        """
+        Method to check if an account is banned, in constant time.
+        """
+        row = account_number - self.first_account_number
+        return 0 <= row < len(self._codes) and self._bits[row >> 3] >> (row & 7) & 1 == 1
+
+
+    def __contains__(self, account_number) -> bool:
+        # BankAccount.is_banned runs this on every operation, so the bit test is inlined and
+        # account numbers that are not int or lie past the bitmap fall out as exceptions
+        try:
+            row = account_number - self.first_account_number
+            return row >= 0 and self._bits[row >> 3] >> (row & 7) & 1 == 1
+
+        except (TypeError, IndexError):
+            return False
+
+
+    def __getitem__(self, account_number: int) -> str:
+        if not self.__contains__(account_number):
+            raise KeyError(account_number)
+
+        return self.reasons[self._codes[account_number - self.first_account_number]]
+
+
+    def __setitem__(self, account_number: int, reason: str) -> None:
+        code = self._reason_code(reason)
+        row = self._row(account_number)
+        mask = 1 << (row & 7)
+
+        if not self._bits[row >> 3] & mask:
+            self._bits[row >> 3] |= mask
+            self._count += 1
+
+        self._codes[row] = code
+
+
+    def __delitem__(self, account_number: int) -> None:
+        if not self.__contains__(account_number):
+            raise KeyError(account_number)
+
+        row = account_number - self.first_account_number
+        self._bits[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+        self._count -= 1
+
+
+    def __iter__(self):
+        first = self.first_account_number
+
+        for index, byte in enumerate(self._bits):
+            if byte:
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield first + index * 8 + bit
+
+
+    def __len__(self) -> int:
+        return self._count
+
+
+    def clear(self) -> None:
+        self._bits = bytearray(len(self._bits))
+        self._count = 0
+
+
+    def ban_many(self, account_numbers, reason: str) -> None:
+        """
+        Method that bans every account in account_numbers with the same reason.
+        Accounts that are already banned get the new reason.
+        """
+        code = self._reason_code(reason)
+
+        for account_number in account_numbers:
+            row = self._row(account_number)
+            mask = 1 << (row & 7)
+
+            if not self._bits[row >> 3] & mask:
+                self._bits[row >> 3] |= mask
+                self._count += 1
+
+            self._codes[row] = code
+
+
+    def unban_many(self, account_numbers) -> None:
+        """
+        Method that unbans every account in account_numbers. Accounts that are not banned are skipped.
+        """
+        for account_number in account_numbers:
+            if self.__contains__(account_number):
+                del self[account_number]
+
+
+    def _set_range(self, start: int, stop: int, banned: bool) -> None:
+        """
+        Sets or clears the bits of rows start to stop (excluding stop). Whole bytes in the
+        middle of the range are written in one slice assignment.
+        """
+        bits = self._bits
+        before = int.from_bytes(bits[start >> 3:(stop + 7) >> 3], "little").bit_count()
+
+        head_stop = min(stop, (start + 7) & ~7)
+        tail_start = max(head_stop, stop & ~7)
+
+        for row in chain(range(start, head_stop), range(tail_start, stop)):
+            if banned:
+                bits[row >> 3] |= 1 << (row & 7)
+            else:
+                bits[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+        if head_stop < tail_start:
+            bits[head_stop >> 3:tail_start >> 3] = (b"\xff" if banned else b"\x00") * ((tail_start - head_stop) >> 3)
+
+        after = int.from_bytes(bits[start >> 3:(stop + 7) >> 3], "little").bit_count()
+        self._count += after - before
+
+
+    def ban_range(self, start_account_number: int, stop_account_number: int, reason: str) -> None:
+        """
+        Method that bans every account number from start_account_number up to (excluding)
+        stop_account_number with the same reason.
+        """
+        code = self._reason_code(reason)
+
+        if stop_account_number <= start_account_number:
+            return
+
+        start = self._row(start_account_number)
+        stop = self._row(stop_account_number - 1) + 1
+
+        self._set_range(start, stop, True)
+        self._codes[start:stop] = array("H", [code]) * (stop - start)
+
+
+    def unban_range(self, start_account_number: int, stop_account_number: int) -> None:
+        """
+        Method that unbans every account number from start_account_number up to (excluding)
+        stop_account_number.
+        """
+        first = self.first_account_number
+        start = max(start_account_number - first, 0)
+        stop = min(stop_account_number - first, len(self._codes))
+
+        if start < stop:
+            self._set_range(start, stop, False)
+
+
+    def unban_reason(self, reason: str) -> int:
+        """
+        Method that unbans every account banned for reason, returns the number of unbanned accounts.
+        """
+        code = self._reason_codes.get(reason)
+
+        if code is None:
+            return 0
+
+        unbanned = [account_number for account_number in self if self._codes[account_number - self.first_account_number] == code]
+        self.unban_many(unbanned)
+
+        return len(unbanned)
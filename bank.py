@@ -4,9 +4,13 @@ Name- Suveer Dhawan
 This program creates class BankAccount to represent a basic bank account system. 
 We use custom errors from custom_errors.py for assertions and defensive programming. 
 Our basic system has the functionality to deposit, withdraw, and transfer money, and to ban users.
+The try_ methods perform the same operations but return a Result instead of raising when rejected.
 """
 
+from itertools import count
+
 from custom_errors import *
+from results import SUCCESS, Result, Status
 
 class BankAccount:
     """
@@ -16,7 +20,7 @@ class BankAccount:
     Class Variables-
         account_number (int): Unique Account ID associated with each account
         bonus (float): Bonus gift for opening account - $49.99
-        banned_accounts (dictionary): Dictionary of restricted/banned accounts and ban reasons
+        banned_accounts (dictionary): Dictionary of restricted/banned accounts and ban reasons (or a BanRegistry)
 
     Instance Variables-
         owner (string): Name of account owner
@@ -26,6 +30,9 @@ class BankAccount:
     """
 
     account_number = 1045
+    # Source of account numbers. next() on an itertools.count is atomic under the GIL,
+    # so accounts can be opened from several threads without a lock
+    _account_numbers = count(1045)
     bonus = 49.99
     banned_accounts = {}
 
@@ -52,8 +59,7 @@ class BankAccount:
         self.balance = balance + self.bonus
         
         # Setting bank account number for instance, and updating count for class
-        self.account_number = BankAccount.account_number
-        BankAccount.account_number += 1
+        self.account_number = self._allocate_account_number()
         
         self.transaction_limit = None
 
@@ -61,6 +67,21 @@ class BankAccount:
         assert self.balance == balance + BankAccount.bonus, "The bonus has not been correctly gifted"
 
     
+    @classmethod
+    def _allocate_account_number(cls) -> int:
+        """
+        Class method that returns the account number for a new account and updates the count for the class.
+        Subclasses override this to change how account numbers are handed out.
+        """
+        account_number = next(BankAccount._account_numbers)
+
+        # Only a larger next number is published, so a thread switched out after next() can not move the count back
+        if account_number >= BankAccount.account_number:
+            BankAccount.account_number = account_number + 1
+
+        return account_number
+
+
     @classmethod
     def set_next_account_number(cls, next_account_number: int) -> None:
         """
@@ -74,10 +95,12 @@ class BankAccount:
         if next_account_number < 1045:
             raise CustomValueError(f"Account numbers start from 1045, received {next_account_number}")
         
-        cls.account_number = next_account_number
+        # Counter is shared by BankAccount and its subclasses
+        BankAccount._account_numbers = count(next_account_number)
+        BankAccount.account_number = next_account_number
 
         #Checking if account number is incremented
-        assert cls.account_number == next_account_number, "Next account number has not been set correctly"
+        assert BankAccount.account_number == next_account_number, "Next account number has not been set correctly"
 
     
     def ban_account(self, reason:str) -> None:
@@ -100,7 +123,8 @@ class BankAccount:
         """
         Class Method that ensures all accounts are unbanned by resetting dictionary. 
         """
-        cls.banned_accounts = {}
+        # Banned accounts are shared by BankAccount and its subclasses, clearing in place keeps an installed BanRegistry
+        BankAccount.banned_accounts.clear()
 
         #Ensuring banned account dict has been reset
         assert len(BankAccount.banned_accounts) == 0, "Banned accounts dictionary has not been reset correctly" 
@@ -112,15 +136,15 @@ class BankAccount:
         """
         #Checking input type
         if not isinstance(amount, (int, float)):
-            raise CustomTypeError(f"Deposit amount must be int or float, received {type(amount)}") 
+            raise CustomTypeError(f"Deposit amount must be int or float, received {type(amount)}", account_number=self.account_number, amount=amount) 
 
         #Checking input values
         if amount < 0:
-            raise CustomValueError(f"Deposit amount must be greater than 0, received {amount}")
+            raise CustomValueError(f"Deposit amount must be greater than 0, received {amount}", account_number=self.account_number, amount=amount)
 
         #Checking if account is banned
         if self.is_banned():
-            raise CustomOperationError(f"Deposits restricted to Account ({self.account_number}) as it Banned")
+            raise CustomBannedError(f"Deposits restricted to Account ({self.account_number}) as it Banned", account_number=self.account_number, amount=amount)
 
         
         starting_balance = self.balance
@@ -143,24 +167,25 @@ class BankAccount:
         """
         #Checking input type
         if not isinstance(amount, (int, float)):
-            raise CustomTypeError(f"Withdrawal amount must be int or float, received {type(amount)}") 
+            raise CustomTypeError(f"Withdrawal amount must be int or float, received {type(amount)}", account_number=self.account_number, amount=amount) 
 
         #Checking input values
         if amount < 0:
-            raise CustomValueError(f"Withdrawal amount must be greater than 0, received {amount}")
+            raise CustomValueError(f"Withdrawal amount must be greater than 0, received {amount}", account_number=self.account_number, amount=amount)
 
         #Checking if account is banned
         if self.is_banned():
-            raise CustomOperationError(f"Withdrawal restricted from Account ({self.account_number}) as it Banned")
+            raise CustomBannedError(f"Withdrawal restricted from Account ({self.account_number}) as it Banned", account_number=self.account_number, amount=amount)
 
         starting_balance = self.balance
 
         #Checking sufficient balance
-        assert amount <= starting_balance, f"Insufficient funds in Account ({self.account_number}) for withdrawal"
+        if amount > starting_balance:
+            raise CustomInsufficientFundsError(f"Insufficient funds in Account ({self.account_number}) for withdrawal", account_number=self.account_number, amount=amount)
 
         #Checking transaction limits
         if self.transaction_limit is not None and amount > self.transaction_limit:
-            raise CustomLimitError(f"Withdrawal amount ${amount} exceeds maximum transaction limit ${self.transaction_limit}")
+            raise CustomLimitError(f"Withdrawal amount ${amount} exceeds maximum transaction limit ${self.transaction_limit}", account_number=self.account_number, amount=amount, limit=self.transaction_limit)
         
 
         self.balance -= amount
@@ -181,35 +206,36 @@ class BankAccount:
         """
         #Checking input type
         if not isinstance(target_account, BankAccount):
-            raise CustomTypeError("Target must be a BankAccount instance")
+            raise CustomTypeError("Target must be a BankAccount instance", account_number=self.account_number, amount=amount)
 
         if not isinstance(amount, (int, float)):
-            raise CustomTypeError(f"Transfer amount must be int or float, received {type(amount)}") 
+            raise CustomTypeError(f"Transfer amount must be int or float, received {type(amount)}", account_number=self.account_number, amount=amount) 
 
         #Ensuring that target_account is different form sending account
         if self is target_account:
-            raise CustomValueError("Sender and receiver accounts must be different")
+            raise CustomValueError("Sender and receiver accounts must be different", account_number=self.account_number, amount=amount)
         
         #Checking input values
         if amount < 0:
-            raise CustomValueError(f"Transfer amount must be greater than 0, received {amount}")
+            raise CustomValueError(f"Transfer amount must be greater than 0, received {amount}", account_number=self.account_number, amount=amount)
 
         #Checking if either account is banned
         if self.is_banned():
-            raise CustomOperationError(f"Transfer restricted from Account ({self.account_number}) as it Banned")
+            raise CustomBannedError(f"Transfer restricted from Account ({self.account_number}) as it Banned", account_number=self.account_number, amount=amount)
 
         if target_account.is_banned():
-            raise CustomOperationError(f"Transfer restricted to Account ({target_account.account_number}) as it Banned")
+            raise CustomBannedError(f"Transfer restricted to Account ({target_account.account_number}) as it Banned", account_number=target_account.account_number, amount=amount)
 
         starting_balance = self.balance
         target_starting_balance = target_account.balance
 
         #Checking sufficient balance
-        assert amount <= starting_balance, f"Transfer cannot be completed as insufficient funds in Account ({self.account_number})"
+        if amount > starting_balance:
+            raise CustomInsufficientFundsError(f"Transfer cannot be completed as insufficient funds in Account ({self.account_number})", account_number=self.account_number, amount=amount)
 
         #Checking transaction limits
         if self.transaction_limit is not None and amount > self.transaction_limit:
-            raise CustomLimitError(f"Trasfer amount ${amount} exceeds maximum transaction limit ${self.transaction_limit}")
+            raise CustomLimitError(f"Trasfer amount ${amount} exceeds maximum transaction limit ${self.transaction_limit}", account_number=self.account_number, amount=amount, limit=self.transaction_limit)
 
         
         self.withdraw(amount)
@@ -226,6 +252,134 @@ class BankAccount:
             assert target_account.balance > target_starting_balance, f"Transfer amount has not been credited to Account ({target_account.account_number})"
 
     
+    def _deposit_result(self, amount) -> Result:
+        """
+        Checks a deposit like deposit does, returns SUCCESS or the rejected Result without changing the balance.
+        """
+        if not isinstance(amount, (int, float)):
+            return Result(Status.INVALID_TYPE, "Deposit amount must be int or float, received {amount_type}", self.account_number, amount)
+
+        if amount < 0:
+            return Result(Status.INVALID_VALUE, "Deposit amount must be greater than 0, received {amount}", self.account_number, amount)
+
+        if self.is_banned():
+            return Result(Status.BANNED, "Deposits restricted to Account ({account_number}) as it Banned", self.account_number, amount)
+
+        return SUCCESS
+
+
+    def _withdrawal_result(self, amount, balance: float | int) -> Result:
+        """
+        Checks a withdrawal like withdraw does against balance, returns SUCCESS or the rejected Result without changing the balance.
+        """
+        if not isinstance(amount, (int, float)):
+            return Result(Status.INVALID_TYPE, "Withdrawal amount must be int or float, received {amount_type}", self.account_number, amount)
+
+        if amount < 0:
+            return Result(Status.INVALID_VALUE, "Withdrawal amount must be greater than 0, received {amount}", self.account_number, amount)
+
+        if self.is_banned():
+            return Result(Status.BANNED, "Withdrawal restricted from Account ({account_number}) as it Banned", self.account_number, amount)
+
+        if amount > balance:
+            return Result(Status.INSUFFICIENT_FUNDS, "Insufficient funds in Account ({account_number}) for withdrawal", self.account_number, amount)
+
+        if self.transaction_limit is not None and amount > self.transaction_limit:
+            return Result(Status.LIMIT_EXCEEDED, "Withdrawal amount ${amount} exceeds maximum transaction limit ${limit}", self.account_number, amount, self.transaction_limit)
+
+        return SUCCESS
+
+
+    def try_deposit(self, amount: float | int) -> Result:
+        """
+        Method that deposits like deposit, but returns a Result instead of raising when the deposit is rejected.
+        """
+        # Subclasses may add checks of their own to deposit and Instrumentation replaces it to record calls, so
+        # unless deposit is the plain one every call goes through it
+        if type(self).deposit is not _plain_deposit:
+            try:
+                self.deposit(amount)
+
+            except CustomError as error:
+                return Result.from_error(error)
+
+            return SUCCESS
+
+        result = self._deposit_result(amount)
+
+        if result is not SUCCESS:
+            return result
+
+        self.balance += amount
+        return SUCCESS
+
+
+    def try_withdraw(self, amount: float | int) -> Result:
+        """
+        Method that withdraws like withdraw, but returns a Result instead of raising when the withdrawal is rejected.
+        """
+        # Unless withdraw is the plain one (see try_deposit) every call goes through it
+        if type(self).withdraw is not _plain_withdraw:
+            try:
+                self.withdraw(amount)
+
+            except CustomError as error:
+                return Result.from_error(error)
+
+            return SUCCESS
+
+        result = self._withdrawal_result(amount, self.balance)
+
+        if result is not SUCCESS:
+            return result
+
+        self.balance -= amount
+        return SUCCESS
+
+
+    def try_transfer_to(self, target_account: "BankAccount", amount: float | int) -> Result:
+        """
+        Method that transfers like transfer_to, but returns a Result instead of raising when the transfer is rejected.
+        """
+        if not isinstance(target_account, BankAccount):
+            return Result(Status.INVALID_TYPE, "Target must be a BankAccount instance", self.account_number, amount)
+
+        # Unless the transfer runs only plain operations (see try_deposit) every call goes through transfer_to
+        if type(self).transfer_to is not _plain_transfer_to or type(self).withdraw is not _plain_withdraw or type(target_account).deposit is not _plain_deposit:
+            try:
+                self.transfer_to(target_account, amount)
+
+            except CustomError as error:
+                return Result.from_error(error)
+
+            return SUCCESS
+
+        if not isinstance(amount, (int, float)):
+            return Result(Status.INVALID_TYPE, "Transfer amount must be int or float, received {amount_type}", self.account_number, amount)
+
+        if self is target_account:
+            return Result(Status.INVALID_VALUE, "Sender and receiver accounts must be different", self.account_number, amount)
+
+        if amount < 0:
+            return Result(Status.INVALID_VALUE, "Transfer amount must be greater than 0, received {amount}", self.account_number, amount)
+
+        if self.is_banned():
+            return Result(Status.BANNED, "Transfer restricted from Account ({account_number}) as it Banned", self.account_number, amount)
+
+        if target_account.is_banned():
+            return Result(Status.BANNED, "Transfer restricted to Account ({account_number}) as it Banned", target_account.account_number, amount)
+
+        if amount > self.balance:
+            return Result(Status.INSUFFICIENT_FUNDS, "Transfer cannot be completed as insufficient funds in Account ({account_number})", self.account_number, amount)
+
+        if self.transaction_limit is not None and amount > self.transaction_limit:
+            return Result(Status.LIMIT_EXCEEDED, "Trasfer amount ${amount} exceeds maximum transaction limit ${limit}", self.account_number, amount, self.transaction_limit)
+
+        self.balance -= amount
+        target_account.balance += amount
+        return SUCCESS
+
+
     def set_transaction_limit(self, limit: float | int | None) -> None:
         """
         Method to set the maximum transaction amount for withdrawals or transfers.
@@ -260,4 +414,11 @@ class BankAccount:
             return f"{self.owner}'s account ({self.account_number}): Balance=${self.balance:,.2f} | Limit=${limit} | Banned=Yes | Ban Reason: {BankAccount.banned_accounts[self.account_number]}"
 
         else:
-            return f"{self.owner}'s account ({self.account_number}): Balance=${self.balance:,.2f} | Limit=${limit} | Banned=No"
\ No newline at end of file
+            return f"{self.owner}'s account ({self.account_number}): Balance=${self.balance:,.2f} | Limit=${limit} | Banned=No"
+
+
+# The plain operations, kept before subclasses or Instrumentation can replace them. While an account's class
+# still runs them, the try_ methods (and AsyncAccountService) check and update its balance directly.
+_plain_deposit = BankAccount.deposit
+_plain_withdraw = BankAccount.withdraw
+_plain_transfer_to = BankAccount.transfer_to
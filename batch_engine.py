@@ -0,0 +1,257 @@
+"""
+Name- Suveer Dhawan
+
+This program posts batches of deposits, withdrawals and transfers against an AccountStore in a
+single pass over the columns. Rows are checked exactly like BankAccount.deposit, BankAccount.withdraw
+and BankAccount.transfer_to, but a bad row is recorded as a result code instead of raising,
+so the rest of the batch is still posted.
+"""
+
+from array import array
+from collections import defaultdict
+
+import transaction_log
+from account_store import AccountStore
+from custom_errors import *
+from results import STATUS_ERRORS, Status
+
+# Kinds of posting
+DEPOSIT = 0
+WITHDRAW = 1
+
+# Result codes, one per row (the Status codes shared with BankAccount's try_ methods)
+OK = Status.OK
+INVALID_TYPE = Status.INVALID_TYPE
+INVALID_VALUE = Status.INVALID_VALUE
+UNKNOWN_ACCOUNT = Status.UNKNOWN_ACCOUNT
+BANNED = Status.BANNED
+INSUFFICIENT_FUNDS = Status.INSUFFICIENT_FUNDS
+LIMIT_EXCEEDED = Status.LIMIT_EXCEEDED
+INVALID_KIND = Status.INVALID_KIND
+
+# Error the scalar methods raise for each result code
+RESULT_ERRORS = STATUS_ERRORS
+
+
+def _check_columns(*columns) -> int:
+    """
+    Ensures all columns of a batch have the same length and returns that length.
+    """
+    count = len(columns[0])
+
+    for column in columns[1:]:
+        if len(column) != count:
+            raise CustomValueError(f"Batch columns must have the same length, received {[len(column) for column in columns]}")
+
+    return count
+
+
+def post_batch(store: AccountStore, account_numbers, amounts, kinds) -> array:
+    """
+    Function that applies a batch of deposits and withdrawals to store in row order.
+
+    Arguments-
+        store (AccountStore): Store holding the accounts
+        account_numbers (sequence of int): Account number per row
+        amounts (sequence of int/float): Non-negative amount per row
+        kinds (sequence of int): DEPOSIT or WITHDRAW per row
+
+    Returns an array of result codes, one per row. Only rows with code OK change a balance,
+    and only those rows are written to the store's journal.
+    """
+    #Checking input type
+    if not isinstance(store, AccountStore):
+        raise CustomTypeError(f"Store must be an AccountStore instance, received {type(store)}")
+
+    count = _check_columns(account_numbers, amounts, kinds)
+    results = array("b", bytes(count))
+
+    # Binding columns to locals keeps the loop free of attribute lookups
+    owners = store.owners
+    balances = store.balances
+    limits = store.limits
+    banned = store.banned
+    first = store.first_account_number
+    size = len(owners)
+
+    for i, (account_number, amount, kind) in enumerate(zip(account_numbers, amounts, kinds)):
+
+        #Checking input types
+        if not isinstance(amount, (int, float)) or not isinstance(account_number, int):
+            results[i] = INVALID_TYPE
+            continue
+
+        if kind != DEPOSIT and kind != WITHDRAW:
+            results[i] = INVALID_KIND
+            continue
+
+        #Checking input values
+        if amount < 0:
+            results[i] = INVALID_VALUE
+            continue
+
+        row = account_number - first
+
+        if row < 0 or row >= size or owners[row] is None:
+            results[i] = UNKNOWN_ACCOUNT
+            continue
+
+        #Checking if account is banned
+        if banned[row]:
+            results[i] = BANNED
+            continue
+
+        if kind == DEPOSIT:
+            balances[row] += amount
+
+        else:
+            balance = balances[row]
+
+            #Checking sufficient balance
+            if amount > balance:
+                results[i] = INSUFFICIENT_FUNDS
+
+            #Checking transaction limits
+            elif amount > limits[row]:
+                results[i] = LIMIT_EXCEEDED
+
+            else:
+                balances[row] = balance - amount
+
+    if store.journal is not None:
+        append = store.journal.append
+
+        for code, account_number, amount, kind in zip(results, account_numbers, amounts, kinds):
+            if code == OK:
+                append(transaction_log.DEPOSIT if kind == DEPOSIT else transaction_log.WITHDRAW, account_number, 0, amount)
+
+    return results
+
+
+def transfer_batch(store: AccountStore, source_account_numbers, target_account_numbers, amounts) -> array:
+    """
+    Function that settles a batch of transfers between accounts of store.
+
+    Transfers are netted per account: every row that passes the per-row checks is first counted
+    in its accounts' net positions for the whole batch, so a row may spend money that reaches its
+    account in any row of the batch, earlier or later. Only while an account's net position is
+    negative is one of its transfers rejected as INSUFFICIENT_FUNDS, starting with its last row.
+    A rejection takes the credit away from the target, so the target is checked again, and this
+    repeats until every net position is covered. Balances are only written once the batch is
+    settled, so the batch commits atomically with one write per touched account.
+
+    Arguments-
+        store (AccountStore): Store holding the accounts
+        source_account_numbers (sequence of int): Sending account number per row
+        target_account_numbers (sequence of int): Receiving account number per row
+        amounts (sequence of int/float): Non-negative amount per row
+
+    Returns an array of result codes, one per row, using the same codes as post_batch.
+    """
+    #Checking input type
+    if not isinstance(store, AccountStore):
+        raise CustomTypeError(f"Store must be an AccountStore instance, received {type(store)}")
+
+    count = _check_columns(source_account_numbers, target_account_numbers, amounts)
+    results = array("b", bytes(count))
+
+    owners = store.owners
+    balances = store.balances
+    limits = store.limits
+    banned = store.banned
+    first = store.first_account_number
+    size = len(owners)
+
+    # Net position of every touched account for the whole batch, keyed by row
+    positions = {}
+
+    # Indexes of the accepted transfers sent by each account, in row order
+    outgoing = defaultdict(list)
+
+    # Rows over their limit, decided once the positions are settled as (row index, source row, amount)
+    over_limit = []
+
+    for i, (source, target, amount) in enumerate(zip(source_account_numbers, target_account_numbers, amounts)):
+
+        #Checking input types
+        if not isinstance(amount, (int, float)) or not isinstance(source, int) or not isinstance(target, int):
+            results[i] = INVALID_TYPE
+            continue
+
+        #Ensuring that target account is different from sending account, and checking input values
+        if source == target or amount < 0:
+            results[i] = INVALID_VALUE
+            continue
+
+        source_row = source - first
+        target_row = target - first
+
+        if (source_row < 0 or source_row >= size or owners[source_row] is None
+                or target_row < 0 or target_row >= size or owners[target_row] is None):
+            results[i] = UNKNOWN_ACCOUNT
+            continue
+
+        #Checking if either account is banned
+        if banned[source_row] or banned[target_row]:
+            results[i] = BANNED
+            continue
+
+        #Checking transaction limits
+        if amount > limits[source_row]:
+            over_limit.append((i, source_row, amount))
+            continue
+
+        if source_row in positions:
+            positions[source_row] -= amount
+        else:
+            positions[source_row] = balances[source_row] - amount
+
+        outgoing[source_row].append(i)
+
+        if target_row in positions:
+            positions[target_row] += amount
+        else:
+            positions[target_row] = balances[target_row] + amount
+
+    # Checking sufficient balance against the netted positions, backing out the latest
+    # transfers of every account that can not cover what it sends
+    short = [row for row, position in positions.items() if position < 0]
+
+    while short:
+        row = short.pop()
+        sent = outgoing[row]
+
+        while sent and positions[row] < 0:
+            i = sent.pop()
+            target_row = target_account_numbers[i] - first
+            amount = amounts[i]
+            results[i] = INSUFFICIENT_FUNDS
+            positions[row] += amount
+
+            position = positions[target_row] - amount
+            positions[target_row] = position
+
+            if position < 0 and position + amount >= 0:
+                short.append(target_row)
+
+    # A row over its limit that could not have been funded either is rejected for its funds,
+    # like transfer_to, which checks the balance before the limit
+    for i, source_row, amount in over_limit:
+        position = positions.get(source_row)
+        if position is None:
+            position = balances[source_row]
+
+        results[i] = INSUFFICIENT_FUNDS if amount > position else LIMIT_EXCEEDED
+
+    # Committing netted positions, nothing above writes to the store
+    for row, position in positions.items():
+        balances[row] = position
+
+    if store.journal is not None:
+        append = store.journal.append
+
+        for code, source, target, amount in zip(results, source_account_numbers, target_account_numbers, amounts):
+            if code == OK:
+                append(transaction_log.TRANSFER, source, target, amount)
+
+    return results
@@ -0,0 +1,1270 @@
+"""
+Name- Suveer Dhawan
+
+This program contains benchmarks for the banking system. Each benchmark prints its results
+and returns them as a dictionary. Run a single benchmark with
+
+    python benchmarks.py <name>
+
+or every benchmark by giving no name.
+"""
+
+import asyncio
+import bisect
+import heapq
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from itertools import accumulate
+from decimal import Decimal
+
+from bank import BankAccount
+from account_store import AccountStore
+from batch_engine import DEPOSIT, WITHDRAW, post_batch, transfer_batch
+from thread_safe_bank import ThreadSafeBankAccount
+from async_bank import AsyncAccountService
+from transaction_log import DEPOSIT as LOG_DEPOSIT, SYNC_ALWAYS, SYNC_GROUP, SYNC_NONE, JournaledBankAccount, TransactionLog
+from snapshot import recover, write_snapshot
+from money import CentsBankAccount
+from ban_registry import BanRegistry
+from fast_bank import FastBankAccount
+import request_processor
+from sharded_ledger import ShardedLedger
+from account_allocator import BlockAllocator
+from history import AccountHistory
+from book_metrics import BookMetrics, MeteredBankAccount
+from velocity_limits import RollingWindows, VelocityBankAccount
+from instrumentation import Instrumentation
+from idempotency import IdempotencyCache, IdempotentBankAccount
+from ledger import Ledger, LedgerBankAccount
+from transactions import Transaction, VersionedBankAccount
+from sqlite_store import SQLiteBankAccount, SQLiteStore
+from account_cache import AccountCache
+from custom_errors import CustomInsufficientFundsError, CustomLimitError, CustomValueError
+
+
+def _timed(function) -> float:
+    """
+    Runs function once and returns the elapsed wall clock time in seconds.
+    """
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _traced_memory(function) -> int:
+    """
+    Runs function once and returns the number of bytes it left allocated.
+    The result of function is kept alive until the measurement is taken.
+    """
+    tracemalloc.start()
+    result = function()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return allocated
+
+
+def bench_account_store(accounts: int = 200_000, operations: int = 500_000) -> dict:
+    """
+    Compares memory use and deposit/withdraw throughput of plain BankAccount objects
+    against an AccountStore holding the same accounts.
+    """
+    def open_objects():
+        BankAccount.set_next_account_number(1045)
+        return [BankAccount("Owner", 100) for _ in range(accounts)]
+
+    def open_store():
+        store = AccountStore()
+        for _ in range(accounts):
+            store.open_account("Owner", 100)
+        return store
+
+    object_bytes = _traced_memory(open_objects)
+    store_bytes = _traced_memory(open_store)
+
+    rng = random.Random(7)
+    targets = [rng.randrange(accounts) for _ in range(operations)]
+
+    objects = open_objects()
+    store = open_store()
+    first = store.first_account_number
+
+    def object_ops():
+        for index in targets:
+            account = objects[index]
+            account.deposit(10)
+            account.withdraw(10)
+
+    def store_ops():
+        deposit = store.deposit
+        withdraw = store.withdraw
+        for index in targets:
+            deposit(first + index, 10)
+            withdraw(first + index, 10)
+
+    object_seconds = _timed(object_ops)
+    store_seconds = _timed(store_ops)
+
+    results = {
+        "accounts": accounts,
+        "bank_account_bytes_per_account": object_bytes / accounts,
+        "store_bytes_per_account": store_bytes / accounts,
+        "bank_account_ops_per_second": 2 * operations / object_seconds,
+        "store_ops_per_second": 2 * operations / store_seconds,
+    }
+
+    print(f"Accounts: {accounts:,}")
+    print(f"BankAccount objects: {results['bank_account_bytes_per_account']:,.1f} bytes/account, {results['bank_account_ops_per_second']:,.0f} ops/s")
+    print(f"AccountStore:        {results['store_bytes_per_account']:,.1f} bytes/account, {results['store_ops_per_second']:,.0f} ops/s")
+
+    return results
+
+
+def bench_batch_posting(accounts: int = 100_000, rows: int = 1_000_000) -> dict:
+    """
+    Compares posting a batch of deposits and withdrawals one call at a time through
+    BankAccount against a single post_batch pass over an AccountStore.
+    """
+    rng = random.Random(11)
+    numbers = [1045 + rng.randrange(accounts) for _ in range(rows)]
+    amounts = [round(rng.uniform(0, 200), 2) for _ in range(rows)]
+    kinds = [rng.choice((DEPOSIT, WITHDRAW)) for _ in range(rows)]
+
+    BankAccount.set_next_account_number(1045)
+    objects = [BankAccount("Owner", 100) for _ in range(accounts)]
+
+    store = AccountStore()
+    for _ in range(accounts):
+        store.open_account("Owner", 100)
+
+    def scalar_posting():
+        for number, amount, kind in zip(numbers, amounts, kinds):
+            account = objects[number - 1045]
+            try:
+                if kind == DEPOSIT:
+                    account.deposit(amount)
+                else:
+                    account.withdraw(amount)
+            except Exception:
+                pass
+
+    results = []
+    scalar_seconds = _timed(scalar_posting)
+    batch_seconds = _timed(lambda: results.append(post_batch(store, numbers, amounts, kinds)))
+
+    summary = {
+        "rows": rows,
+        "scalar_rows_per_second": rows / scalar_seconds,
+        "batch_rows_per_second": rows / batch_seconds,
+        "rejected_rows": sum(1 for code in results[0] if code),
+    }
+
+    print(f"Rows: {rows:,} ({summary['rejected_rows']:,} rejected)")
+    print(f"BankAccount one call per row: {summary['scalar_rows_per_second']:,.0f} rows/s")
+    print(f"post_batch on AccountStore:   {summary['batch_rows_per_second']:,.0f} rows/s")
+
+    return summary
+
+
+def bench_transfer_batch(accounts: int = 2_000, rows: int = 1_000_000) -> dict:
+    """
+    Compares settling transfers between a few thousand hot accounts one transfer_to call
+    at a time against a single netted transfer_batch.
+    """
+    rng = random.Random(13)
+    sources = [1045 + rng.randrange(accounts) for _ in range(rows)]
+    targets = [1045 + rng.randrange(accounts) for _ in range(rows)]
+    amounts = [round(rng.uniform(0, 50), 2) for _ in range(rows)]
+
+    BankAccount.set_next_account_number(1045)
+    objects = [BankAccount("Owner", 1000) for _ in range(accounts)]
+
+    store = AccountStore()
+    for _ in range(accounts):
+        store.open_account("Owner", 1000)
+
+    def scalar_transfers():
+        for source, target, amount in zip(sources, targets, amounts):
+            try:
+                objects[source - 1045].transfer_to(objects[target - 1045], amount)
+            except Exception:
+                pass
+
+    scalar_seconds = _timed(scalar_transfers)
+    batch_seconds = _timed(lambda: transfer_batch(store, sources, targets, amounts))
+
+    summary = {
+        "rows": rows,
+        "scalar_transfers_per_second": rows / scalar_seconds,
+        "batch_transfers_per_second": rows / batch_seconds,
+    }
+
+    print(f"Transfers: {rows:,} between {accounts:,} accounts")
+    print(f"BankAccount.transfer_to: {summary['scalar_transfers_per_second']:,.0f} transfers/s")
+    print(f"transfer_batch:          {summary['batch_transfers_per_second']:,.0f} transfers/s")
+
+    return summary
+
+
+def bench_thread_scaling(accounts: int = 1_000, transfers: int = 200_000, max_threads: int = 8) -> dict:
+    """
+    Stress test for ThreadSafeBankAccount. Runs the same number of random transfers split over
+    1 to max_threads threads, reports throughput and checks that total money is conserved.
+    """
+    ThreadSafeBankAccount.set_next_account_number(1045)
+    ThreadSafeBankAccount.unban_all()
+    book = [ThreadSafeBankAccount("Owner", 1000) for _ in range(accounts)]
+    expected_total = sum(account.balance for account in book)
+
+    def worker(seed, count):
+        rng = random.Random(seed)
+        for _ in range(count):
+            source, target = rng.sample(book, 2)
+            try:
+                source.transfer_to(target, rng.randrange(1, 100))
+            except CustomInsufficientFundsError:
+                pass
+
+    results = {}
+    threads = 1
+
+    while threads <= max_threads:
+        pool = [threading.Thread(target=worker, args=(seed, transfers // threads)) for seed in range(threads)]
+        start = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        seconds = time.perf_counter() - start
+
+        total = sum(account.balance for account in book)
+        conserved = abs(total - expected_total) < 1e-6 * expected_total
+        results[threads] = {"transfers_per_second": transfers / seconds, "conserved": conserved}
+
+        print(f"{threads} thread(s): {transfers / seconds:,.0f} transfers/s, money conserved: {conserved}")
+        threads *= 2
+
+    return results
+
+
+def bench_async_service(accounts: int = 100, operations: int = 100_000, concurrency: int = 1_000) -> dict:
+    """
+    Compares deposits issued from many coroutines through run_in_executor against the same
+    deposits through AsyncAccountService.
+    """
+    BankAccount.set_next_account_number(1045)
+    book = [BankAccount("Owner", 100) for _ in range(accounts)]
+    per_client = operations // concurrency
+
+    async def executor_client(seed):
+        loop = asyncio.get_running_loop()
+        rng = random.Random(seed)
+        for _ in range(per_client):
+            await loop.run_in_executor(None, rng.choice(book).deposit, 1)
+
+    async def service_client(service, seed):
+        rng = random.Random(seed)
+        for _ in range(per_client):
+            await service.deposit(rng.choice(book), 1)
+
+    async def run_executor():
+        await asyncio.gather(*(executor_client(seed) for seed in range(concurrency)))
+
+    async def run_service():
+        async with AsyncAccountService() as service:
+            await asyncio.gather(*(service_client(service, seed) for seed in range(concurrency)))
+            return service.batches
+
+    executor_seconds = _timed(lambda: asyncio.run(run_executor()))
+    batches = []
+    service_seconds = _timed(lambda: batches.append(asyncio.run(run_service())))
+
+    results = {
+        "operations": per_client * concurrency,
+        "executor_ops_per_second": per_client * concurrency / executor_seconds,
+        "service_ops_per_second": per_client * concurrency / service_seconds,
+        "service_batches": batches[0],
+    }
+
+    print(f"Operations: {results['operations']:,} from {concurrency:,} coroutines over {accounts} accounts")
+    print(f"run_in_executor:     {results['executor_ops_per_second']:,.0f} ops/s")
+    print(f"AsyncAccountService: {results['service_ops_per_second']:,.0f} ops/s in {batches[0]:,} micro-batches")
+
+    return results
+
+
+def bench_transaction_log(operations: int = 100_000, always_operations: int = 2_000, threads: int = 4) -> dict:
+    """
+    Measures journaled deposits per second under each sync policy. Deposits are issued from
+    several threads and the run ends once every record is durable. SYNC_ALWAYS runs fewer
+    operations, as every record pays a full fsync.
+    """
+    results = {}
+
+    for policy, count in ((SYNC_NONE, operations), (SYNC_GROUP, operations), (SYNC_ALWAYS, always_operations)):
+        with tempfile.TemporaryDirectory() as directory:
+            log = TransactionLog(os.path.join(directory, "bank.log"), sync_policy=policy)
+            JournaledBankAccount.journal = log
+            JournaledBankAccount.set_next_account_number(1045)
+            book = [JournaledBankAccount("Owner", 100) for _ in range(threads)]
+
+            def worker(account):
+                for _ in range(count // threads):
+                    account.deposit(1)
+                log.wait_durable(log.lsn)
+
+            pool = [threading.Thread(target=worker, args=(account,)) for account in book]
+            start = time.perf_counter()
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+            log.flush()
+            seconds = time.perf_counter() - start
+
+            log.close()
+            JournaledBankAccount.journal = None
+
+        results[policy] = count / seconds
+        print(f"{policy:>6}: {count / seconds:,.0f} journaled deposits/s")
+
+    return results
+
+
+def bench_snapshot_recovery(accounts: int = 1_000_000, tail: int = 100_000) -> dict:
+    """
+    Compares rebuilding a book by constructing BankAccount objects against recovering an
+    AccountStore from a snapshot plus a log tail of deposits written after it.
+    """
+    store = AccountStore()
+    for _ in range(accounts):
+        store.open_account("Owner", 100)
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, "bank.snap")
+        log_path = os.path.join(directory, "bank.log")
+
+        write_snapshot(snapshot_path, store, 0)
+
+        with TransactionLog(log_path, sync_policy=SYNC_NONE) as log:
+            store.journal = log
+            for index in range(tail):
+                store.deposit(1045 + index % accounts, 1)
+
+        def construct():
+            BankAccount.set_next_account_number(1045)
+            return [BankAccount("Owner", 100) for _ in range(accounts)]
+
+        construct_seconds = _timed(construct)
+        recover_seconds = _timed(lambda: recover(snapshot_path, log_path))
+
+    results = {
+        "accounts": accounts,
+        "constructor_seconds": construct_seconds,
+        "recover_seconds": recover_seconds,
+    }
+
+    print(f"Accounts: {accounts:,}, log tail: {tail:,} records")
+    print(f"BankAccount constructors:  {construct_seconds:.2f}s")
+    print(f"Snapshot + log tail replay: {recover_seconds:.2f}s")
+
+    return results
+
+
+def bench_money(postings: int = 1_000_000) -> dict:
+    """
+    Compares accumulating the same postings as float dollars, Decimal dollars and integer cents,
+    and deposits through BankAccount against CentsBankAccount. Reports the float error left over.
+    """
+    rng = random.Random(17)
+    cents = [rng.randrange(1, 100_000) for _ in range(postings)]
+    floats = [amount / 100 for amount in cents]
+    decimals = [Decimal(amount) / 100 for amount in cents]
+
+    totals = {}
+
+    def accumulate(name, amounts, start):
+        def run():
+            total = start
+            for amount in amounts:
+                total += amount
+            totals[name] = total
+        return _timed(run)
+
+    float_seconds = accumulate("float", floats, 0.0)
+    decimal_seconds = accumulate("decimal", decimals, Decimal(0))
+    cents_seconds = accumulate("cents", cents, 0)
+
+    BankAccount.set_next_account_number(1045)
+    BankAccount.unban_all()
+    float_account = BankAccount("Owner", 0)
+    cents_account = CentsBankAccount("Owner", 0)
+    sample = floats[:postings // 4]
+
+    def float_deposits():
+        for amount in sample:
+            float_account.deposit(amount)
+
+    def cents_deposits():
+        for amount in sample:
+            cents_account.deposit(amount)
+
+    float_deposit_seconds = _timed(float_deposits)
+    cents_deposit_seconds = _timed(cents_deposits)
+
+    results = {
+        "float_postings_per_second": postings / float_seconds,
+        "decimal_postings_per_second": postings / decimal_seconds,
+        "cents_postings_per_second": postings / cents_seconds,
+        "float_error_cents": float(abs(Decimal(totals["float"]) * 100 - totals["cents"])),
+        "bank_account_deposits_per_second": len(sample) / float_deposit_seconds,
+        "cents_account_deposits_per_second": len(sample) / cents_deposit_seconds,
+    }
+
+    print(f"Postings: {postings:,}")
+    print(f"float:   {results['float_postings_per_second']:,.0f} postings/s, error {results['float_error_cents']:.6f} cents")
+    print(f"Decimal: {results['decimal_postings_per_second']:,.0f} postings/s, exact")
+    print(f"cents:   {results['cents_postings_per_second']:,.0f} postings/s, exact")
+    print(f"BankAccount.deposit:      {results['bank_account_deposits_per_second']:,.0f} deposits/s")
+    print(f"CentsBankAccount.deposit: {results['cents_account_deposits_per_second']:,.0f} deposits/s")
+
+    return results
+
+
+def bench_ban_registry(accounts: int = 1_000_000, lookups: int = 1_000_000) -> dict:
+    """
+    Compares memory use, bulk ban/unban time and ban check throughput of the banned accounts
+    dictionary against a BanRegistry, with every other account banned for one of a few reasons.
+    """
+    reasons = ["Dormant", "Fraud", "Chargebacks", "Sanctions"]
+    first = 1045
+    banned = range(first, first + accounts, 2)
+
+    def ban_dict():
+        bans = {}
+        for index, number in enumerate(banned):
+            bans[number] = reasons[index & 3]
+        return bans
+
+    def ban_registry():
+        registry = BanRegistry(first)
+        for index, reason in enumerate(reasons):
+            registry.ban_many(banned[index::4], reason)
+        return registry
+
+    dict_bytes = _traced_memory(ban_dict)
+    registry_bytes = _traced_memory(ban_registry)
+    dict_ban_seconds = _timed(ban_dict)
+    registry_ban_seconds = _timed(ban_registry)
+
+    bans = ban_dict()
+    registry = ban_registry()
+
+    rng = random.Random(7)
+    probes = [first + rng.randrange(accounts) for _ in range(lookups)]
+
+    # Checks go through BankAccount.is_banned with each store installed as BankAccount.banned_accounts
+    probe_accounts = {}
+
+    for number in probes:
+        if number not in probe_accounts:
+            account = BankAccount.__new__(BankAccount)
+            account.account_number = number
+            probe_accounts[number] = account
+
+    probes = [probe_accounts[number] for number in probes]
+    installed = BankAccount.banned_accounts
+
+    def lookups_through(store):
+        BankAccount.banned_accounts = store
+
+        try:
+            return sum(1 for account in probes if account.is_banned())
+
+        finally:
+            BankAccount.banned_accounts = installed
+
+    dict_lookup_seconds = _timed(lambda: lookups_through(bans))
+    registry_lookup_seconds = _timed(lambda: lookups_through(registry))
+
+    def unban_dict():
+        for number in range(first, first + accounts // 2):
+            bans.pop(number, None)
+
+    def unban_registry():
+        registry.unban_range(first, first + accounts // 2)
+
+    dict_unban_seconds = _timed(unban_dict)
+    registry_unban_seconds = _timed(unban_registry)
+
+    results = {
+        "banned_accounts": len(banned),
+        "dict_bytes_per_ban": dict_bytes / len(banned),
+        "registry_bytes_per_ban": registry_bytes / len(banned),
+        "dict_ban_seconds": dict_ban_seconds,
+        "registry_ban_seconds": registry_ban_seconds,
+        "dict_checks_per_second": lookups / dict_lookup_seconds,
+        "registry_checks_per_second": lookups / registry_lookup_seconds,
+        "dict_range_unban_seconds": dict_unban_seconds,
+        "registry_range_unban_seconds": registry_unban_seconds,
+    }
+
+    print(f"Banned accounts: {len(banned):,}, checks through BankAccount.is_banned")
+    print(f"dict:        {results['dict_bytes_per_ban']:,.1f} bytes/ban, ban {dict_ban_seconds:.3f}s, {results['dict_checks_per_second']:,.0f} checks/s, range unban {dict_unban_seconds:.4f}s")
+    print(f"BanRegistry: {results['registry_bytes_per_ban']:,.1f} bytes/ban, ban {registry_ban_seconds:.3f}s, {results['registry_checks_per_second']:,.0f} checks/s, range unban {registry_unban_seconds:.4f}s")
+
+    return results
+
+
+def bench_validation(operations: int = 500_000) -> dict:
+    """
+    Measures nanoseconds per deposit, withdrawal and transfer for BankAccount, FastBankAccount
+    and FastBankAccount with debug checks enabled. Run under python -O as well to see the
+    cost of the assert statements on the checked path.
+    """
+    def per_op(account_class, debug=False):
+        FastBankAccount.debug = debug
+        account_class.set_next_account_number(1045)
+        account_class.unban_all()
+        source = account_class("Owner", 10**9)
+        target = account_class("Owner", 10**9)
+        deposit, withdraw, transfer_to = source.deposit, source.withdraw, source.transfer_to
+        iterations = range(operations)
+
+        def deposits():
+            for _ in iterations:
+                deposit(10)
+
+        def withdrawals():
+            for _ in iterations:
+                withdraw(10)
+
+        def transfers():
+            for _ in iterations:
+                transfer_to(target, 10)
+
+        timings = {name: 1e9 * _timed(function) / operations
+                   for name, function in (("deposit", deposits), ("withdraw", withdrawals), ("transfer", transfers))}
+        FastBankAccount.debug = False
+        return timings
+
+    results = {
+        "bank_account": per_op(BankAccount),
+        "fast": per_op(FastBankAccount),
+        "fast_debug": per_op(FastBankAccount, debug=True),
+    }
+
+    print(f"Operations: {operations:,} per kind, assert statements {'enabled' if __debug__ else 'stripped (-O)'}")
+    for name, label in (("bank_account", "BankAccount:          "), ("fast", "FastBankAccount:      "), ("fast_debug", "FastBankAccount debug:")):
+        timings = results[name]
+        print(f"{label} deposit {timings['deposit']:,.0f} ns, withdraw {timings['withdraw']:,.0f} ns, transfer {timings['transfer']:,.0f} ns")
+
+    return results
+
+
+def bench_request_processor(accounts: int = 1_000, requests: int = 500_000, max_workers: int = 4) -> dict:
+    """
+    Streams a generated JSONL request file through the request processor with 1 to max_workers
+    parsing processes and reports requests per second.
+    """
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "requests.jsonl")
+        output_path = os.path.join(directory, "results.jsonl")
+
+        with open(input_path, "w") as file:
+            for _ in range(accounts):
+                file.write('{"op": "open", "owner": "Owner", "balance": 1000}\n')
+
+            for index in range(requests):
+                account = 1045 + rng.randrange(accounts)
+                kind = index % 3
+
+                if kind == 0:
+                    file.write(f'{{"op": "deposit", "account": {account}, "amount": 10, "id": {index}}}\n')
+                elif kind == 1:
+                    file.write(f'{{"op": "withdraw", "account": {account}, "amount": 10, "id": {index}}}\n')
+                else:
+                    file.write(f'{{"op": "transfer", "account": {account}, "target": {1045 + rng.randrange(accounts)}, "amount": 5, "id": {index}}}\n')
+
+        size = os.path.getsize(input_path)
+        results = {}
+        workers = 1
+
+        while workers <= max_workers:
+            BankAccount.set_next_account_number(1045)
+            BankAccount.unban_all()
+            seconds = _timed(lambda: request_processor.process_file(input_path, output_path, workers=workers))
+            results[workers] = {"requests_per_second": (accounts + requests) / seconds, "megabytes_per_second": size / seconds / 1e6}
+
+            print(f"{workers} parsing process(es): {results[workers]['requests_per_second']:,.0f} requests/s, {results[workers]['megabytes_per_second']:.1f} MB/s")
+            workers *= 2
+
+    return results
+
+
+def bench_sharded_ledger(accounts: int = 10_000, operations: int = 1_000_000, batch: int = 50_000, max_shards: int = 8) -> dict:
+    """
+    Applies the same batches of deposits, withdrawals and transfers to one in-process AccountStore
+    and to ShardedLedgers with 1 to max_shards worker processes, and reports operations per second.
+    Scaling needs as many free cores as shards.
+    """
+    rng = random.Random(7)
+    stream = []
+
+    for index in range(operations):
+        account = 1045 + rng.randrange(accounts)
+        kind = index % 3
+
+        if kind == 0:
+            stream.append(("deposit", account, 10))
+        elif kind == 1:
+            stream.append(("withdraw", account, 10))
+        else:
+            stream.append(("transfer", account, 1045 + rng.randrange(accounts), 5))
+
+    batches = [stream[start:start + batch] for start in range(0, operations, batch)]
+
+    store = AccountStore()
+    for _ in range(accounts):
+        store.open_account("Owner", 10**6)
+    methods = {"deposit": store.deposit, "withdraw": store.withdraw, "transfer": store.transfer}
+
+    def run_store():
+        for name, *arguments in stream:
+            try:
+                methods[name](*arguments)
+            except (CustomInsufficientFundsError, CustomValueError):
+                pass
+
+    results = {"store_ops_per_second": operations / _timed(run_store)}
+    print(f"CPUs: {os.cpu_count()}, operations: {operations:,} in batches of {batch:,}")
+    print(f"AccountStore:          {results['store_ops_per_second']:,.0f} ops/s")
+
+    shards = 1
+
+    while shards <= max_shards:
+        with ShardedLedger(shards) as ledger:
+            ledger.execute([("open", "Owner", 10**6)] * accounts)
+
+            def run_ledger():
+                for operations_batch in batches:
+                    ledger.execute(operations_batch)
+
+            results[shards] = {"ops_per_second": operations / _timed(run_ledger)}
+
+        print(f"ShardedLedger {shards} shard(s): {results[shards]['ops_per_second']:,.0f} ops/s")
+        shards *= 2
+
+    return results
+
+
+def bench_account_allocator(allocations: int = 200_000, block_sizes: tuple = (10, 1_000, 100_000)) -> dict:
+    """
+    Compares account number allocations per second of the BankAccount counter against
+    BlockAllocators with different block sizes. Every block costs one locked, fsynced write
+    of the high-water mark file.
+    """
+    def counter():
+        allocate = BankAccount._allocate_account_number
+        for _ in range(allocations):
+            allocate()
+
+    BankAccount.set_next_account_number(1045)
+    results = {"counter_per_second": allocations / _timed(counter)}
+    BankAccount.set_next_account_number(1045)
+    print(f"BankAccount counter:         {results['counter_per_second']:,.0f} allocations/s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for block_size in block_sizes:
+            allocator = BlockAllocator(os.path.join(directory, f"{block_size}.hwm"), block_size)
+
+            def blocks():
+                allocate = allocator.allocate
+                for _ in range(allocations):
+                    allocate()
+
+            results[block_size] = {"allocations_per_second": allocations / _timed(blocks), "blocks": allocator.blocks}
+            print(f"BlockAllocator block {block_size:>7,}: {results[block_size]['allocations_per_second']:,.0f} allocations/s, {allocator.blocks:,} blocks reserved")
+
+    return results
+
+
+def bench_history(postings: int = 1_000_000, queries: int = 10_000, memory_limit: int = 100_000) -> dict:
+    """
+    Records postings in an AccountHistory that spills to disk, then times range queries and
+    balance-as-of queries against a linear scan of an in-memory list of tuples.
+    """
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = AccountHistory(1045, os.path.join(directory, "1045.history"), memory_limit)
+        scan = []
+        balance = 0.0
+
+        def record():
+            nonlocal balance
+            for index in range(postings):
+                amount = rng.uniform(-10, 20)
+                balance += amount
+                history.record(LOG_DEPOSIT, amount, balance, 0, float(index))
+                scan.append((float(index), balance))
+
+        record_seconds = _timed(record)
+        times = [rng.uniform(0, postings) for _ in range(queries)]
+
+        def indexed():
+            for time_point in times:
+                history.balance_at(time_point)
+                history.postings(time_point, time_point + 10)
+
+        def linear():
+            for time_point in times[:queries // 100]:
+                [entry for entry in scan if entry[0] <= time_point][-1]
+                [entry for entry in scan if time_point <= entry[0] <= time_point + 10]
+
+        indexed_seconds = _timed(indexed)
+        linear_seconds = _timed(linear)
+        history.close()
+
+    results = {
+        "postings_per_second": postings / record_seconds,
+        "indexed_query_microseconds": 1e6 * indexed_seconds / queries,
+        "linear_query_microseconds": 1e6 * linear_seconds / (queries // 100),
+        "in_memory_postings": len(history.timestamps),
+        "spilled_postings": history.spilled,
+    }
+
+    print(f"Postings: {postings:,} ({history.spilled:,} spilled, {len(history.timestamps):,} in memory), {results['postings_per_second']:,.0f} postings/s")
+    print(f"Indexed balance + range query: {results['indexed_query_microseconds']:,.1f} us")
+    print(f"Linear scan of a list:         {results['linear_query_microseconds']:,.1f} us")
+
+    return results
+
+
+def bench_book_metrics(accounts: int = 200_000, operations: int = 200_000, top: int = 10) -> dict:
+    """
+    Compares the cost of a dashboard read (total, banned count, histogram, top balances) by scanning
+    every account against reading a BookMetrics, and the cost metering adds to each operation. The
+    first read after the operations also takes in every account they changed.
+    """
+    rng = random.Random(7)
+    BankAccount.unban_all()
+    MeteredBankAccount.metrics = BookMetrics()
+    plain = [BankAccount("Owner", rng.randrange(10**6)) for _ in range(accounts)]
+    metered = [MeteredBankAccount("Owner", rng.randrange(10**6)) for _ in range(accounts)]
+    targets = [rng.randrange(accounts) for _ in range(operations)]
+
+    def scan():
+        balances = [account.balance for account in metered]
+        edges = BookMetrics.default_bucket_edges
+        counts = [0] * len(edges)
+        for balance in balances:
+            counts[bisect.bisect_right(edges, balance) - 1] += 1
+        return sum(balances), sum(account.is_banned() for account in metered), counts, heapq.nlargest(top, balances)
+
+    def read():
+        metrics = MeteredBankAccount.metrics
+        return metrics.total_balance, metrics.banned_count, metrics.histogram(), metrics.top(top)
+
+    def operate(book):
+        def run():
+            for index in targets:
+                book[index].deposit(10)
+                book[index].withdraw(10)
+        return run
+
+    results = {
+        "scan_milliseconds": 1e3 * _timed(scan),
+        "metrics_milliseconds": 1e3 * _timed(read),
+        "plain_ops_per_second": 2 * operations / _timed(operate(plain)),
+        "metered_ops_per_second": 2 * operations / _timed(operate(metered)),
+        "metrics_after_operations_milliseconds": 1e3 * _timed(read),
+    }
+
+    print(f"Accounts: {accounts:,}")
+    print(f"Dashboard by scanning:    {results['scan_milliseconds']:,.2f} ms")
+    print(f"Dashboard from metrics:   {results['metrics_milliseconds']:,.4f} ms")
+    print(f"BankAccount ops:          {results['plain_ops_per_second']:,.0f} ops/s")
+    print(f"MeteredBankAccount ops:   {results['metered_ops_per_second']:,.0f} ops/s")
+    print(f"First read after them:    {results['metrics_after_operations_milliseconds']:,.2f} ms")
+
+    return results
+
+
+def bench_velocity_limits(accounts: int = 1_000, operations: int = 200_000) -> dict:
+    """
+    Compares withdrawal throughput with and without hourly and daily velocity limits, and the
+    memory the limits add per account.
+    """
+    rng = random.Random(7)
+    BankAccount.unban_all()
+    plain = [BankAccount("Owner", 10**9) for _ in range(accounts)]
+    limited = [VelocityBankAccount("Owner", 10**9) for _ in range(accounts)]
+    targets = [rng.randrange(accounts) for _ in range(operations)]
+
+    for account in limited:
+        account.set_velocity_limit(3_600, max_amount=10**9, max_count=10**6)
+        account.set_velocity_limit(86_400, max_amount=10**9)
+
+    def operate(book):
+        def run():
+            for index in targets:
+                book[index].withdraw(1)
+        return run
+
+    def allocate():
+        account = VelocityBankAccount("Owner", 100)
+        account.set_velocity_limit(3_600, max_amount=10**9, max_count=10**6)
+        account.set_velocity_limit(86_400, max_amount=10**9)
+        return account
+
+    def memory_per_account() -> float:
+        # Windows live in shared columns that grow in steps, so memory is averaged over many accounts of a fresh table
+        windows = VelocityBankAccount.windows
+        VelocityBankAccount.windows = RollingWindows(VelocityBankAccount.buckets)
+
+        try:
+            limited_bytes = _traced_memory(lambda: [allocate() for _ in range(accounts)])
+
+        finally:
+            VelocityBankAccount.windows = windows
+
+        return (limited_bytes - _traced_memory(lambda: [BankAccount("Owner", 100) for _ in range(accounts)])) / accounts
+
+    results = {
+        "plain_ops_per_second": operations / _timed(operate(plain)),
+        "limited_ops_per_second": operations / _timed(operate(limited)),
+        "bytes_per_account": memory_per_account(),
+    }
+
+    print(f"Withdrawals: {operations:,} over {accounts:,} accounts, 2 windows of {VelocityBankAccount.buckets} buckets")
+    print(f"BankAccount:          {results['plain_ops_per_second']:,.0f} ops/s")
+    print(f"VelocityBankAccount:  {results['limited_ops_per_second']:,.0f} ops/s")
+    print(f"Memory per account:   {results['bytes_per_account']:,.0f} extra bytes")
+
+    return results
+
+
+def bench_instrumentation(accounts: int = 1_000, operations: int = 200_000, repeats: int = 5) -> dict:
+    """
+    Compares BankAccount throughput before instrumentation was ever enabled, after it was enabled
+    and disabled again, and while it is enabled. Each figure is the best of repeats runs.
+    """
+    rng = random.Random(7)
+    BankAccount.unban_all()
+    book = [BankAccount("Owner", 10**9) for _ in range(accounts)]
+    pairs = [(book[index], book[(index + rng.randrange(1, accounts)) % accounts]) for index in (rng.randrange(accounts) for _ in range(operations))]
+
+    def run():
+        for source, target in pairs:
+            source.deposit(10)
+            source.withdraw(10)
+            source.transfer_to(target, 1)
+            source.is_banned()
+
+    def best():
+        return min(_timed(run) for _ in range(repeats))
+
+    instrumentation = Instrumentation()
+    originals = [getattr(BankAccount, name) for name in Instrumentation.operations]
+    never_enabled = best()
+
+    instrumentation.enable()
+    enabled = best()
+    instrumentation.disable()
+
+    disabled = best()
+    calls = 4 * operations
+
+    results = {
+        "never_enabled_ops_per_second": calls / never_enabled,
+        "disabled_ops_per_second": calls / disabled,
+        "enabled_ops_per_second": calls / enabled,
+        "disabled_overhead_percent": 100 * (disabled / never_enabled - 1),
+        "enabled_overhead_percent": 100 * (enabled / never_enabled - 1),
+        "p99_deposit_ns": instrumentation.histograms["deposit"].percentile(99),
+        "methods_restored": originals == [getattr(BankAccount, name) for name in Instrumentation.operations],
+    }
+
+    print(f"Operations: {calls:,} (deposit, withdraw, transfer_to, is_banned), best of {repeats}")
+    print(f"Never enabled:  {results['never_enabled_ops_per_second']:,.0f} ops/s")
+    print(f"Disabled:       {results['disabled_ops_per_second']:,.0f} ops/s ({results['disabled_overhead_percent']:+.1f}%)")
+    print(f"Enabled:        {results['enabled_ops_per_second']:,.0f} ops/s ({results['enabled_overhead_percent']:+.1f}%)")
+    print(f"Deposit p99:    {results['p99_deposit_ns']:,} ns")
+    print(f"Disabled runs the original methods: {results['methods_restored']}")
+
+    return results
+
+
+def bench_results(accounts: int = 1_000, operations: int = 200_000, rejected_share: float = 0.3) -> dict:
+    """
+    Compares a withdrawal workload where rejected_share of the operations are rejected, handled by
+    catching the raised errors against reading the Results of try_withdraw.
+    """
+    rng = random.Random(7)
+    BankAccount.unban_all()
+    book = [BankAccount("Owner", 10**9) for _ in range(accounts)]
+
+    for account in book:
+        account.set_transaction_limit(100)
+
+    # Rejected withdrawals exceed the transaction limit
+    rows = [(book[rng.randrange(accounts)], 1_000 if rng.random() < rejected_share else 1) for _ in range(operations)]
+    rejections = [row for row in rows if row[1] == 1_000]
+
+    def raising(rows=rows):
+        rejected = 0
+        for account, amount in rows:
+            try:
+                account.withdraw(amount)
+            except CustomLimitError:
+                rejected += 1
+        return rejected
+
+    def results_mode(rows=rows):
+        rejected = 0
+        for account, amount in rows:
+            if not account.try_withdraw(amount):
+                rejected += 1
+        return rejected
+
+    results = {
+        "raising_ops_per_second": operations / _timed(raising),
+        "result_ops_per_second": operations / _timed(results_mode),
+        "raising_rejection_ns": 1e9 * _timed(lambda: raising(rejections)) / len(rejections),
+        "result_rejection_ns": 1e9 * _timed(lambda: results_mode(rejections)) / len(rejections),
+    }
+
+    print(f"Withdrawals: {operations:,}, {rejected_share:.0%} rejected")
+    print(f"withdraw and except:   {results['raising_ops_per_second']:,.0f} ops/s")
+    print(f"try_withdraw Results:  {results['result_ops_per_second']:,.0f} ops/s")
+    print(f"Rejection cost:        {results['raising_rejection_ns']:,.0f} ns raised, {results['result_rejection_ns']:,.0f} ns as a Result")
+
+    return results
+
+
+def bench_idempotency(accounts: int = 1_000, operations: int = 200_000, capacity: int = 100_000) -> dict:
+    """
+    Compares deposit throughput without keys, with a new key per call (cache at capacity, so every
+    call also evicts) and with retried keys, and measures the memory held per cached key.
+    """
+    rng = random.Random(7)
+    BankAccount.unban_all()
+    IdempotentBankAccount.idempotency_cache = IdempotencyCache(capacity=capacity)
+    book = [IdempotentBankAccount("Owner", 10**9) for _ in range(accounts)]
+    targets = [book[rng.randrange(accounts)] for _ in range(operations)]
+    keys = [f"request-{index:012d}" for index in range(operations)]
+
+    def without_keys():
+        for account in targets:
+            account.deposit(1)
+
+    def with_keys(start=0):
+        for account, key in zip(targets[start:], keys[start:]):
+            account.deposit(1, idempotency_key=key)
+
+    def filled_cache():
+        cache = IdempotencyCache(capacity=capacity)
+        for key in keys[:capacity]:
+            cache.put(key, ("deposit", 1045, 1), None)
+        return cache
+
+    plain_seconds = _timed(without_keys)
+    new_key_seconds = _timed(with_keys)
+    # Retrying the keys still in the cache
+    retry_seconds = _timed(lambda: with_keys(operations - capacity)) * operations / capacity
+
+    results = {
+        "plain_ops_per_second": operations / plain_seconds,
+        "new_key_ops_per_second": operations / new_key_seconds,
+        "retry_ops_per_second": operations / retry_seconds,
+        "bytes_per_key": (_traced_memory(filled_cache) - sum(sys.getsizeof(key) for key in keys[:capacity])) / capacity,
+        "evictions": IdempotentBankAccount.idempotency_cache.evictions,
+    }
+
+    print(f"Deposits: {operations:,}, cache capacity {capacity:,}")
+    print(f"No key:          {results['plain_ops_per_second']:,.0f} ops/s")
+    print(f"New key:         {results['new_key_ops_per_second']:,.0f} ops/s ({results['evictions']:,} evictions)")
+    print(f"Retried key:     {results['retry_ops_per_second']:,.0f} ops/s")
+    print(f"Memory per key:  {results['bytes_per_key']:,.0f} bytes (excluding the key string)")
+
+    IdempotentBankAccount.idempotency_cache = IdempotencyCache()
+    return results
+
+
+def bench_ledger(accounts: int = 10_000, operations: int = 1_000_000) -> dict:
+    """
+    Measures the cost of posting every operation to the double-entry ledger, and how long a trial
+    balance, a full rebuild and an incremental materialization take over the resulting lines.
+    """
+    rng = random.Random(7)
+    BankAccount.unban_all()
+    LedgerBankAccount.ledger = Ledger()
+    plain = [CentsBankAccount("Owner", 10**6) for _ in range(accounts)]
+    book = [LedgerBankAccount("Owner", 10**6) for _ in range(accounts)]
+    pairs = [(index, (index + rng.randrange(1, accounts)) % accounts) for index in (rng.randrange(accounts) for _ in range(operations))]
+
+    def operate(book):
+        def run():
+            for source, target in pairs:
+                book[source].transfer_to(book[target], 1)
+        return run
+
+    plain_seconds = _timed(operate(plain))
+    ledger_seconds = _timed(operate(book))
+    ledger = LedgerBankAccount.ledger
+
+    results = {
+        "plain_ops_per_second": operations / plain_seconds,
+        "ledger_ops_per_second": operations / ledger_seconds,
+        "lines": len(ledger.cents),
+        "trial_balance_seconds": _timed(ledger.trial_balance),
+        "rebuild_seconds": _timed(ledger.rebuild),
+        "reconcile_seconds": _timed(lambda: LedgerBankAccount.reconcile(book)),
+    }
+
+    assert ledger.trial_balance()["total"] == 0 and not LedgerBankAccount.reconcile(book)
+
+    print(f"Transfers: {operations:,} over {accounts:,} accounts, {results['lines']:,} ledger lines")
+    print(f"CentsBankAccount:        {results['plain_ops_per_second']:,.0f} ops/s")
+    print(f"LedgerBankAccount:       {results['ledger_ops_per_second']:,.0f} ops/s")
+    print(f"Trial balance:           {results['trial_balance_seconds']:.3f} s")
+    print(f"Rebuild all balances:    {results['rebuild_seconds']:.3f} s")
+    print(f"Reconcile (incremental): {results['reconcile_seconds']:.3f} s")
+
+    return results
+
+
+def bench_transactions(threads: int = 4, transactions: int = 5_000, legs: int = 5) -> dict:
+    """
+    Runs fee-split transactions (one payer, legs - 1 payees) from several threads, once with every
+    thread on its own accounts and once with all threads sharing a small set of accounts, and
+    reports committed transactions per second and how many attempts were retried.
+    """
+    BankAccount.unban_all()
+
+    def run(shared: bool) -> tuple:
+        pool = [VersionedBankAccount("Owner", 10**9) for _ in range(legs * (2 if shared else threads))]
+        attempts = [0]
+
+        def worker(seed):
+            rng = random.Random(seed)
+            accounts = pool if shared else pool[seed * legs:(seed + 1) * legs]
+
+            def split(transaction, payer, payees):
+                attempts[0] += 1
+                for payee in payees:
+                    transaction.transfer(payer, payee, 1)
+
+            for _ in range(transactions):
+                payer, *payees = rng.sample(accounts, legs)
+                Transaction.run(lambda transaction: split(transaction, payer, payees), retries=10_000)
+
+        workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+        start = time.perf_counter()
+
+        for thread in workers:
+            thread.start()
+
+        for thread in workers:
+            thread.join()
+
+        return threads * transactions / (time.perf_counter() - start), attempts[0] - threads * transactions
+
+    disjoint_rate, disjoint_retries = run(False)
+    shared_rate, shared_retries = run(True)
+
+    results = {
+        "disjoint_transactions_per_second": disjoint_rate,
+        "disjoint_retries": disjoint_retries,
+        "shared_transactions_per_second": shared_rate,
+        "shared_retries": shared_retries,
+    }
+
+    print(f"Transactions: {threads} threads x {transactions:,}, {legs} accounts each")
+    print(f"Disjoint accounts:  {disjoint_rate:,.0f} transactions/s, {disjoint_retries:,} retries")
+    print(f"Shared accounts:    {shared_rate:,.0f} transactions/s, {shared_retries:,} retries")
+
+    return results
+
+
+def bench_sqlite_store(accounts: int = 1_000, operations: int = 20_000, flush_every: int = 1_000) -> dict:
+    """
+    Compares deposits saved to SQLite with one commit per operation against write-behind batches
+    of flush_every dirty accounts.
+    """
+    rng = random.Random(7)
+    BankAccount.unban_all()
+    targets = [rng.randrange(accounts) for _ in range(operations)]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, write_behind in (("per_op_commit", False), ("write_behind", True)):
+            store = SQLiteStore(os.path.join(directory, f"{name}.db"), write_behind=write_behind, flush_every=flush_every)
+            SQLiteBankAccount.store = store
+            book = [SQLiteBankAccount("Owner", 10**6) for _ in range(accounts)]
+            store.flush()
+
+            def run():
+                for index in targets:
+                    book[index].deposit(1)
+                store.flush()
+
+            results[f"{name}_ops_per_second"] = operations / _timed(run)
+            results[f"{name}_flushes"] = store.flushes
+            store.close()
+
+    SQLiteBankAccount.store = None
+
+    print(f"Deposits: {operations:,} over {accounts:,} accounts")
+    print(f"Commit per operation:  {results['per_op_commit_ops_per_second']:,.0f} ops/s")
+    print(f"Write-behind batches:  {results['write_behind_ops_per_second']:,.0f} ops/s ({results['write_behind_flushes']:,} flushes of up to {flush_every:,} accounts)")
+
+    return results
+
+
+def bench_account_cache(accounts: int = 100_000, requests: int = 200_000, capacity: int = 2_000, skew: float = 1.1) -> dict:
+    """
+    Serves balance reads for Zipf-distributed account numbers, loading the account from SQLite on
+    every request against going through an AccountCache holding capacity accounts.
+    """
+    rng = random.Random(7)
+    BankAccount.unban_all()
+
+    # Zipf weights by popularity rank, ranks shuffled over the account numbers
+    weights = list(accumulate(1 / rank ** skew for rank in range(1, accounts + 1)))
+    first_number = BankAccount.account_number
+    numbers = list(range(first_number, first_number + accounts))
+    rng.shuffle(numbers)
+    stream = rng.choices(numbers, cum_weights=weights, k=requests)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteStore(os.path.join(directory, "bank.db"), flush_every=10_000)
+        SQLiteBankAccount.store = store
+
+        for _ in range(accounts):
+            SQLiteBankAccount("Owner", 10**6)
+
+        store.flush()
+        cache = AccountCache(store, capacity)
+
+        def uncached():
+            for account_number in stream:
+                store.load_account(account_number).balance
+
+        def cached():
+            for account_number in stream:
+                cache.get(account_number).balance
+
+        uncached_seconds = _timed(uncached)
+        cached_seconds = _timed(cached)
+        stats = cache.stats()
+        cache.close()
+        store.close()
+
+    SQLiteBankAccount.store = None
+
+    results = {
+        "uncached_requests_per_second": requests / uncached_seconds,
+        "cached_requests_per_second": requests / cached_seconds,
+        **stats,
+    }
+
+    print(f"Requests: {requests:,} over {accounts:,} accounts (Zipf {skew}), cache of {capacity:,} accounts")
+    print(f"Load per request:  {results['uncached_requests_per_second']:,.0f} requests/s")
+    print(f"AccountCache:      {results['cached_requests_per_second']:,.0f} requests/s")
+    print(f"Hit rate {stats['hit_rate']:.1%}, {stats['evictions']:,} evictions")
+
+    return results
+
+
+def bench_bulk_opening(accounts: int = 500_000, repeats: int = 3) -> dict:
+    """
+    Compares opening accounts one BankAccount at a time and one AccountStore.open_account call at a
+    time against a single AccountStore.open_accounts call over columns of owners and balances.
+    Each figure is the best of repeats runs.
+    """
+    rng = random.Random(7)
+    owners = [f"Owner {index}" for index in range(accounts)]
+    balances = [rng.randrange(100_000) / 100 for _ in range(accounts)]
+
+    def objects():
+        BankAccount.set_next_account_number(1045)
+        for owner, balance in zip(owners, balances):
+            BankAccount(owner, balance)
+
+    def one_at_a_time():
+        store = AccountStore()
+        for owner, balance in zip(owners, balances):
+            store.open_account(owner, balance)
+
+    def bulk():
+        AccountStore().open_accounts(owners, balances)
+
+    def best(run):
+        return min(_timed(run) for _ in range(repeats))
+
+    object_seconds = best(objects)
+    single_seconds = best(one_at_a_time)
+    bulk_seconds = best(bulk)
+
+    results = {
+        "accounts": accounts,
+        "bank_account_opens_per_second": accounts / object_seconds,
+        "open_account_opens_per_second": accounts / single_seconds,
+        "open_accounts_opens_per_second": accounts / bulk_seconds,
+        "speedup_over_bank_account": object_seconds / bulk_seconds,
+    }
+
+    print(f"Accounts: {accounts:,}, best of {repeats}")
+    print(f"BankAccount(owner, balance): {results['bank_account_opens_per_second']:,.0f} accounts/s")
+    print(f"AccountStore.open_account:   {results['open_account_opens_per_second']:,.0f} accounts/s")
+    print(f"AccountStore.open_accounts:  {results['open_accounts_opens_per_second']:,.0f} accounts/s ({results['speedup_over_bank_account']:.1f}x BankAccount)")
+
+    return results
+
+
+BENCHMARKS = {
+    "account_store": bench_account_store,
+    "batch_posting": bench_batch_posting,
+    "transfer_batch": bench_transfer_batch,
+    "thread_scaling": bench_thread_scaling,
+    "async_service": bench_async_service,
+    "transaction_log": bench_transaction_log,
+    "snapshot_recovery": bench_snapshot_recovery,
+    "money": bench_money,
+    "ban_registry": bench_ban_registry,
+    "validation": bench_validation,
+    "request_processor": bench_request_processor,
+    "sharded_ledger": bench_sharded_ledger,
+    "account_allocator": bench_account_allocator,
+    "history": bench_history,
+    "book_metrics": bench_book_metrics,
+    "velocity_limits": bench_velocity_limits,
+    "instrumentation": bench_instrumentation,
+    "results": bench_results,
+    "idempotency": bench_idempotency,
+    "ledger": bench_ledger,
+    "transactions": bench_transactions,
+    "sqlite_store": bench_sqlite_store,
+    "account_cache": bench_account_cache,
+    "bulk_opening": bench_bulk_opening,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+
+    for name in names:
+        if name not in BENCHMARKS:
+            sys.exit(f"Unknown benchmark {name}, choose from: {', '.join(BENCHMARKS)}")
+
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
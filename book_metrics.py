@@ -0,0 +1,235 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class BookMetrics, aggregates over a whole account book that are kept up to
+date as accounts change, and class MeteredBankAccount, a BankAccount that reports every change to a
+shared BookMetrics. An operation only adds its amount to the total and queues its account once, the
+histogram and ranking take in the queued accounts when they are read. Totals and counts are read in
+O(1), histogram buckets in O(buckets) and the largest balances in O(N + log n), plus O(log n) per
+account changed since the last read, however many accounts there are.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+from bank import BankAccount
+from custom_errors import *
+
+class _Ranking:
+    """
+    Sorted collection of (balance, account number) entries, kept as a list of sorted chunks so an
+    update moves at most one chunk of entries instead of the whole book.
+    """
+
+    chunk_size = 512
+
+    def __init__(self):
+        self._chunks = []
+        self._maxes = []
+
+
+    def insert(self, entry: tuple) -> None:
+        if not self._chunks:
+            self._chunks.append([entry])
+            self._maxes.append(entry)
+            return
+
+        index = min(bisect_left(self._maxes, entry), len(self._chunks) - 1)
+        chunk = self._chunks[index]
+        insort(chunk, entry)
+        self._maxes[index] = chunk[-1]
+
+        # Splitting full chunks in half
+        if len(chunk) > 2 * self.chunk_size:
+            self._chunks.insert(index + 1, chunk[self.chunk_size:])
+            del chunk[self.chunk_size:]
+            self._maxes.insert(index, chunk[-1])
+
+
+    def remove(self, entry: tuple) -> None:
+        index = bisect_left(self._maxes, entry)
+        chunk = self._chunks[index]
+        del chunk[bisect_left(chunk, entry)]
+
+        if chunk:
+            self._maxes[index] = chunk[-1]
+
+        else:
+            del self._chunks[index]
+            del self._maxes[index]
+
+
+    def largest(self, n: int) -> list:
+        found = []
+
+        for chunk in reversed(self._chunks):
+            found.extend(reversed(chunk[-(n - len(found)):]))
+
+            if len(found) == n:
+                break
+
+        return found
+
+
+class BookMetrics:
+    """
+    Class for incrementally maintained aggregates of account balances and bans.
+
+    Class Variables-
+        default_bucket_edges (tuple): Lower edges of the default balance histogram buckets
+
+    Instance Variables-
+        account_count (int): Number of accounts
+        total_balance (float): Sum of all balances
+        bucket_edges (list): Lower edges of the balance histogram buckets, the last bucket has no upper edge
+        bucket_counts (list): Number of accounts per histogram bucket
+        changed_accounts (list): Metered accounts whose balance changed since the histogram and ranking were last read
+    """
+
+    default_bucket_edges = (0, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+    def __init__(self, bucket_edges: tuple = default_bucket_edges):
+        #Checking input values
+        if not bucket_edges or list(bucket_edges) != sorted(set(bucket_edges)) or bucket_edges[0] != 0:
+            raise CustomValueError(f"Bucket edges must be increasing and start at 0, received {bucket_edges}")
+
+        self.account_count = 0
+        self.total_balance = 0.0
+        self.bucket_edges = list(bucket_edges)
+        self.bucket_counts = [0] * len(bucket_edges)
+        self.changed_accounts = []
+        self._ranking = _Ranking()
+        self._banned = set()
+
+
+    def add(self, account_number: int, balance: float) -> None:
+        """
+        Method that counts a new account with its opening balance.
+        """
+        self.account_count += 1
+        self.total_balance += balance
+        self.bucket_counts[bisect_right(self.bucket_edges, balance) - 1] += 1
+        self._ranking.insert((balance, account_number))
+
+
+    def update(self, account_number: int, old_balance: float, new_balance: float) -> None:
+        """
+        Method that moves an account from old_balance to new_balance.
+        """
+        if old_balance == new_balance:
+            return
+
+        edges = self.bucket_edges
+        self.total_balance += new_balance - old_balance
+        self.bucket_counts[bisect_right(edges, old_balance) - 1] -= 1
+        self.bucket_counts[bisect_right(edges, new_balance) - 1] += 1
+
+        self._ranking.remove((old_balance, account_number))
+        self._ranking.insert((new_balance, account_number))
+
+
+    def _apply_changes(self) -> None:
+        """
+        Moves every queued MeteredBankAccount from the balance it was last counted at to its current balance.
+        """
+        for account in self.changed_accounts:
+            account.metrics_pending = False
+            self.update(account.account_number, account.metered_balance, account.balance)
+            account.metered_balance = account.balance
+
+        self.changed_accounts.clear()
+
+
+    def ban(self, account_number: int) -> None:
+        self._banned.add(account_number)
+
+
+    @property
+    def banned_count(self) -> int:
+        """
+        Number of banned accounts, read from the ban registry so accounts unbanned in any way are no longer counted.
+        """
+        banned_accounts = BankAccount.banned_accounts
+        self._banned = {account_number for account_number in self._banned if account_number in banned_accounts}
+        return len(self._banned)
+
+
+    def histogram(self) -> list:
+        """
+        Method that returns (lower edge, number of accounts) for every balance bucket.
+        """
+        self._apply_changes()
+        return list(zip(self.bucket_edges, self.bucket_counts))
+
+
+    def top(self, n: int) -> list:
+        """
+        Method that returns (account number, balance) for the n accounts with the largest balances,
+        largest first. Accounts with equal balances are ordered by account number, highest first.
+        """
+        #Checking input type
+        if not isinstance(n, int):
+            raise CustomTypeError(f"Number of accounts must be int, received {type(n)}")
+
+        if n <= 0:
+            return []
+
+        self._apply_changes()
+        return [(account_number, balance) for balance, account_number in self._ranking.largest(n)]
+
+
+class MeteredBankAccount(BankAccount):
+    """
+    Class for a bank account that keeps a shared BookMetrics up to date.
+    Validation and error semantics are the same as BankAccount.
+
+    Class Variables-
+        metrics (BookMetrics): Aggregates over every metered account
+
+    Instance Variables-
+        metered_balance (float): Balance the account is counted at in the histogram and ranking of metrics
+        metrics_pending (bool): Whether the account is queued in metrics.changed_accounts
+    """
+
+    metrics = BookMetrics()
+
+    def __init__(self, owner, balance):
+        """
+        Creates a new MeteredBankAccount instance and adds it to the metrics.
+
+        Arguments-
+            owner (string): Name of account owner
+            balance (int): non-negative starting account balance
+        """
+        super().__init__(owner, balance)
+        self.metered_balance = self.balance
+        self.metrics_pending = False
+        MeteredBankAccount.metrics.add(self.account_number, self.balance)
+
+
+    # Operations only add to the total and queue the account once, so metering costs a few attribute updates
+
+    def deposit(self, amount: float | int) -> None:
+        super().deposit(amount)
+        metrics = MeteredBankAccount.metrics
+        metrics.total_balance += amount
+
+        if not self.metrics_pending:
+            self.metrics_pending = True
+            metrics.changed_accounts.append(self)
+
+
+    def withdraw(self, amount: float | int) -> None:
+        super().withdraw(amount)
+        metrics = MeteredBankAccount.metrics
+        metrics.total_balance -= amount
+
+        if not self.metrics_pending:
+            self.metrics_pending = True
+            metrics.changed_accounts.append(self)
+
+
+    # transfer_to needs no override: BankAccount.transfer_to moves the money with withdraw and deposit
+
+    def ban_account(self, reason: str) -> None:
+        super().ban_account(reason)
+        MeteredBankAccount.metrics.ban(self.account_number)
@@ -3,38 +3,69 @@ This file contains custom errors that have been created for the purpose of testi
 the bank account system. 
 """
 
-class CustomValueError(Exception):
+class CustomError(Exception):
+    """
+    Base class of the custom errors. Errors raised by an account operation carry the account
+    number, amount and limit involved as attributes (None when they do not apply), so callers
+    do not have to parse the message.
+    """
+    def __init__(self, *args, account_number: int | None = None, amount: float | int | None = None, limit: float | int | None = None):
+        super().__init__(*args)
+        self.account_number = account_number
+        self.amount = amount
+        self.limit = limit
+
+class CustomValueError(CustomError):
     """
     This error should be raised when the value isn't what its expected to be.
     """
     pass
 
-class CustomTypeError(Exception):
+class CustomTypeError(CustomError):
     """
     This error should be raised when the type of the value isn't what its expected to be.
     """
     pass
 
-class CustomAttributeError(Exception):
+class CustomAttributeError(CustomError):
     """
     This error should be raised when the attribute doesn't exist as expected
     """
     pass
 
-class CustomKeyError(Exception):
+class CustomKeyError(CustomError):
     """
     This error should be raised when a key is expected to exist in a dictionary but doesn't exist.
     """
     pass
 
-class CustomOperationError(Exception):
+class CustomOperationError(CustomError):
     """
     Raised when an operation is not allowed (e.g., on a banned account).
     """
     pass
 
-class CustomLimitError(Exception):
+class CustomBannedError(CustomOperationError):
+    """
+    Raised when an operation uses a banned account.
+    """
+    pass
+
+class CustomLimitError(CustomError):
     """
     Raised when a transaction exceeds the allowed limit.
     """
-    pass
\ No newline at end of file
+    pass
+
+class CustomConflictError(CustomError):
+    """
+    Raised when a transaction can not commit because an account it used was changed by another one.
+    """
+    pass
+
+class CustomInsufficientFundsError(CustomError, AssertionError):
+    """
+    Raised when an account does not have enough funds for a withdrawal or transfer.
+    Subclasses AssertionError, which earlier versions raised through an assert statement.
+    """
+    pass
@@ -0,0 +1,141 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class FastBankAccount, a BankAccount for hot paths. Each request is validated
+exactly once, insufficient funds and limits are enforced with real exceptions (so running Python with -O
+does not change behavior), and a transfer moves the money directly instead of validating again in
+withdraw and deposit. The post-condition checks of BankAccount are kept as an opt-in debug mode.
+"""
+
+from bank import BankAccount
+from custom_errors import *
+
+class FastBankAccount(BankAccount):
+    """
+    Class for a bank account with a single-validation fast path. Errors and results are the same as BankAccount.
+
+    Class Variables-
+        debug (bool): Runs every operation through the checked BankAccount implementation
+                      followed by an invariant check when True (False by default)
+    """
+
+    debug = False
+
+    def _check_invariants(self) -> None:
+        """
+        Debug check that the balance is still a non-negative number. Raises AssertionError
+        explicitly, so the check also runs under python -O.
+        """
+        if not isinstance(self.balance, (int, float)) or not self.balance >= 0:
+            raise AssertionError(f"Balance of Account ({self.account_number}) must be a non-negative number, found {self.balance}")
+
+
+    def deposit(self, amount: float | int) -> None:
+        if self.debug:
+            super().deposit(amount)
+            self._check_invariants()
+            return
+
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Deposit amount must be int or float, received {type(amount)}", account_number=self.account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Deposit amount must be greater than 0, received {amount}", account_number=self.account_number, amount=amount)
+
+        #Checking if account is banned
+        if self.account_number in BankAccount.banned_accounts:
+            raise CustomBannedError(f"Deposits restricted to Account ({self.account_number}) as it Banned", account_number=self.account_number, amount=amount)
+
+        self.balance += amount
+
+
+    def withdraw(self, amount: float | int) -> None:
+        if self.debug:
+            super().withdraw(amount)
+            self._check_invariants()
+            return
+
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Withdrawal amount must be int or float, received {type(amount)}", account_number=self.account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Withdrawal amount must be greater than 0, received {amount}", account_number=self.account_number, amount=amount)
+
+        #Checking if account is banned
+        if self.account_number in BankAccount.banned_accounts:
+            raise CustomBannedError(f"Withdrawal restricted from Account ({self.account_number}) as it Banned", account_number=self.account_number, amount=amount)
+
+        #Checking sufficient balance
+        if amount > self.balance:
+            raise CustomInsufficientFundsError(f"Insufficient funds in Account ({self.account_number}) for withdrawal", account_number=self.account_number, amount=amount)
+
+        #Checking transaction limits
+        limit = self.transaction_limit
+        if limit is not None and amount > limit:
+            raise CustomLimitError(f"Withdrawal amount ${amount} exceeds maximum transaction limit ${limit}", account_number=self.account_number, amount=amount, limit=limit)
+
+        self.balance -= amount
+
+
+    def transfer_to(self, target_account: BankAccount, amount: float | int) -> None:
+        if self.debug:
+            super().transfer_to(target_account, amount)
+            self._check_invariants()
+
+            if isinstance(target_account, FastBankAccount):
+                target_account._check_invariants()
+            return
+
+        #Checking input type
+        if not isinstance(target_account, BankAccount):
+            raise CustomTypeError("Target must be a BankAccount instance", account_number=self.account_number, amount=amount)
+
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Transfer amount must be int or float, received {type(amount)}", account_number=self.account_number, amount=amount)
+
+        #Ensuring that target_account is different form sending account
+        if self is target_account:
+            raise CustomValueError("Sender and receiver accounts must be different", account_number=self.account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Transfer amount must be greater than 0, received {amount}", account_number=self.account_number, amount=amount)
+
+        #Checking if either account is banned
+        banned_accounts = BankAccount.banned_accounts
+
+        if self.account_number in banned_accounts:
+            raise CustomBannedError(f"Transfer restricted from Account ({self.account_number}) as it Banned", account_number=self.account_number, amount=amount)
+
+        if target_account.account_number in banned_accounts:
+            raise CustomBannedError(f"Transfer restricted to Account ({target_account.account_number}) as it Banned", account_number=target_account.account_number, amount=amount)
+
+        #Checking sufficient balance
+        if amount > self.balance:
+            raise CustomInsufficientFundsError(f"Transfer cannot be completed as insufficient funds in Account ({self.account_number})", account_number=self.account_number, amount=amount)
+
+        #Checking transaction limits
+        limit = self.transaction_limit
+        if limit is not None and amount > limit:
+            raise CustomLimitError(f"Trasfer amount ${amount} exceeds maximum transaction limit ${limit}", account_number=self.account_number, amount=amount, limit=limit)
+
+        # Other account types keep their own deposit behaviour (locking, journaling, cents)
+        if type(target_account) is FastBankAccount or type(target_account) is BankAccount:
+            self.balance -= amount
+            target_account.balance += amount
+            return
+
+        balance = self.balance
+        self.balance = balance - amount
+
+        # The target may still reject the deposit (a subclass check or a failed write), so the debit is undone before re-raising
+        try:
+            target_account.deposit(amount)
+
+        except BaseException:
+            self.balance = balance
+            raise
@@ -0,0 +1,264 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class AccountHistory, a per-account transaction history kept in compact
+append-only columns (timestamp, type, amount, counterparty and balance after the posting), and
+class HistoryBankAccount, a BankAccount that records every successful operation in its history.
+Postings are appended in time order, so "all postings between t1 and t2" and "balance as of t" are
+answered by binary search. When a history holds more postings in memory than its limit, the oldest
+ones are moved to an append-only file of fixed-size records, which is binary searched the same way.
+The file is only open while it is written or searched, so millions of histories do not hold millions
+of file descriptors.
+"""
+
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import transaction_log
+from bank import BankAccount
+from custom_errors import *
+
+# Spilled record: timestamp, amount, balance after the posting, counterparty, type
+RECORD = struct.Struct("<dddqb")
+
+Posting = namedtuple("Posting", ["timestamp", "kind", "amount", "counterparty", "balance"])
+
+
+class AccountHistory:
+    """
+    Class for the transaction history of one account. Amounts are signed balance changes, and
+    kinds are the transaction_log event types (OPEN, DEPOSIT, WITHDRAW, TRANSFER).
+
+    Instance Variables-
+        account_number (int): Account the history belongs to
+        spill_path (string): File that older postings are moved to (None keeps every posting in memory)
+        memory_limit (int): Maximum number of postings kept in memory when spill_path is set
+        spilled (int): Number of postings in the spill file
+    """
+
+    def __init__(self, account_number: int, spill_path: str | None = None, memory_limit: int = 100_000):
+        #Checking input values
+        if memory_limit < 2:
+            raise CustomValueError(f"Memory limit must be at least 2 postings, received {memory_limit}")
+
+        self.account_number = account_number
+        self.spill_path = spill_path
+        self.memory_limit = memory_limit
+        self.spilled = 0
+        self.timestamps = array("d")
+        self.kinds = array("b")
+        self.amounts = array("d")
+        self.counterparties = array("q")
+        self.balances = array("d")
+
+
+    def __len__(self) -> int:
+        return self.spilled + len(self.timestamps)
+
+
+    def last_timestamp(self) -> float | None:
+        """
+        Method that returns the timestamp of the last posting (None if there are no postings).
+        """
+        if self.timestamps:
+            return self.timestamps[-1]
+
+        if not self.spilled:
+            return None
+
+        with open(self.spill_path, "rb") as spill_file:
+            return self._disk_timestamp(spill_file.fileno(), self.spilled - 1)
+
+
+    def record(self, kind: int, amount: float, balance: float, counterparty: int = 0, timestamp: float | None = None) -> None:
+        """
+        Method that appends a posting. timestamp defaults to the current time and can not be
+        earlier than the last posting.
+        """
+        last = self.last_timestamp()
+
+        if timestamp is None:
+            # Keeping the order if the clock is set back
+            timestamp = time.time() if last is None else max(time.time(), last)
+
+        elif last is not None and timestamp < last:
+            raise CustomValueError(f"Postings must be recorded in time order, received {timestamp} after {last}")
+
+        self.timestamps.append(timestamp)
+        self.kinds.append(kind)
+        self.amounts.append(amount)
+        self.counterparties.append(counterparty)
+        self.balances.append(balance)
+
+        if self.spill_path is not None and len(self.timestamps) > self.memory_limit:
+            self._spill(len(self.timestamps) - self.memory_limit // 2)
+
+
+    def _spill(self, count: int) -> None:
+        """
+        Moves the oldest count in-memory postings to the end of the spill file.
+        The file is created on the first spill, so short histories never use a file.
+        """
+        pack = RECORD.pack
+
+        with open(self.spill_path, "ab" if self.spilled else "wb") as spill_file:
+            spill_file.write(b"".join(pack(*entry) for entry in zip(self.timestamps[:count], self.amounts[:count], self.balances[:count],
+                                                                    self.counterparties[:count], self.kinds[:count])))
+
+        for column in (self.timestamps, self.kinds, self.amounts, self.counterparties, self.balances):
+            del column[:count]
+
+        self.spilled += count
+
+
+    @staticmethod
+    def _disk_timestamp(descriptor: int, index: int) -> float:
+        return struct.unpack_from("<d", os.pread(descriptor, 8, index * RECORD.size))[0]
+
+
+    def _disk_bisect(self, descriptor: int, timestamp: float, right: bool) -> int:
+        """
+        Returns the index of the first spilled posting later than timestamp (right is True)
+        or not earlier than timestamp (right is False).
+        """
+        low, high = 0, self.spilled
+
+        while low < high:
+            middle = (low + high) // 2
+            found = self._disk_timestamp(descriptor, middle)
+
+            if found < timestamp or (right and found == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+
+    @staticmethod
+    def _read_spilled(descriptor: int, start: int, stop: int) -> list:
+        data = os.pread(descriptor, (stop - start) * RECORD.size, start * RECORD.size)
+        return [Posting(timestamp, kind, amount, counterparty, balance) for timestamp, amount, balance, counterparty, kind in RECORD.iter_unpack(data)]
+
+
+    def postings(self, start_time: float, end_time: float) -> list:
+        """
+        Method that returns every Posting with start_time <= timestamp <= end_time, oldest first.
+        """
+        found = []
+
+        if end_time < start_time:
+            return found
+
+        if self.spilled:
+            with open(self.spill_path, "rb") as spill_file:
+                descriptor = spill_file.fileno()
+
+                if start_time <= self._disk_timestamp(descriptor, self.spilled - 1):
+                    found = self._read_spilled(descriptor, self._disk_bisect(descriptor, start_time, False), self._disk_bisect(descriptor, end_time, True))
+
+        start = bisect_left(self.timestamps, start_time)
+        stop = bisect_right(self.timestamps, end_time)
+
+        for index in range(start, stop):
+            found.append(Posting(self.timestamps[index], self.kinds[index], self.amounts[index], self.counterparties[index], self.balances[index]))
+
+        return found
+
+
+    def balance_at(self, timestamp: float) -> float:
+        """
+        Method that returns the balance after the last posting at or before timestamp
+        (0 before the account was opened).
+        """
+        index = bisect_right(self.timestamps, timestamp)
+
+        if index > 0:
+            return self.balances[index - 1]
+
+        if not self.spilled:
+            return 0.0
+
+        with open(self.spill_path, "rb") as spill_file:
+            descriptor = spill_file.fileno()
+            index = self._disk_bisect(descriptor, timestamp, True)
+            return self._read_spilled(descriptor, index - 1, index)[0].balance if index > 0 else 0.0
+
+
+    def close(self) -> None:
+        # The spill file is only open inside a read or write, so there is nothing left to close
+        pass
+
+
+class HistoryBankAccount(BankAccount):
+    """
+    Class for a bank account that keeps the history of its successful operations.
+    A transfer is recorded once on each side, with the other account as counterparty.
+
+    Class Variables-
+        history_directory (string): Directory for spill files (None keeps histories in memory)
+        history_memory_limit (int): Maximum number of postings kept in memory per account
+
+    Instance Variables-
+        history (AccountHistory): Postings of the account
+    """
+
+    history_directory = None
+    history_memory_limit = 100_000
+
+    def __init__(self, owner, balance):
+        """
+        Creates a new HistoryBankAccount instance and records the opening balance.
+
+        Arguments-
+            owner (string): Name of account owner
+            balance (int): non-negative starting account balance (before the bonus)
+        """
+        self._history_paused = False
+        super().__init__(owner, balance)
+
+        directory = HistoryBankAccount.history_directory
+        spill_path = None if directory is None else os.path.join(directory, f"{self.account_number}.history")
+        self.history = AccountHistory(self.account_number, spill_path, HistoryBankAccount.history_memory_limit)
+        self.history.record(transaction_log.OPEN, self.balance, self.balance)
+
+
+    def deposit(self, amount: float | int) -> None:
+        super().deposit(amount)
+
+        if not self._history_paused:
+            self.history.record(transaction_log.DEPOSIT, amount, self.balance)
+
+
+    def withdraw(self, amount: float | int) -> None:
+        super().withdraw(amount)
+
+        if not self._history_paused:
+            self.history.record(transaction_log.WITHDRAW, -amount, self.balance)
+
+
+    def transfer_to(self, target_account: BankAccount, amount: float | int) -> None:
+        # Pausing the history of both accounts, so the inner withdrawal and deposit are not recorded
+        paused = [account for account in (self, target_account) if isinstance(account, HistoryBankAccount)]
+
+        # One timestamp for both sides, no earlier than the last posting of either, so recording can not fail after the money moved
+        timestamp = max([time.time()] + [last for last in (account.history.last_timestamp() for account in paused) if last is not None])
+
+        for account in paused:
+            account._history_paused = True
+
+        try:
+            super().transfer_to(target_account, amount)
+
+        finally:
+            for account in paused:
+                account._history_paused = False
+
+        self.history.record(transaction_log.TRANSFER, -amount, self.balance, target_account.account_number, timestamp)
+
+        if isinstance(target_account, HistoryBankAccount):
+            target_account.history.record(transaction_log.TRANSFER, amount, target_account.balance, self.account_number, timestamp)
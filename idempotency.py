@@ -0,0 +1,171 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class IdempotencyCache, a bounded cache of operation outcomes keyed by
+client-chosen idempotency keys, and class IdempotentBankAccount, a BankAccount whose deposit,
+withdraw and transfer_to take an optional idempotency key. An operation repeated with a key that
+is still cached is not applied again: it returns (or raises) what the first attempt did.
+Keys expire ttl_seconds after their first use, and the oldest keys are dropped once the cache holds
+capacity keys, so memory stays bounded however many keys clients send.
+"""
+
+import copy
+import time
+from collections import OrderedDict
+
+from bank import BankAccount
+from custom_errors import *
+
+class IdempotencyCache:
+    """
+    Class for the outcomes of recent operations, oldest key first. A key is forgotten ttl_seconds
+    after it was first stored or when capacity newer keys have been stored since, whichever is sooner.
+    Retrying does not extend the life of a key, since a retry window is measured from the first attempt.
+
+    Class Variables-
+        clock (function): Returns the current time in seconds
+
+    Instance Variables-
+        capacity (int): Maximum number of keys kept
+        ttl_seconds (float): Time a key is kept after its first use
+        hits (int): Number of lookups that found a key
+        evictions (int): Number of keys dropped because the cache was full
+    """
+
+    clock = time.monotonic
+
+    def __init__(self, capacity: int = 1_000_000, ttl_seconds: float = 3_600):
+        #Checking input type
+        if not isinstance(capacity, int):
+            raise CustomTypeError(f"Capacity must be int, received {type(capacity)}")
+
+        if not isinstance(ttl_seconds, (int, float)):
+            raise CustomTypeError(f"Time to live must be a number, received {type(ttl_seconds)}")
+
+        #Checking input values
+        if capacity < 1 or ttl_seconds <= 0:
+            raise CustomValueError(f"Capacity and time to live must be positive, received {capacity} and {ttl_seconds}")
+
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._next_sweep = 0.0
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    def _expire(self, now: float) -> None:
+        """
+        Drops expired keys. Keys are stored in time order, so they are only looked for at the front.
+        """
+        entries = self._entries
+
+        while entries:
+            _, (expires_at, _, _) = next(iter(entries.items()))
+
+            if expires_at > now:
+                break
+
+            entries.popitem(last=False)
+
+
+    def get(self, key: str) -> tuple | None:
+        """
+        Method that returns the (fingerprint, error) stored for key, or None if key is not cached.
+        """
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        if entry[0] <= IdempotencyCache.clock():
+            del self._entries[key]
+            return None
+
+        self.hits += 1
+        return entry[1], entry[2]
+
+
+    def put(self, key: str, fingerprint: tuple, error: Exception | None) -> None:
+        """
+        Method that stores the outcome of the operation described by fingerprint under key.
+        """
+        now = IdempotencyCache.clock()
+        entries = self._entries
+
+        # get never returns an expired key, so expired keys are only swept now and then to free memory
+        if now >= self._next_sweep:
+            self._expire(now)
+            self._next_sweep = now + self.ttl_seconds / 64
+
+        entries[key] = (now + self.ttl_seconds, fingerprint, error)
+
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class IdempotentBankAccount(BankAccount):
+    """
+    Class for a bank account whose operations can be retried safely with an idempotency key.
+    Successes and rejections by a custom error are both remembered, other errors are not, so an
+    operation that failed unexpectedly can be retried. Using a key again for a different operation
+    raises CustomValueError.
+
+    Class Variables-
+        idempotency_cache (IdempotencyCache): Outcomes shared by every idempotent account
+    """
+
+    idempotency_cache = IdempotencyCache()
+
+    def _idempotent(self, key: str | None, fingerprint: tuple, operation, *args) -> None:
+        if key is None:
+            operation(*args)
+            return
+
+        #Checking input type
+        if not isinstance(key, str):
+            raise CustomTypeError(f"Idempotency key must be string, received {type(key)}")
+
+        cache = IdempotentBankAccount.idempotency_cache
+        cached = cache.get(key)
+
+        if cached is not None:
+            if cached[0] != fingerprint:
+                raise CustomValueError(f"Idempotency key {key!r} was already used for a different operation {cached[0]}", account_number=self.account_number)
+
+            # Raising a copy, so the stored error does not collect tracebacks
+            if cached[1] is not None:
+                raise copy.copy(cached[1])
+
+            return
+
+        try:
+            operation(*args)
+
+        except CustomError as error:
+            cache.put(key, fingerprint, copy.copy(error))
+            raise
+
+        cache.put(key, fingerprint, None)
+
+
+    def deposit(self, amount: float | int, idempotency_key: str | None = None) -> None:
+        self._idempotent(idempotency_key, ("deposit", self.account_number, amount), super().deposit, amount)
+
+
+    def withdraw(self, amount: float | int, idempotency_key: str | None = None) -> None:
+        self._idempotent(idempotency_key, ("withdraw", self.account_number, amount), super().withdraw, amount)
+
+
+    def transfer_to(self, target_account: BankAccount, amount: float | int, idempotency_key: str | None = None) -> None:
+        target_account_number = getattr(target_account, "account_number", None)
+        self._idempotent(idempotency_key, ("transfer", self.account_number, target_account_number, amount), super().transfer_to, target_account, amount)
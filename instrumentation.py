@@ -0,0 +1,296 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class Instrumentation, an opt-in measurement layer for the hot paths of
+BankAccount (deposit, withdraw, transfer_to and is_banned). When enabled, the methods of the account
+class are replaced with wrappers that count calls, count errors by exception class and record the
+latency of every call in a LatencyHistogram. When disabled, the original methods are put back, so
+accounts run exactly the code they ran before and pay nothing for the instrumentation.
+Measurements can be exported as a snapshot dictionary or in the Prometheus text format.
+"""
+
+import functools
+import time
+
+from bank import BankAccount
+from custom_errors import *
+
+class LatencyHistogram:
+    """
+    Class for an HDR-style histogram of latencies in nanoseconds. Values below
+    2 * 2**sub_bucket_bits are counted exactly, and every power of two above that is split into
+    2**sub_bucket_bits buckets, so a recorded value is known to within 1 / 2**sub_bucket_bits
+    of itself (about 3% by default) using a few hundred counters for any latency.
+
+    Instance Variables-
+        sub_bucket_bits (int): Number of bits of precision kept for each value
+        count (int): Number of recorded values
+        total (int): Sum of recorded values
+        minimum (int): Smallest recorded value (None when empty)
+        maximum (int): Largest recorded value (None when empty)
+    """
+
+    def __init__(self, sub_bucket_bits: int = 5):
+        #Checking input values
+        if not 1 <= sub_bucket_bits <= 16:
+            raise CustomValueError(f"Sub-bucket bits must be between 1 and 16, received {sub_bucket_bits}")
+
+        self.sub_bucket_bits = sub_bucket_bits
+        self.count = 0
+        self.total = 0
+        self._minimum = float("inf")
+        self._maximum = -1
+        self._counts = []
+
+
+    def _index(self, value: int) -> int:
+        """
+        Returns the index of the bucket that counts value.
+        """
+        shift = value.bit_length() - self.sub_bucket_bits - 1
+        return (shift << self.sub_bucket_bits) + (value >> shift) if shift > 0 else value
+
+
+    def _bounds(self, index: int) -> tuple:
+        """
+        Returns the lowest and highest value counted in the bucket at index.
+        """
+        shift = max(0, (index >> self.sub_bucket_bits) - 1)
+        base = index - (shift << self.sub_bucket_bits)
+        return base << shift, ((base + 1) << shift) - 1
+
+
+    def record(self, value: int) -> None:
+        """
+        Method that counts one latency of value nanoseconds (negative values are counted as 0).
+        """
+        if value < 0:
+            value = 0
+
+        index = self._index(value)
+
+        try:
+            self._counts[index] += 1
+
+        except IndexError:
+            self._counts.extend([0] * (index + 1 - len(self._counts)))
+            self._counts[index] += 1
+
+        self.count += 1
+        self.total += value
+
+        if value > self._maximum:
+            self._maximum = value
+
+        if value < self._minimum:
+            self._minimum = value
+
+
+    @property
+    def minimum(self) -> int | None:
+        return self._minimum if self.count else None
+
+
+    @property
+    def maximum(self) -> int | None:
+        return self._maximum if self.count else None
+
+
+    def percentile(self, percent: float) -> int:
+        """
+        Method that returns the value below which percent of the recorded values fall, as the
+        highest value of its bucket (never above the maximum). Returns 0 when empty.
+        """
+        #Checking input values
+        if not 0 <= percent <= 100:
+            raise CustomValueError(f"Percentile must be between 0 and 100, received {percent}")
+
+        if not self.count:
+            return 0
+
+        wanted = max(1, -(-self.count * percent // 100))
+        seen = 0
+
+        for index, count in enumerate(self._counts):
+            seen += count
+
+            if seen >= wanted:
+                return min(self._bounds(index)[1], self.maximum)
+
+        return self.maximum
+
+
+    def buckets(self) -> list:
+        """
+        Method that returns (highest value, count) for every bucket that holds values, lowest first.
+        """
+        return [(self._bounds(index)[1], count) for index, count in enumerate(self._counts) if count]
+
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Instrumentation:
+    """
+    Class for call counts, error counts and latency histograms of account operations.
+    A transfer is timed as a whole and its inner withdrawal and deposit are also counted. The try_ methods
+    of an instrumented class go through the instrumented operations, so their calls and rejections are counted too.
+    Counters are updated without locks, so counts from several threads at once are approximate.
+
+    Class Variables-
+        operations (tuple): Names of the instrumented methods
+
+    Instance Variables-
+        histograms (dictionary): LatencyHistogram per operation, its count is the number of calls
+        errors (dictionary): Number of raised errors per (operation, exception class name)
+        account_class (class): Class whose methods are instrumented (None when disabled)
+    """
+
+    operations = ("deposit", "withdraw", "transfer_to", "is_banned")
+
+    def __init__(self, sub_bucket_bits: int = 5):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.histograms = {}
+        self.errors = {}
+        self.account_class = None
+        self._replaced = []
+        self.reset()
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.account_class is not None
+
+
+    def reset(self) -> None:
+        """
+        Method that clears every measurement. The wrappers keep recording into the new histograms.
+        """
+        for name in self.operations:
+            self.histograms[name] = LatencyHistogram(self.sub_bucket_bits)
+
+        self.errors.clear()
+
+
+    def _wrap(self, name: str, method):
+        histograms = self.histograms
+        errors = self.errors
+        clock = time.perf_counter_ns
+
+        @functools.wraps(method)
+        def instrumented(*args, **kwargs):
+            start = clock()
+
+            try:
+                return method(*args, **kwargs)
+
+            except Exception as error:
+                key = (name, type(error).__name__)
+                errors[key] = errors.get(key, 0) + 1
+                raise
+
+            finally:
+                histograms[name].record(clock() - start)
+
+        return instrumented
+
+
+    def enable(self, account_class: type = BankAccount) -> None:
+        """
+        Method that starts instrumenting the operations of account_class (and of its subclasses
+        that inherit them). Only one class can be instrumented at a time.
+        """
+        #Checking input type
+        if not isinstance(account_class, type):
+            raise CustomTypeError(f"Account class must be a class, received {type(account_class)}")
+
+        if self.enabled:
+            raise CustomOperationError(f"Instrumentation is already enabled on {self.account_class.__name__}")
+
+        for name in self.operations:
+            # Remembering whether the method was defined on the class itself or inherited
+            self._replaced.append((name, account_class.__dict__.get(name)))
+            setattr(account_class, name, self._wrap(name, getattr(account_class, name)))
+
+        self.account_class = account_class
+
+
+    def disable(self) -> None:
+        """
+        Method that puts the original methods back. Measurements are kept.
+        """
+        if not self.enabled:
+            return
+
+        for name, original in self._replaced:
+            if original is None:
+                delattr(self.account_class, name)
+
+            else:
+                setattr(self.account_class, name, original)
+
+        self._replaced = []
+        self.account_class = None
+
+
+    def __enter__(self) -> "Instrumentation":
+        if not self.enabled:
+            self.enable()
+
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.disable()
+
+
+    def snapshot(self) -> dict:
+        """
+        Method that returns every measurement as a dictionary of plain values, latencies in nanoseconds.
+        """
+        operations = {}
+
+        for name, histogram in self.histograms.items():
+            operations[name] = {
+                "count": histogram.count,
+                "errors": {error: count for (operation, error), count in self.errors.items() if operation == name},
+                "latency_ns": {
+                    "min": histogram.minimum or 0,
+                    "mean": histogram.mean(),
+                    "p50": histogram.percentile(50),
+                    "p90": histogram.percentile(90),
+                    "p99": histogram.percentile(99),
+                    "p999": histogram.percentile(99.9),
+                    "max": histogram.maximum or 0,
+                },
+                "buckets": histogram.buckets(),
+            }
+
+        return {"enabled": self.enabled, "operations": operations}
+
+
+    def export_text(self, prefix: str = "bank") -> str:
+        """
+        Method that returns every measurement in the Prometheus text format, latencies in seconds.
+        """
+        lines = [
+            f"# TYPE {prefix}_operations_total counter",
+            *(f'{prefix}_operations_total{{operation="{name}"}} {histogram.count}' for name, histogram in self.histograms.items()),
+            f"# TYPE {prefix}_operation_errors_total counter",
+            *(f'{prefix}_operation_errors_total{{operation="{name}",error="{error}"}} {count}' for (name, error), count in sorted(self.errors.items())),
+            f"# TYPE {prefix}_operation_latency_seconds histogram",
+        ]
+
+        for name, histogram in self.histograms.items():
+            cumulative = 0
+
+            for highest, count in histogram.buckets():
+                cumulative += count
+                lines.append(f'{prefix}_operation_latency_seconds_bucket{{operation="{name}",le="{highest / 1e9:.9g}"}} {cumulative}')
+
+            lines.append(f'{prefix}_operation_latency_seconds_bucket{{operation="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{prefix}_operation_latency_seconds_sum{{operation="{name}"}} {histogram.total / 1e9:.9g}')
+            lines.append(f'{prefix}_operation_latency_seconds_count{{operation="{name}"}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
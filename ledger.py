@@ -0,0 +1,216 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class Ledger, an append-only double-entry ledger kept in compact columns, and
+class LedgerBankAccount, a CentsBankAccount that writes every opening, deposit, withdrawal and transfer
+to a Ledger. Every entry is a set of lines (account, signed cents) that sums to zero. Money from outside
+the bank is posted against the EXTERNAL account and opening bonuses against the BONUS account, so the
+whole ledger always sums to zero and money can neither appear nor vanish unnoticed.
+Account balances are the sums of their lines. The ledger materializes them into a cache that catches up
+on only the lines posted since it was last read. An account's own balance is a cached copy too: every
+operation posts its entry first and only then applies the entry's lines to the cached balances, which
+can be checked against the ledger or derived from it again.
+"""
+
+from array import array
+from itertools import accumulate
+
+import transaction_log
+from custom_errors import *
+from money import CentsBankAccount
+
+# System accounts, below the first customer account number
+EXTERNAL = 0
+BONUS = 1
+
+# Largest number of cents a line can hold (the cents column is 64-bit)
+LINE_LIMIT = 2**63 - 1
+
+
+class Ledger:
+    """
+    Class for an append-only double-entry ledger.
+
+    Instance Variables-
+        accounts (array of int): Account of every line
+        cents (array of int): Signed amount of every line in cents, positive increases the account
+        entry_kinds (array of int): transaction_log event type of every entry
+        entry_ends (array of int): Index of the last line of every entry
+    """
+
+    def __init__(self):
+        self.accounts = array("q")
+        self.cents = array("q")
+        self.entry_kinds = array("b")
+        self.entry_ends = array("q")
+        self._balances = {}
+        self._materialized = 0
+
+
+    def __len__(self) -> int:
+        """
+        Number of entries.
+        """
+        return len(self.entry_ends)
+
+
+    def post(self, kind: int, lines: list) -> None:
+        """
+        Method that appends an entry of (account, cents) lines, which must sum to zero.
+        """
+        #Checking input values
+        if not lines or sum(cents for _, cents in lines) != 0:
+            raise CustomValueError(f"Ledger entries must have lines that sum to zero, received {lines}")
+
+        # Building the lines before appending any of them, so a value that does not fit leaves the ledger unchanged
+        accounts = array("q", [account for account, _ in lines])
+        amounts = array("q", [cents for _, cents in lines])
+
+        self.accounts.extend(accounts)
+        self.cents.extend(amounts)
+        self.entry_kinds.append(kind)
+        self.entry_ends.append(len(self.cents) - 1)
+
+
+    def move(self, kind: int, source: int, target: int, cents: int) -> None:
+        """
+        Method that appends an entry moving cents from source to target, balanced by construction.
+        """
+        # Checking the amount fits a line before appending anything, so a failed move leaves the ledger unchanged
+        if not -LINE_LIMIT <= cents <= LINE_LIMIT:
+            raise OverflowError(f"Ledger lines hold at most {LINE_LIMIT} cents, received {cents}")
+
+        self.accounts.append(source)
+        self.cents.append(-cents)
+        self.accounts.append(target)
+        self.cents.append(cents)
+        self.entry_kinds.append(kind)
+        self.entry_ends.append(len(self.cents) - 1)
+
+
+    def materialize(self) -> dict:
+        """
+        Method that returns the balance in cents of every account, adding only the lines posted since the last call.
+        The returned dictionary is the ledger's cache and should not be changed.
+        """
+        balances = self._balances
+        start = self._materialized
+        get = balances.get
+
+        for account, cents in zip(self.accounts[start:], self.cents[start:]):
+            balances[account] = get(account, 0) + cents
+
+        self._materialized = len(self.cents)
+        return balances
+
+
+    def balance(self, account: int) -> int:
+        return self.materialize().get(account, 0)
+
+
+    def rebuild(self) -> dict:
+        """
+        Method that drops the materialized balances and derives them again from every line.
+        """
+        self._balances = {}
+        self._materialized = 0
+        return self.materialize()
+
+
+    def trial_balance(self) -> dict:
+        """
+        Method that checks every entry sums to zero in one pass over the lines. Returns the number of
+        entries and lines, the sum of all lines and the indices of the entries that do not balance.
+        """
+        # The running sum is zero at the end of every entry exactly when every entry balances
+        running = list(accumulate(self.cents))
+        ends = running.__getitem__
+        unbalanced = []
+
+        if any(map(ends, self.entry_ends)):
+            previous = 0
+
+            for index, end in enumerate(self.entry_ends):
+                if running[end] != previous:
+                    unbalanced.append(index)
+
+                previous = running[end]
+
+        return {
+            "entries": len(self.entry_ends),
+            "lines": len(self.cents),
+            "total": running[-1] if running else 0,
+            "unbalanced_entries": unbalanced,
+        }
+
+
+class LedgerBankAccount(CentsBankAccount):
+    """
+    Class for a bank account whose every successful operation is posted to a shared Ledger.
+    Validation and error semantics are the same as CentsBankAccount. The ledger holds the money:
+    balance_cents is only a cached copy of the account's lines, changed after its entry is posted,
+    which reconcile checks against the ledger and rebuild_balances derives from it again.
+
+    Class Variables-
+        ledger (Ledger): Ledger shared by every ledger account
+    """
+
+    ledger = Ledger()
+
+    def __init__(self, owner, balance):
+        """
+        Creates a new LedgerBankAccount instance and posts the opening balance and bonus.
+
+        Arguments-
+            owner (string): Name of account owner
+            balance (int/float): non-negative starting account balance in dollars
+        """
+        super().__init__(owner, balance)
+        bonus_cents = self.bonus_cents
+
+        # An opening that can not be posted raises out of __init__, so no account is left with an unposted balance
+        LedgerBankAccount.ledger.post(transaction_log.OPEN, [(self.account_number, self.balance_cents),
+                                                             (EXTERNAL, bonus_cents - self.balance_cents), (BONUS, -bonus_cents)])
+
+
+    def deposit(self, amount: float | int) -> None:
+        cents = self._deposit_cents(amount)
+        LedgerBankAccount.ledger.move(transaction_log.DEPOSIT, EXTERNAL, self.account_number, cents)
+        self.balance_cents += cents
+
+
+    def withdraw(self, amount: float | int) -> None:
+        cents = self._withdrawal_cents(amount)
+        LedgerBankAccount.ledger.move(transaction_log.WITHDRAW, self.account_number, EXTERNAL, cents)
+        self.balance_cents -= cents
+
+
+    def transfer_to(self, target_account: "LedgerBankAccount", amount: float | int) -> None:
+        #Checking input type
+        if not isinstance(target_account, LedgerBankAccount):
+            raise CustomTypeError("Target must be a LedgerBankAccount instance", account_number=self.account_number, amount=amount)
+
+        cents = self._transfer_cents(target_account, amount)
+        LedgerBankAccount.ledger.move(transaction_log.TRANSFER, self.account_number, target_account.account_number, cents)
+        self.balance_cents -= cents
+        target_account.balance_cents += cents
+
+
+    @classmethod
+    def reconcile(cls, accounts: list) -> list:
+        """
+        Class method that returns the account numbers of the accounts whose cached balance differs from the ledger.
+        """
+        balances = LedgerBankAccount.ledger.materialize()
+        return [account.account_number for account in accounts if balances.get(account.account_number, 0) != account.balance_cents]
+
+
+    @classmethod
+    def rebuild_balances(cls, accounts: list) -> None:
+        """
+        Class method that derives the cached balance of every account again from all lines of the ledger.
+        """
+        balances = LedgerBankAccount.ledger.rebuild()
+
+        for account in accounts:
+            account.balance_cents = balances.get(account.account_number, 0)
@@ -0,0 +1,311 @@
+"""
+Name- Suveer Dhawan
+
+This program keeps account state in a memory-mapped file of fixed-width records, so many reporting
+processes can read balances without copying the book, while a single writer process applies
+deposits, withdrawals and transfers. Every record carries a sequence number used as a seqlock:
+the writer makes it odd while a record changes and even again afterwards, and readers retry until
+they see the same even number before and after reading, so they never see a torn record.
+"""
+
+import math
+import mmap
+import struct
+from collections import namedtuple
+
+from account_store import AccountStore
+from custom_errors import *
+
+# Header: magic, format version, record size, capacity (records), first account number, records in use
+HEADER = struct.Struct("<8sIIqqq")
+MAGIC = b"BANKMMAP"
+VERSION = 1
+
+# Header fields the writer changes after creating the file
+COUNT = struct.Struct("<q")
+CAPACITY_OFFSET = 16
+USED_OFFSET = 32
+
+# Record: sequence number, then account number, balance, limit (NaN when none), ban flag and owner offset
+SEQUENCE = struct.Struct("<Q")
+BODY = struct.Struct("<qddB7xq")
+RECORD_SIZE = SEQUENCE.size + BODY.size
+
+# Owner names live in a separate append-only file: 2 byte length, then UTF-8 text
+OWNER_LENGTH = struct.Struct("<H")
+
+AccountRecord = namedtuple("AccountRecord", ["account_number", "owner", "balance", "transaction_limit", "banned"])
+
+
+class MappedBookWriter:
+    """
+    Class for the single writer of a memory-mapped account file. Operations are validated and
+    applied by an AccountStore, then the changed records are published to the file.
+
+    Instance Variables-
+        path (string): Location of the account file (owner names are kept in path + ".owners")
+        store (AccountStore): Store that validates and applies every operation
+        capacity (int): Number of records the file currently has room for
+    """
+
+    def __init__(self, path: str, store: AccountStore | None = None, capacity: int = 1024):
+        """
+        Creates the account file at path and publishes every account already in store.
+        """
+        if store is None:
+            store = AccountStore()
+
+        #Checking input type
+        if not isinstance(store, AccountStore):
+            raise CustomTypeError(f"Store must be an AccountStore instance, received {type(store)}")
+
+        self.path = path
+        self.store = store
+        self.capacity = max(capacity, len(store.owners), 1)
+        self._owner_offsets = {}
+
+        with open(path, "wb") as file:
+            file.truncate(HEADER.size + self.capacity * RECORD_SIZE)
+
+        self._owners_file = open(path + ".owners", "wb")
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, RECORD_SIZE, self.capacity, store.first_account_number, 0)
+
+        first = store.first_account_number
+        for row, owner in enumerate(store.owners):
+            if owner is not None:
+                self.publish(first + row)
+
+
+    def _owner_offset(self, account_number: int, owner: str) -> int:
+        """
+        Returns the offset of the owner's name in the owners file, appending it on first use.
+        """
+        offset = self._owner_offsets.get(account_number)
+
+        if offset is None:
+            text = owner.encode("utf-8")[:0xFFFF]
+            offset = self._owners_file.tell()
+            self._owners_file.write(OWNER_LENGTH.pack(len(text)) + text)
+            self._owners_file.flush()
+            self._owner_offsets[account_number] = offset
+
+        return offset
+
+
+    def _grow(self, rows: int) -> None:
+        """
+        Enlarges the file so it has room for at least rows records. Readers remap when they
+        find an account beyond their mapping.
+        """
+        capacity = self.capacity
+
+        while capacity < rows:
+            capacity *= 2
+
+        self._map.close()
+        self._file.truncate(HEADER.size + capacity * RECORD_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = capacity
+        COUNT.pack_into(self._map, CAPACITY_OFFSET, capacity)
+
+
+    def publish(self, account_number: int) -> None:
+        """
+        Method that copies the current state of an account from the store into its record.
+        """
+        store = self.store
+        row = store._row(account_number)
+
+        if row >= self.capacity:
+            self._grow(row + 1)
+
+        limit = store.limits[row]
+        body = BODY.pack(account_number, store.balances[row], math.nan if limit == math.inf else limit,
+                         store.banned[row], self._owner_offset(account_number, store.owners[row]))
+
+        offset = HEADER.size + row * RECORD_SIZE
+        (sequence,) = SEQUENCE.unpack_from(self._map, offset)
+
+        # Odd sequence number while the record is being changed
+        SEQUENCE.pack_into(self._map, offset, sequence + 1)
+        self._map[offset + SEQUENCE.size:offset + RECORD_SIZE] = body
+        SEQUENCE.pack_into(self._map, offset, sequence + 2)
+
+        (used,) = COUNT.unpack_from(self._map, USED_OFFSET)
+        if row >= used:
+            COUNT.pack_into(self._map, USED_OFFSET, row + 1)
+
+
+    def open_account(self, owner: str, balance: float | int) -> int:
+        account_number = self.store.open_account(owner, balance)
+        self.publish(account_number)
+        return account_number
+
+
+    def deposit(self, account_number: int, amount: float | int) -> None:
+        self.store.deposit(account_number, amount)
+        self.publish(account_number)
+
+
+    def withdraw(self, account_number: int, amount: float | int) -> None:
+        self.store.withdraw(account_number, amount)
+        self.publish(account_number)
+
+
+    def transfer(self, source_account_number: int, target_account_number: int, amount: float | int) -> None:
+        self.store.transfer(source_account_number, target_account_number, amount)
+        self.publish(source_account_number)
+        self.publish(target_account_number)
+
+
+    def ban_account(self, account_number: int, reason: str) -> None:
+        self.store.ban_account(account_number, reason)
+        self.publish(account_number)
+
+
+    def unban_all(self) -> None:
+        banned = list(self.store.ban_reasons)
+        self.store.unban_all()
+
+        for account_number in banned:
+            self.publish(account_number)
+
+
+    def set_transaction_limit(self, account_number: int, limit: float | int | None) -> None:
+        self.store.set_transaction_limit(account_number, limit)
+        self.publish(account_number)
+
+
+    def close(self) -> None:
+        """
+        Method that flushes the file to disk and closes it.
+        """
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+        self._owners_file.close()
+
+
+    def __enter__(self) -> "MappedBookWriter":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class MappedBookReader:
+    """
+    Class for a read-only view of an account file written by MappedBookWriter.
+    Any number of readers, in any number of processes, can map the same file.
+
+    Instance Variables-
+        path (string): Location of the account file
+        first_account_number (int): Account number stored in record 0
+        retries (int): Number of attempts to read a consistent record before giving up
+    """
+
+    def __init__(self, path: str, retries: int = 100_000):
+        self.path = path
+        self.retries = retries
+        self._file = open(path, "rb")
+        self._owners = open(path + ".owners", "rb")
+        self._map = None
+        self._remap()
+
+        magic, version, record_size, _, first, _ = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            raise CustomValueError(f"{path} is not a version {VERSION} mapped account file")
+
+        self.first_account_number = first
+
+
+    def _remap(self) -> None:
+        """
+        Maps the whole file again, picking up growth done by the writer.
+        """
+        if self._map is not None:
+            self._map.close()
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+    def __len__(self) -> int:
+        """
+        Returns the number of record slots in use, including unallocated account numbers.
+        """
+        return COUNT.unpack_from(self._map, USED_OFFSET)[0]
+
+
+    def _read_body(self, account_number: int) -> tuple:
+        """
+        Returns the record body of an account using the seqlock protocol.
+        """
+        #Checking input type
+        if not isinstance(account_number, int):
+            raise CustomTypeError(f"Account number must be int, received {type(account_number)}")
+
+        row = account_number - self.first_account_number
+
+        if row < 0 or row >= len(self):
+            raise CustomKeyError(f"Account ({account_number}) does not exist")
+
+        offset = HEADER.size + row * RECORD_SIZE
+
+        if offset + RECORD_SIZE > len(self._map):
+            self._remap()
+
+        view = self._map
+
+        for _ in range(self.retries):
+            (before,) = SEQUENCE.unpack_from(view, offset)
+
+            if before & 1:
+                continue
+
+            body = BODY.unpack_from(view, offset + SEQUENCE.size)
+            (after,) = SEQUENCE.unpack_from(view, offset)
+
+            if before == after:
+                if before == 0:
+                    raise CustomKeyError(f"Account ({account_number}) does not exist")
+                return body
+
+        raise CustomOperationError(f"Could not read a consistent record for Account ({account_number})")
+
+
+    def balance(self, account_number: int) -> float:
+        """
+        Method that returns the balance of an account.
+        """
+        return self._read_body(account_number)[1]
+
+
+    def read(self, account_number: int) -> AccountRecord:
+        """
+        Method that returns the full record of an account, including the owner's name.
+        """
+        number, balance, limit, banned, owner_offset = self._read_body(account_number)
+
+        self._owners.seek(owner_offset)
+        (length,) = OWNER_LENGTH.unpack(self._owners.read(OWNER_LENGTH.size))
+        owner = self._owners.read(length).decode("utf-8")
+
+        return AccountRecord(number, owner, balance, None if math.isnan(limit) else limit, banned == 1)
+
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+        self._owners.close()
+
+
+    def __enter__(self) -> "MappedBookReader":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
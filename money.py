@@ -0,0 +1,234 @@
+"""
+Name- Suveer Dhawan
+
+This program adds an exact money mode to the banking system. CentsBankAccount keeps balances,
+transaction limits and the opening bonus as whole numbers of cents (Python ints), so millions of
+postings never build up floating point error. Amounts are still given in dollars and converted
+to cents once, on the way in.
+"""
+
+from bank import BankAccount
+from custom_errors import *
+from results import SUCCESS, Result
+
+
+def to_cents(amount: float | int) -> int:
+    """
+    Function that converts a dollar amount to a whole number of cents, rounding to the nearest cent.
+    """
+    if isinstance(amount, int):
+        return amount * 100
+
+    return round(amount * 100)
+
+
+def format_cents(cents: int) -> str:
+    """
+    Function that formats an amount in cents as dollars with thousands separators, e.g. 104999 -> "1,049.99".
+    """
+    if cents < 0:
+        return "-" + format_cents(-cents)
+
+    dollars, cents = divmod(cents, 100)
+    return f"{dollars:,}.{cents:02d}"
+
+
+class CentsBankAccount(BankAccount):
+    """
+    Class for a bank account that keeps money as whole numbers of cents. Validation and error
+    semantics are the same as BankAccount. balance and transaction_limit are read-only views in dollars.
+
+    Class Variables-
+        bonus_cents (int): Bonus gift for opening account in cents
+
+    Instance Variables-
+        balance_cents (int): non-negative account balance in cents
+        limit_cents (int/None): maximum transaction amount in cents (None if there is no limit)
+    """
+
+    bonus_cents = to_cents(BankAccount.bonus)
+
+    def __init__(self, owner, balance):
+        """
+        Creates a new CentsBankAccount instance.
+
+        Arguments-
+            owner (string): Name of account owner
+            balance (int/float): non-negative starting account balance in dollars
+        """
+        # Checking input types
+        if not isinstance(owner, str):
+            raise CustomTypeError(f"Owner name must be string, received {type(owner)}")
+
+        if not isinstance(balance, (int,float)):
+            raise CustomTypeError(f"Balance amount must be int or float, received {type(balance)}")
+
+        # Checking input values
+        if balance < 0:
+            raise CustomValueError(f"Balance amount must be non-negative, received {balance}")
+
+        self.owner = owner
+        self.balance_cents = to_cents(balance) + self.bonus_cents
+        self.account_number = self._allocate_account_number()
+        self.limit_cents = None
+
+
+    @property
+    def balance(self) -> float:
+        return self.balance_cents / 100
+
+
+    @property
+    def transaction_limit(self) -> float | None:
+        return None if self.limit_cents is None else self.limit_cents / 100
+
+
+    def _deposit_cents(self, amount: float | int) -> int:
+        """
+        Checks a deposit like deposit does and returns its amount in cents, without changing the balance.
+        """
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Deposit amount must be int or float, received {type(amount)}", account_number=self.account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Deposit amount must be greater than 0, received {amount}", account_number=self.account_number, amount=amount)
+
+        #Checking if account is banned
+        if self.account_number in BankAccount.banned_accounts:
+            raise CustomBannedError(f"Deposits restricted to Account ({self.account_number}) as it Banned", account_number=self.account_number, amount=amount)
+
+        # Converting to cents inline, this is the hottest path of the account
+        return amount * 100 if type(amount) is int else round(amount * 100)
+
+
+    def deposit(self, amount: float | int) -> None:
+        self.balance_cents += self._deposit_cents(amount)
+
+
+    def _withdrawal_cents(self, amount: float | int) -> int:
+        """
+        Checks a withdrawal like withdraw does and returns its amount in cents, without changing the balance.
+        """
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Withdrawal amount must be int or float, received {type(amount)}", account_number=self.account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Withdrawal amount must be greater than 0, received {amount}", account_number=self.account_number, amount=amount)
+
+        #Checking if account is banned
+        if self.account_number in BankAccount.banned_accounts:
+            raise CustomBannedError(f"Withdrawal restricted from Account ({self.account_number}) as it Banned", account_number=self.account_number, amount=amount)
+
+        cents = amount * 100 if type(amount) is int else round(amount * 100)
+
+        #Checking sufficient balance
+        if cents > self.balance_cents:
+            raise CustomInsufficientFundsError(f"Insufficient funds in Account ({self.account_number}) for withdrawal", account_number=self.account_number, amount=amount)
+
+        #Checking transaction limits
+        if self.limit_cents is not None and cents > self.limit_cents:
+            raise CustomLimitError(f"Withdrawal amount ${amount} exceeds maximum transaction limit ${format_cents(self.limit_cents)}", account_number=self.account_number, amount=amount, limit=self.transaction_limit)
+
+        return cents
+
+
+    def withdraw(self, amount: float | int) -> None:
+        self.balance_cents -= self._withdrawal_cents(amount)
+
+
+    def _transfer_cents(self, target_account: "CentsBankAccount", amount: float | int) -> int:
+        """
+        Checks a transfer like transfer_to does and returns its amount in cents, without changing either balance.
+        """
+        #Checking input type
+        if not isinstance(target_account, CentsBankAccount):
+            raise CustomTypeError("Target must be a CentsBankAccount instance", account_number=self.account_number, amount=amount)
+
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Transfer amount must be int or float, received {type(amount)}", account_number=self.account_number, amount=amount)
+
+        #Ensuring that target_account is different form sending account
+        if self is target_account:
+            raise CustomValueError("Sender and receiver accounts must be different", account_number=self.account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Transfer amount must be greater than 0, received {amount}", account_number=self.account_number, amount=amount)
+
+        #Checking if either account is banned
+        if self.is_banned():
+            raise CustomBannedError(f"Transfer restricted from Account ({self.account_number}) as it Banned", account_number=self.account_number, amount=amount)
+
+        if target_account.is_banned():
+            raise CustomBannedError(f"Transfer restricted to Account ({target_account.account_number}) as it Banned", account_number=target_account.account_number, amount=amount)
+
+        cents = to_cents(amount)
+
+        #Checking sufficient balance
+        if cents > self.balance_cents:
+            raise CustomInsufficientFundsError(f"Transfer cannot be completed as insufficient funds in Account ({self.account_number})", account_number=self.account_number, amount=amount)
+
+        #Checking transaction limits
+        if self.limit_cents is not None and cents > self.limit_cents:
+            raise CustomLimitError(f"Trasfer amount ${amount} exceeds maximum transaction limit ${format_cents(self.limit_cents)}", account_number=self.account_number, amount=amount, limit=self.transaction_limit)
+
+        return cents
+
+
+    def transfer_to(self, target_account: "CentsBankAccount", amount: float | int) -> None:
+        cents = self._transfer_cents(target_account, amount)
+        self.balance_cents -= cents
+        target_account.balance_cents += cents
+
+
+    def try_withdraw(self, amount: float | int) -> Result:
+        """
+        Method that withdraws like withdraw, but returns a Result instead of raising when the withdrawal is rejected.
+        withdraw does every check in cents, so both accept the same amounts.
+        """
+        try:
+            self.withdraw(amount)
+
+        except CustomError as error:
+            return Result.from_error(error)
+
+        return SUCCESS
+
+
+    def try_transfer_to(self, target_account: "CentsBankAccount", amount: float | int) -> Result:
+        """
+        Method that transfers like transfer_to, but returns a Result instead of raising when the transfer is rejected.
+        transfer_to does every check in cents, so both accept the same amounts.
+        """
+        try:
+            self.transfer_to(target_account, amount)
+
+        except CustomError as error:
+            return Result.from_error(error)
+
+        return SUCCESS
+
+
+    def set_transaction_limit(self, limit: float | int | None) -> None:
+        #Checking input type
+        if limit is not None and not isinstance(limit, (int,float)):
+            raise CustomTypeError(f"Transaction limit must be a number, received {type(limit)}")
+
+        if limit is not None and limit < 0:
+            raise CustomValueError(f"Transaction limit must be non-negative, received {limit}")
+
+        self.limit_cents = None if limit is None else to_cents(limit)
+
+
+    def __str__(self) -> str:
+        limit = "N/A" if self.limit_cents is None else format_cents(self.limit_cents)
+
+        if self.is_banned():
+            return f"{self.owner}'s account ({self.account_number}): Balance=${format_cents(self.balance_cents)} | Limit=${limit} | Banned=Yes | Ban Reason: {BankAccount.banned_accounts[self.account_number]}"
+
+        else:
+            return f"{self.owner}'s account ({self.account_number}): Balance=${format_cents(self.balance_cents)} | Limit=${limit} | Banned=No"
@@ -0,0 +1,280 @@
+"""
+Name- Suveer Dhawan
+
+This program streams bank operation requests from a JSONL file, applies them to BankAccount
+instances and writes one JSONL result per request. Lines are read and parsed in chunks through a
+generator pipeline, so memory use does not grow with the size of the file, and parsing can be
+spread over a pool of processes so JSON decoding does not limit throughput.
+
+Request format (one JSON object per line, "id" is optional and copied to the result)-
+    {"op": "open", "owner": "Tom Cruise", "balance": 1000}
+    {"op": "deposit", "account": 1045, "amount": 10}
+    {"op": "withdraw", "account": 1045, "amount": 10}
+    {"op": "transfer", "account": 1045, "target": 1046, "amount": 10}
+    {"op": "ban", "account": 1045, "reason": "Fraud"}
+    {"op": "set_limit", "account": 1045, "limit": 500}
+
+Usage-
+    python request_processor.py requests.jsonl -o results.jsonl [--workers 4] [--chunk-lines 10000]
+"""
+
+import argparse
+import json
+import sys
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+from bank import BankAccount
+from custom_errors import *
+
+
+def read_chunks(file, chunk_lines: int = 10_000):
+    """
+    Generator that yields (first line number, lines) chunks of at most chunk_lines lines from file.
+    """
+    chunk = []
+    first = 1
+
+    for number, line in enumerate(file, 1):
+        chunk.append(line)
+
+        if len(chunk) == chunk_lines:
+            yield first, chunk
+            chunk = []
+            first = number + 1
+
+    if chunk:
+        yield first, chunk
+
+
+def parse_chunk(first: int, lines: list) -> list:
+    """
+    Function that decodes a chunk of lines. Returns (line number, request, error) for every
+    non-blank line, where exactly one of request and error is None. Runs in pool processes.
+    """
+    parsed = []
+    decode = json.JSONDecoder().decode
+
+    for number, line in enumerate(lines, first):
+        if not line.strip():
+            continue
+
+        try:
+            request = decode(line)
+
+        except ValueError as error:
+            parsed.append((number, None, ("CustomValueError", f"Line is not valid JSON: {error}")))
+            continue
+
+        if not isinstance(request, dict):
+            parsed.append((number, None, ("CustomTypeError", f"Request must be a JSON object, received {type(request).__name__}")))
+
+        else:
+            parsed.append((number, request, None))
+
+    return parsed
+
+
+def parse_stream(file, chunk_lines: int = 10_000, workers: int = 1):
+    """
+    Generator that yields the parsed (line number, request, error) entries of file in order.
+    With more than one worker, chunks are parsed in a process pool with at most two chunks
+    per worker in flight, so memory stays bounded however large the file is. Parsed requests are
+    pickled back to this process, so the pool only pays off for large requests that are cheap to apply.
+    """
+    chunks = read_chunks(file, chunk_lines)
+
+    if workers <= 1:
+        for first, lines in chunks:
+            yield from parse_chunk(first, lines)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+
+        for first, lines in chunks:
+            pending.append(pool.submit(parse_chunk, first, lines))
+
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+
+class RequestProcessor:
+    """
+    Class that applies parsed requests to bank accounts and builds their results.
+
+    Instance Variables-
+        account_class (type): BankAccount class (or subclass) used to open accounts
+        accounts (dict): Accounts opened by this processor, by account number
+        processed (int): Number of requests applied
+        failed (int): Number of requests that were rejected
+    """
+
+    def __init__(self, account_class: type = BankAccount):
+        #Checking input type
+        if not isinstance(account_class, type) or not issubclass(account_class, BankAccount):
+            raise CustomTypeError(f"Account class must be BankAccount or a subclass, received {account_class}")
+
+        self.account_class = account_class
+        self.accounts = {}
+        self.processed = 0
+        self.failed = 0
+        self._operations = {
+            "open": self._open,
+            "deposit": self._deposit,
+            "withdraw": self._withdraw,
+            "transfer": self._transfer,
+            "ban": self._ban,
+            "set_limit": self._set_limit,
+        }
+
+
+    def _account(self, request: dict, field: str = "account") -> BankAccount:
+        """
+        Returns the account whose number is in request[field].
+        """
+        account_number = request.get(field)
+        account = self.accounts.get(account_number) if isinstance(account_number, int) else None
+
+        if account is None:
+            raise CustomKeyError(f"Account ({account_number}) does not exist")
+
+        return account
+
+
+    def _open(self, request: dict) -> BankAccount:
+        account = self.account_class(request.get("owner"), request.get("balance"))
+        self.accounts[account.account_number] = account
+        return account
+
+
+    def _deposit(self, request: dict) -> BankAccount:
+        account = self._account(request)
+        account.deposit(request.get("amount"))
+        return account
+
+
+    def _withdraw(self, request: dict) -> BankAccount:
+        account = self._account(request)
+        account.withdraw(request.get("amount"))
+        return account
+
+
+    def _transfer(self, request: dict) -> BankAccount:
+        account = self._account(request)
+        account.transfer_to(self._account(request, "target"), request.get("amount"))
+        return account
+
+
+    def _ban(self, request: dict) -> BankAccount:
+        account = self._account(request)
+        account.ban_account(request.get("reason"))
+        return account
+
+
+    def _set_limit(self, request: dict) -> BankAccount:
+        account = self._account(request)
+        account.set_transaction_limit(request.get("limit"))
+        return account
+
+
+    def apply(self, line: int, request: dict | None, error: tuple | None = None) -> dict:
+        """
+        Method that applies one parsed request and returns its result. A request that could not be
+        parsed (error is not None) or that raises a custom error gets an error result instead.
+        """
+        result = {"line": line}
+
+        if request is not None and "id" in request:
+            result["id"] = request["id"]
+
+        if error is None:
+            op = request.get("op")
+            operation = self._operations.get(op) if isinstance(op, str) else None
+
+            try:
+                if operation is None:
+                    raise CustomValueError(f"Unknown operation {op!r}")
+
+                account = operation(request)
+
+            except CustomError as exception:
+                error = (type(exception).__name__, str(exception))
+
+            else:
+                result.update(ok=True, account=account.account_number, balance=account.balance)
+
+        self.processed += 1
+
+        if error is not None:
+            self.failed += 1
+            result.update(ok=False, error=error[0], message=error[1])
+
+        return result
+
+
+    def process(self, entries):
+        """
+        Generator that applies every (line number, request, error) entry in order and yields the results.
+        """
+        apply = self.apply
+
+        for line, request, error in entries:
+            yield apply(line, request, error)
+
+
+def process_file(input_path: str, output, chunk_lines: int = 10_000, workers: int = 1,
+                 processor: RequestProcessor | None = None) -> RequestProcessor:
+    """
+    Function that processes the requests in input_path and writes their results to output, a file
+    path or an open text file (such as sys.stdout, which is left open). Returns the processor, which
+    holds the accounts and request counts.
+    """
+    if processor is None:
+        processor = RequestProcessor()
+
+    output_file = nullcontext(output) if hasattr(output, "write") else open(output, "w", encoding="utf-8")
+
+    with open(input_path, encoding="utf-8") as source, output_file as target:
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        buffer = []
+
+        for result in processor.process(parse_stream(source, chunk_lines, workers)):
+            buffer.append(encode(result))
+
+            if len(buffer) >= chunk_lines:
+                buffer.append("")
+                target.write("\n".join(buffer))
+                buffer = []
+
+        if buffer:
+            buffer.append("")
+            target.write("\n".join(buffer))
+
+    return processor
+
+
+def main(arguments: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply a JSONL file of bank requests and write JSONL results.")
+    parser.add_argument("input", help="JSONL file of requests")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for results (default: standard output)")
+    parser.add_argument("--workers", type=int, default=1, help="processes used to parse requests (default: 1)")
+    parser.add_argument("--chunk-lines", type=int, default=10_000, help="lines per parsing chunk (default: 10000)")
+    options = parser.parse_args(arguments)
+
+    if options.chunk_lines < 1 or options.workers < 1:
+        parser.error("--workers and --chunk-lines must be at least 1")
+
+    output = sys.stdout if options.output == "-" else options.output
+    processor = process_file(options.input, output, options.chunk_lines, options.workers)
+
+    print(f"Processed {processor.processed:,} requests, {processor.failed:,} failed", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
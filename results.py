@@ -0,0 +1,144 @@
+"""
+Name- Suveer Dhawan
+
+This program creates Status, the result codes shared by the batch engine and the try_ methods of
+BankAccount, and class Result, the outcome of an account operation that returns instead of raising.
+A rejected Result keeps the account number, amount and limit involved and a message template, and
+only formats the message when its detail is read, so rejecting an operation costs no more than
+creating one small object.
+"""
+
+from enum import IntEnum
+
+from custom_errors import *
+
+class Status(IntEnum):
+    """
+    Result code of an account operation.
+    """
+    OK = 0
+    INVALID_TYPE = 1
+    INVALID_VALUE = 2
+    UNKNOWN_ACCOUNT = 3
+    BANNED = 4
+    INSUFFICIENT_FUNDS = 5
+    LIMIT_EXCEEDED = 6
+    INVALID_KIND = 7
+    NOT_ALLOWED = 8
+    CONFLICT = 9
+    INVALID_ATTRIBUTE = 10
+    ERROR = 11
+
+
+# Error raised for each rejecting status
+STATUS_ERRORS = {
+    Status.INVALID_TYPE: CustomTypeError,
+    Status.INVALID_VALUE: CustomValueError,
+    Status.UNKNOWN_ACCOUNT: CustomKeyError,
+    Status.BANNED: CustomBannedError,
+    Status.INSUFFICIENT_FUNDS: CustomInsufficientFundsError,
+    Status.LIMIT_EXCEEDED: CustomLimitError,
+    Status.INVALID_KIND: CustomValueError,
+    Status.NOT_ALLOWED: CustomOperationError,
+    Status.CONFLICT: CustomConflictError,
+    Status.INVALID_ATTRIBUTE: CustomAttributeError,
+    Status.ERROR: CustomError,
+}
+
+# Status of each error, subclasses before their bases so CustomBannedError is not taken for a CustomOperationError
+# and CustomError only matches errors of no other class
+ERROR_STATUSES = (
+    (CustomInsufficientFundsError, Status.INSUFFICIENT_FUNDS),
+    (CustomTypeError, Status.INVALID_TYPE),
+    (CustomValueError, Status.INVALID_VALUE),
+    (CustomKeyError, Status.UNKNOWN_ACCOUNT),
+    (CustomBannedError, Status.BANNED),
+    (CustomOperationError, Status.NOT_ALLOWED),
+    (CustomLimitError, Status.LIMIT_EXCEEDED),
+    (CustomConflictError, Status.CONFLICT),
+    (CustomAttributeError, Status.INVALID_ATTRIBUTE),
+    (CustomError, Status.ERROR),
+)
+
+
+class Result:
+    """
+    Class for the outcome of an account operation. A Result is true when the operation succeeded.
+
+    Instance Variables-
+        status (Status): Result code
+        account_number (int): Account the operation was rejected for (None when it does not apply)
+        amount (int/float): Amount of the operation (None when it does not apply)
+        limit (int/float): Limit the amount exceeded (None when it does not apply)
+    """
+
+    __slots__ = ("status", "account_number", "amount", "limit", "_template")
+
+    def __init__(self, status: Status, template: str = "", account_number: int | None = None, amount=None, limit: float | int | None = None):
+        """
+        Creates a new Result. template is formatted with account_number, amount, limit and
+        amount_type (the type of amount) when the detail is read.
+        """
+        self.status = status
+        self.account_number = account_number
+        self.amount = amount
+        self.limit = limit
+        self._template = template
+
+
+    @classmethod
+    def from_error(cls, error: CustomError) -> "Result":
+        """
+        Class method that returns the Result of an operation that raised error.
+        """
+        for error_class, status in ERROR_STATUSES:
+            if isinstance(error, error_class):
+                break
+
+        else:
+            raise CustomTypeError(f"No status for {type(error).__name__}, errors must be CustomError instances")
+
+        # Escaping braces so the message is not formatted again
+        template = str(error).replace("{", "{{").replace("}", "}}")
+        return cls(status, template, error.account_number, error.amount, error.limit)
+
+
+    def __bool__(self) -> bool:
+        return self.status is Status.OK
+
+
+    @property
+    def detail(self) -> str:
+        """
+        Message describing the outcome, formatted on every read.
+        """
+        return self._template.format(account_number=self.account_number, amount=self.amount, limit=self.limit, amount_type=type(self.amount))
+
+
+    def error(self) -> CustomError | None:
+        """
+        Method that returns the error the raising operation would have raised (None when the operation succeeded).
+        """
+        if self.status is Status.OK:
+            return None
+
+        return STATUS_ERRORS[self.status](self.detail, account_number=self.account_number, amount=self.amount, limit=self.limit)
+
+
+    def raise_for_status(self) -> None:
+        """
+        Method that raises the error of a rejected operation.
+        """
+        if self.status is not Status.OK:
+            raise self.error()
+
+
+    def __repr__(self) -> str:
+        if self.status is Status.OK:
+            return "Result(OK)"
+
+        return f"Result({self.status.name}, {self.detail!r})"
+
+
+# Shared Result of every successful operation
+SUCCESS = Result(Status.OK)
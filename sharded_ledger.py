@@ -0,0 +1,580 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class ShardedLedger, an account book split over worker processes so mutations
+are not limited to one interpreter. Account number n is owned by shard (n - first_account_number) % shards,
+and every shard keeps only the accounts it owns, in its own columns. Operations are sent in batches: the
+ledger routes each operation once, to the shard that owns its account, and every shard applies its
+operations in batch order. The ledger follows the openings and bans of the whole book itself, so it
+hands out account numbers and knows whether the target of a transfer can receive money.
+A transfer between two shards uses two phases. In the first, the source shard runs every check (with
+the target's result from the ledger) and takes the money only if the transfer goes through. In the
+second, it tells the target shard whether to credit the money, and the target shard waits for that
+answer at the transfer's place in its own operations, so later operations on the target see the
+money exactly as in a single store.
+
+Operations (tuples)-
+    ("open", owner, balance), ("deposit", account_number, amount), ("withdraw", account_number, amount),
+    ("transfer", source_account_number, target_account_number, amount), ("ban", account_number, reason),
+    ("set_limit", account_number, limit), ("balance", account_number), ("unban_all",)
+"""
+
+import multiprocessing
+import pickle
+from array import array
+
+from account_store import AccountStore
+from custom_errors import *
+
+# A transfer between shards is rejected with a (stage, error) vote. stage orders the checks like
+# AccountStore.transfer does, so the reported error is the one a single store would raise:
+# 0 amount, 1 source account, 2 target account, 3 source ban, 4 target ban, 5 funds and limit
+
+# Number of answers to one target shard that are sent together
+ANSWER_BATCH = 512
+
+
+class _ShardStore(AccountStore):
+    """
+    Class for the AccountStore of one shard. It holds only the accounts the shard owns: account
+    number n is kept in row (n - first_account_number) // shards, so the columns grow with the
+    shard's own accounts instead of the whole book.
+    """
+
+    def __init__(self, shard: int, shards: int, first_account_number: int):
+        super().__init__(first_account_number)
+        self.shard = shard
+        self.shards = shards
+
+
+    def open_at(self, account_number: int, owner: str, balance: float | int) -> None:
+        """
+        Opens an account with a number handed out by the ledger, which has already checked the opening.
+        """
+        row = (account_number - self.first_account_number) // self.shards
+
+        self._grow_to(self.first_account_number + row + 1)
+        self.owners[row] = owner
+        self.balances[row] = balance + self.bonus
+        self._count += 1
+
+
+    def _row(self, account_number: int) -> int:
+        """
+        Returns the row index of an existing account of this shard.
+        """
+        #Checking input type
+        if not isinstance(account_number, int):
+            raise CustomTypeError(f"Account number must be int, received {type(account_number)}")
+
+        row, shard = divmod(account_number - self.first_account_number, self.shards)
+
+        if row < 0 or shard != self.shard or row >= len(self.owners) or self.owners[row] is None:
+            raise CustomKeyError(f"Account ({account_number}) does not exist", account_number=account_number)
+
+        return row
+
+
+    # The rows of a shard are not account number offsets, so there is no cheaper lookup
+    _fast_row = _row
+
+
+    def __contains__(self, account_number) -> bool:
+        try:
+            self._row(account_number)
+            return True
+
+        except (CustomTypeError, CustomKeyError):
+            return False
+
+
+    def __iter__(self):
+        for row, owner in enumerate(self.owners):
+            if owner is not None:
+                yield self[self.first_account_number + row * self.shards + self.shard]
+
+
+class _Shard:
+    """
+    Class for the state of one shard, living in its worker process.
+    """
+
+    def __init__(self, shard: int, inboxes: list, store: _ShardStore):
+        self.shard = shard
+        self.store = store
+        # Queue of answers sent to each shard, this shard reads its own
+        self.inboxes = inboxes
+        self._outboxes = [[] for _ in inboxes]
+        self._answers = {}
+
+
+    def _send_answers(self) -> None:
+        for shard, answers in enumerate(self._outboxes):
+            if answers:
+                self.inboxes[shard].put(answers)
+                self._outboxes[shard] = []
+
+
+    def _wait_for_answers(self) -> None:
+        """
+        Sends the answers this shard owes, then waits for answers from other shards.
+        """
+        # The shard being waited for may itself be waiting for one of this shard's answers
+        self._send_answers()
+        inbox = self.inboxes[self.shard]
+        self._answers.update(inbox.get())
+
+        while not inbox.empty():
+            self._answers.update(inbox.get())
+
+
+    def _debit(self, source_account_number: int, amount: float | int, target_vote: tuple | None) -> tuple | None:
+        """
+        First phase on the source shard. Runs the checks of AccountStore.transfer on the source, in
+        order with the target's vote from the ledger, and takes the amount from the source balance
+        if they all pass. Returns None when the amount is taken, else the rejecting vote.
+        """
+        store = self.store
+
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            return (0, CustomTypeError(f"Transfer amount must be int or float, received {type(amount)}", account_number=source_account_number, amount=amount))
+
+        #Checking input values
+        if amount < 0:
+            return (0, CustomValueError(f"Transfer amount must be greater than 0, received {amount}", account_number=source_account_number, amount=amount))
+
+        try:
+            row = store._row(source_account_number)
+
+        except (CustomTypeError, CustomKeyError) as error:
+            error.account_number, error.amount = source_account_number, amount
+            return (1, error)
+
+        if target_vote is not None and target_vote[0] == 2:
+            return target_vote
+
+        #Checking if account is banned
+        if store.banned[row]:
+            return (3, CustomBannedError(f"Transfer restricted from Account ({source_account_number}) as it Banned", account_number=source_account_number, amount=amount))
+
+        if target_vote is not None:
+            return target_vote
+
+        #Checking sufficient balance
+        if amount > store.balances[row]:
+            return (5, CustomInsufficientFundsError(f"Transfer cannot be completed as insufficient funds in Account ({source_account_number})", account_number=source_account_number, amount=amount))
+
+        #Checking transaction limits
+        if amount > store.limits[row]:
+            return (5, CustomLimitError(f"Trasfer amount ${amount} exceeds maximum transaction limit ${store.limits[row]}",
+                                        account_number=source_account_number, amount=amount, limit=store.limits[row]))
+
+        store.balances[row] -= amount
+        return None
+
+
+    def run_batch(self, indices: array, operations: list) -> dict:
+        """
+        Applies the operations routed to this shard, with their indices in the batch. Returns the
+        outcome of every operation that has a result or an error, keyed by its index.
+        """
+        outcomes = {}
+        deferred = self._apply(zip(indices, operations), outcomes)
+
+        while deferred:
+            self._wait_for_answers()
+            deferred = self._apply(deferred, outcomes)
+
+        self._send_answers()
+        return outcomes
+
+
+    def _apply(self, operations, outcomes: dict) -> list:
+        """
+        Applies (index, operation) pairs in order and returns the pairs that have to wait. A credit
+        waits for the answer of its source shard, and every later operation on an account that is
+        waiting waits behind it, so each account still sees its operations in batch order while
+        the operations on other accounts go ahead.
+        """
+        store = self.store
+        outboxes = self._outboxes
+        answers = self._answers
+        deferred = []
+        # Accounts with an operation that has to wait, and whether everything left has to wait
+        blocked = set()
+        barrier = False
+
+        for entry in operations:
+            index, operation = entry
+            name = operation[0]
+
+            if blocked:
+                try:
+                    waits = (barrier or name == "unban_all" or operation[1] in blocked
+                             or (name == "transfer" and operation[2] in blocked))
+
+                # An account number that can not be hashed is rejected whatever the order
+                except TypeError:
+                    waits = False
+
+                if waits:
+                    deferred.append(entry)
+
+                    if name == "unban_all":
+                        barrier = True
+
+                    elif name == "transfer":
+                        blocked.update(operation[1:3])
+
+                    else:
+                        blocked.add(operation[1])
+
+                    continue
+
+            if name == "credit":
+                if index not in answers:
+                    deferred.append(entry)
+                    blocked.add(operation[1])
+                    continue
+
+                if answers.pop(index):
+                    store.balances[store._row(operation[1])] += operation[2]
+
+                continue
+
+            try:
+                if name == "deposit":
+                    store.deposit(operation[1], operation[2])
+
+                elif name == "withdraw":
+                    store.withdraw(operation[1], operation[2])
+
+                elif name == "transfer":
+                    _, source, target, amount = operation
+                    store.transfer(source, target, amount)
+
+                elif name == "debit":
+                    _, source, amount, target_shard, target_vote = operation
+                    vote = self._debit(source, amount, target_vote)
+
+                    if vote is not None:
+                        outcomes[index] = vote[1]
+
+                    # The target shard only waits for an answer when the ledger accepted the target
+                    if target_vote is None:
+                        shard_answers = outboxes[target_shard]
+                        shard_answers.append((index, vote is None))
+
+                        if len(shard_answers) >= ANSWER_BATCH:
+                            self._send_answers()
+
+                elif name == "balance":
+                    outcomes[index] = store.balances[store._row(operation[1])]
+
+                elif name == "set_limit":
+                    store.set_transaction_limit(operation[1], operation[2])
+
+                elif name == "ban":
+                    store.ban_account(operation[1], operation[2])
+
+                elif name == "unban_all":
+                    store.unban_all()
+
+                else:
+                    store.open_at(operation[1], operation[2], operation[3])
+
+            except (AssertionError, CustomError) as error:
+                outcomes[index] = error
+
+            except (IndexError, TypeError, ValueError):
+                outcomes[index] = CustomValueError(f"Malformed operation {operation!r}")
+
+        return deferred
+
+
+def _serve(connection, shard: int, shards: int, first_account_number: int, inboxes: list) -> None:
+    """
+    Main loop of a shard worker process.
+    """
+    state = _Shard(shard, inboxes, _ShardStore(shard, shards, first_account_number))
+
+    while True:
+        message = connection.recv()
+
+        if message is None:
+            break
+
+        connection.send(state.run_batch(*message))
+
+    connection.close()
+
+
+class ShardedLedger:
+    """
+    Class for an account book partitioned by account number over worker processes.
+    Validation and error semantics match AccountStore, and a batch gives the same results and
+    balances as applying its operations to one AccountStore in order.
+
+    Instance Variables-
+        shards (int): Number of worker processes
+        first_account_number (int): Account number given to the first opened account
+        next_account_number (int): Account number that will be given to the next opened account
+    """
+
+    def __init__(self, shards: int = 4, first_account_number: int = 1045):
+        #Checking input type
+        if not isinstance(shards, int):
+            raise CustomTypeError(f"Number of shards must be int, received {type(shards)}")
+
+        #Checking input values
+        if shards < 1:
+            raise CustomValueError(f"Number of shards must be at least 1, received {shards}")
+
+        if first_account_number < 1045:
+            raise CustomValueError(f"Account numbers start from 1045, received {first_account_number}")
+
+        self.shards = shards
+        self.first_account_number = first_account_number
+        self.next_account_number = first_account_number
+        # Banned accounts of the whole book
+        self._banned = set()
+        self._inboxes = [multiprocessing.Queue() for _ in range(shards)]
+        self._connections = []
+        self._processes = []
+
+        for shard in range(shards):
+            connection, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve, args=(child, shard, shards, first_account_number, self._inboxes), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+
+    def _owner(self, account_number) -> int:
+        # Account numbers that are not int are reported by shard 0
+        return (account_number - self.first_account_number) % self.shards if isinstance(account_number, int) else 0
+
+
+    def _exists(self, account_number) -> bool:
+        """
+        Returns whether account_number has been opened in the book, on any shard.
+        """
+        return isinstance(account_number, int) and self.first_account_number <= account_number < self.next_account_number
+
+
+    def _open(self, owner: str, balance: float | int) -> int:
+        """
+        Checks an opening like AccountStore.open_account and returns the account number it gets.
+        """
+        # Checking input types
+        if not isinstance(owner, str):
+            raise CustomTypeError(f"Owner name must be string, received {type(owner)}")
+
+        if not isinstance(balance, (int,float)):
+            raise CustomTypeError(f"Balance amount must be int or float, received {type(balance)}")
+
+        # Checking input values
+        if balance < 0:
+            raise CustomValueError(f"Balance amount must be non-negative, received {balance}")
+
+        # Adding the bonus here, so an int too large for a float raises before a number is handed out
+        balance + AccountStore.bonus
+
+        account_number = self.next_account_number
+        self.next_account_number += 1
+        return account_number
+
+
+    def _ban(self, account_number, reason) -> None:
+        """
+        Checks a ban like AccountStore.ban_account and adds it to the book's bans.
+        """
+        # Checking input types
+        if not isinstance(reason, str):
+            raise CustomTypeError(f"Reason to ban account must be string, received {type(reason)}")
+
+        if not isinstance(account_number, int):
+            raise CustomTypeError(f"Account number must be int, received {type(account_number)}")
+
+        if not self._exists(account_number):
+            raise CustomKeyError(f"Account ({account_number}) does not exist", account_number=account_number)
+
+        if account_number in self._banned:
+            raise CustomOperationError("The account has already been banned")
+
+        self._banned.add(account_number)
+
+
+    def _target_vote(self, target_account_number, amount: float | int) -> tuple | None:
+        """
+        Checks the target of a transfer between shards against the book's openings and bans, with
+        the errors AccountStore._row would raise. Returns None if it can receive the transfer.
+        """
+        if not isinstance(target_account_number, int):
+            return (2, CustomTypeError(f"Account number must be int, received {type(target_account_number)}", account_number=target_account_number, amount=amount))
+
+        if not self._exists(target_account_number):
+            return (2, CustomKeyError(f"Account ({target_account_number}) does not exist", account_number=target_account_number, amount=amount))
+
+        #Checking if account is banned
+        if target_account_number in self._banned:
+            return (4, CustomBannedError(f"Transfer restricted to Account ({target_account_number}) as it Banned", account_number=target_account_number, amount=amount))
+
+        return None
+
+
+    def execute(self, operations: list) -> list:
+        """
+        Method that applies a batch of operations. Returns one entry per operation: the new
+        account number for an opening, the balance for a balance query, the raised custom
+        error for a rejected operation, and None otherwise.
+        """
+        if not self._connections:
+            raise CustomOperationError("Sharded ledger is closed")
+
+        owner = self._owner
+        first = self.first_account_number
+        shards = self.shards
+        results = [None] * len(operations)
+        # Operations for each shard and their indices in the batch, sent as two columns as that pickles faster
+        routed = [[] for _ in self._connections]
+        routed_indices = [array("q") for _ in self._connections]
+
+        for index, operation in enumerate(operations):
+            try:
+                name = operation[0]
+
+                if name == "transfer":
+                    _, source, target, amount = operation
+                    # Same as _owner, inlined for the most common operation
+                    source_shard = (source - first) % shards if isinstance(source, int) else 0
+                    target_shard = (target - first) % shards if isinstance(target, int) else 0
+
+                    if source_shard == target_shard:
+                        routed[source_shard].append(operation)
+                        routed_indices[source_shard].append(index)
+
+                    else:
+                        target_vote = self._target_vote(target, amount)
+                        routed[source_shard].append(("debit", source, amount, target_shard, target_vote))
+                        routed_indices[source_shard].append(index)
+
+                        if target_vote is None:
+                            routed[target_shard].append(("credit", target, amount))
+                            routed_indices[target_shard].append(index)
+
+                elif name == "deposit" or name == "withdraw" or name == "balance" or name == "set_limit":
+                    shard = owner(operation[1])
+                    routed[shard].append(operation)
+                    routed_indices[shard].append(index)
+
+                elif name == "open":
+                    _, account_owner, balance = operation
+                    account_number = self._open(account_owner, balance)
+                    shard = owner(account_number)
+                    routed[shard].append(("open", account_number, account_owner, balance))
+                    routed_indices[shard].append(index)
+                    results[index] = account_number
+
+                elif name == "ban":
+                    _, account_number, reason = operation
+                    self._ban(account_number, reason)
+                    shard = owner(account_number)
+                    routed[shard].append(operation)
+                    routed_indices[shard].append(index)
+
+                elif name == "unban_all":
+                    self._banned.clear()
+
+                    for shard, shard_operations in enumerate(routed):
+                        shard_operations.append(operation)
+                        routed_indices[shard].append(index)
+
+                else:
+                    raise CustomValueError(f"Unknown operation {name!r}")
+
+            except CustomError as error:
+                results[index] = error
+
+            except (IndexError, TypeError, ValueError):
+                results[index] = CustomValueError(f"Malformed operation {operation!r}")
+
+        busy = [shard for shard, shard_operations in enumerate(routed) if shard_operations]
+
+        for shard in busy:
+            self._connections[shard].send_bytes(pickle.dumps((routed_indices[shard], routed[shard]), pickle.HIGHEST_PROTOCOL))
+
+        for shard in busy:
+            for index, outcome in self._connections[shard].recv().items():
+                results[index] = outcome
+
+        return results
+
+
+    def _execute_one(self, operation: tuple):
+        (result,) = self.execute([operation])
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+
+    def open_account(self, owner: str, balance: float | int) -> int:
+        return self._execute_one(("open", owner, balance))
+
+
+    def deposit(self, account_number: int, amount: float | int) -> None:
+        self._execute_one(("deposit", account_number, amount))
+
+
+    def withdraw(self, account_number: int, amount: float | int) -> None:
+        self._execute_one(("withdraw", account_number, amount))
+
+
+    def transfer(self, source_account_number: int, target_account_number: int, amount: float | int) -> None:
+        self._execute_one(("transfer", source_account_number, target_account_number, amount))
+
+
+    def ban_account(self, account_number: int, reason: str) -> None:
+        self._execute_one(("ban", account_number, reason))
+
+
+    def set_transaction_limit(self, account_number: int, limit: float | int | None) -> None:
+        self._execute_one(("set_limit", account_number, limit))
+
+
+    def balance(self, account_number: int) -> float:
+        return self._execute_one(("balance", account_number))
+
+
+    def unban_all(self) -> None:
+        self._execute_one(("unban_all",))
+
+
+    def close(self) -> None:
+        """
+        Method that stops every shard worker process.
+        """
+        for connection in self._connections:
+            connection.send(None)
+            connection.close()
+
+        for process in self._processes:
+            process.join()
+
+        for inbox in self._inboxes:
+            inbox.close()
+
+        self._connections = []
+        self._processes = []
+
+
+    def __enter__(self) -> "ShardedLedger":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,246 @@
+"""
+Name- Suveer Dhawan
+
+This program writes and loads compact snapshots of an AccountStore, and recovers a store after a
+restart by loading the latest snapshot and replaying only the transaction log records written after it.
+Loading copies the columns straight out of a memory-mapped file, so no BankAccount constructor runs.
+"""
+
+import math
+import mmap
+import os
+import struct
+from array import array
+from itertools import accumulate
+
+import transaction_log
+from account_store import AccountStore
+from custom_errors import *
+
+# Header: magic, format version, first account number, next account number, rows, lsn, number of bans
+HEADER = struct.Struct("<8sIqqqqq")
+MAGIC = b"BANKSNAP"
+VERSION = 1
+
+
+def _padding(size: int) -> bytes:
+    """
+    Returns the zero bytes needed after size bytes to keep the next section 8 byte aligned.
+    """
+    return bytes(-size % 8)
+
+
+def write_snapshot(path: str, store: AccountStore, lsn: int = 0) -> None:
+    """
+    Function that writes a snapshot of store to path. lsn is the log sequence number the snapshot
+    is consistent with. The file is written next to path and renamed over it, so a crash never
+    leaves a half written snapshot behind.
+
+    Layout (all sections 8 byte aligned)-
+        header, balances (float64 per row), limits (float64 per row), ban flags (byte per row),
+        owner lengths (int32 per row, -1 for unallocated rows), banned account numbers (int64 per ban),
+        ban reason lengths (int32 per ban), owner text, ban reason text
+    """
+    #Checking input type
+    if not isinstance(store, AccountStore):
+        raise CustomTypeError(f"Store must be an AccountStore instance, received {type(store)}")
+
+    rows = len(store.owners)
+    owners_text = "".join(owner for owner in store.owners if owner is not None)
+    owner_lengths = array("i", (-1 if owner is None else len(owner) for owner in store.owners))
+    ban_numbers = array("q", store.ban_reasons.keys())
+    ban_lengths = array("i", (len(reason) for reason in store.ban_reasons.values()))
+    reasons_text = "".join(store.ban_reasons.values())
+
+    sections = [
+        HEADER.pack(MAGIC, VERSION, store.first_account_number, store.next_account_number, rows, lsn, len(ban_numbers)),
+        store.balances.tobytes(),
+        store.limits.tobytes(),
+        bytes(store.banned) + _padding(rows),
+        owner_lengths.tobytes() + _padding(4 * rows),
+        ban_numbers.tobytes(),
+        ban_lengths.tobytes() + _padding(4 * len(ban_numbers)),
+    ]
+
+    temporary_path = path + ".tmp"
+
+    with open(temporary_path, "wb") as file:
+        for section in sections:
+            file.write(section)
+
+        # Text is stored as UTF-8, lengths above count characters of the decoded text
+        owners_bytes = owners_text.encode("utf-8")
+        file.write(struct.pack("<q", len(owners_bytes)))
+        file.write(owners_bytes)
+        file.write(reasons_text.encode("utf-8"))
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary_path, path)
+
+
+def load_snapshot(path: str) -> tuple:
+    """
+    Function that loads the snapshot at path. Returns the loaded AccountStore and the
+    log sequence number the snapshot is consistent with.
+    """
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        magic, version, first, next_number, rows, lsn, bans = HEADER.unpack_from(view, 0)
+
+        if magic != MAGIC or version != VERSION:
+            raise CustomValueError(f"{path} is not a version {VERSION} account snapshot")
+
+        def take(typecode, count, size):
+            nonlocal position
+            column = array(typecode)
+            column.frombytes(view[position:position + count * size])
+            position += count * size + (-(count * size) % 8)
+            return column
+
+        position = HEADER.size
+        balances = take("d", rows, 8)
+        limits = take("d", rows, 8)
+        banned = bytearray(view[position:position + rows])
+        position += rows + (-rows % 8)
+        owner_lengths = take("i", rows, 4)
+        ban_numbers = take("q", bans, 8)
+        ban_lengths = take("i", bans, 4)
+
+        (owners_size,) = struct.unpack_from("<q", view, position)
+        position += 8
+        owners_text = view[position:position + owners_size].decode("utf-8")
+        reasons_text = view[position + owners_size:].decode("utf-8")
+
+    owners = []
+    start = 0
+
+    for length in owner_lengths:
+        if length < 0:
+            owners.append(None)
+
+        else:
+            owners.append(owners_text[start:start + length])
+            start += length
+
+    ends = list(accumulate(ban_lengths))
+    starts = [0] + ends[:-1]
+
+    store = AccountStore(first)
+    store.next_account_number = next_number
+    store.owners = owners
+    store.balances = balances
+    store.limits = limits
+    store.banned = banned
+    store.ban_reasons = {number: reasons_text[begin:end] for number, begin, end in zip(ban_numbers, starts, ends)}
+    store._count = rows - owners.count(None)
+
+    return store, lsn
+
+
+def replay(store: AccountStore, log_path: str, start: int = 0) -> int:
+    """
+    Function that applies the records of the log at log_path, from log sequence number start,
+    to store. Returns the log sequence number after the last applied record.
+    """
+    lsn = start
+
+    for record in transaction_log.read_log(log_path, start):
+        event = record.event
+
+        if event == transaction_log.DEPOSIT:
+            store.deposit(record.account_number, record.amount)
+
+        elif event == transaction_log.WITHDRAW:
+            store.withdraw(record.account_number, record.amount)
+
+        elif event == transaction_log.TRANSFER:
+            store.transfer(record.account_number, record.other, record.amount)
+
+        elif event == transaction_log.OPEN:
+            if record.account_number != store.next_account_number:
+                store.set_next_account_number(record.account_number)
+            store.open_account(record.text, record.amount)
+
+        elif event == transaction_log.BAN:
+            store.ban_account(record.account_number, record.text)
+
+        elif event == transaction_log.UNBAN_ALL:
+            store.unban_all()
+
+        elif event == transaction_log.SET_LIMIT:
+            store.set_transaction_limit(record.account_number, None if math.isnan(record.amount) else record.amount)
+
+        elif event == transaction_log.SET_NEXT_ACCOUNT_NUMBER:
+            # A store never reuses account numbers, an OPEN record for a reused number fails instead
+            if record.other > store.next_account_number:
+                store.set_next_account_number(record.other)
+
+        lsn = record.lsn
+
+    return lsn
+
+
+def recover(snapshot_path: str, log_path: str) -> tuple:
+    """
+    Function that rebuilds an AccountStore after a restart from the snapshot at snapshot_path
+    (if it exists) and the tail of the log at log_path (if it exists).
+    Returns the store and the log sequence number it is consistent with.
+    """
+    if os.path.exists(snapshot_path):
+        store, lsn = load_snapshot(snapshot_path)
+
+    else:
+        store, lsn = AccountStore(), 0
+
+    if os.path.exists(log_path):
+        lsn = replay(store, log_path, lsn)
+
+    return store, lsn
+
+
+class Checkpointer:
+    """
+    Class that takes a new snapshot of a journaled AccountStore every time the log has grown
+    by interval bytes since the last snapshot.
+
+    Instance Variables-
+        store (AccountStore): Store to snapshot, its journal is the log to checkpoint against
+        path (string): Location of the snapshot
+        interval (int): Log growth in bytes between snapshots
+        last_lsn (int): Log sequence number of the last snapshot
+    """
+
+    def __init__(self, store: AccountStore, path: str, interval: int = 64 << 20, last_lsn: int = 0):
+        #Checking input values
+        if store.journal is None:
+            raise CustomValueError("Store must have a journal to be checkpointed")
+
+        if interval < 1:
+            raise CustomValueError(f"Checkpoint interval must be positive, received {interval}")
+
+        self.store = store
+        self.path = path
+        self.interval = interval
+        self.last_lsn = last_lsn
+
+
+    def maybe_checkpoint(self) -> bool:
+        """
+        Method that takes a snapshot if the log has grown by interval bytes, returns True if it did.
+        """
+        if self.store.journal.lsn - self.last_lsn < self.interval:
+            return False
+
+        self.checkpoint()
+        return True
+
+
+    def checkpoint(self) -> None:
+        """
+        Method that takes a snapshot now. The log is flushed first, so the snapshot never
+        refers to records that are not on disk.
+        """
+        journal = self.store.journal
+        journal.flush()
+        write_snapshot(self.path, self.store, journal.lsn)
+        self.last_lsn = journal.lsn
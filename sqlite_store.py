@@ -0,0 +1,397 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class SQLiteStore, a persistent home for BankAccount state in a local SQLite
+database (accounts, limits, bans and the account number counter), and class SQLiteBankAccount, a
+BankAccount that keeps its row in a SQLiteStore up to date. The database runs in WAL mode, so readers
+never wait for the writer. Changed accounts are written behind: they are remembered as dirty and
+flushed together in one transaction with a single prepared statement, instead of one UPDATE and
+commit per operation. Reads go through a small pool of read-only connections, so threads can read
+concurrently while accounts are being written.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+from bank import BankAccount
+from custom_errors import *
+
+# balance and transaction_limit have no declared type, so ints and floats come back as they were saved
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    account_number INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    balance NOT NULL,
+    transaction_limit
+);
+CREATE TABLE IF NOT EXISTS bans (
+    account_number INTEGER PRIMARY KEY,
+    reason TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+UPSERT_ACCOUNT = """
+INSERT INTO accounts (account_number, owner, balance, transaction_limit) VALUES (?, ?, ?, ?)
+ON CONFLICT (account_number) DO UPDATE SET owner = excluded.owner, balance = excluded.balance, transaction_limit = excluded.transaction_limit
+"""
+
+UPSERT_COUNTER = "INSERT INTO counters (name, value) VALUES ('next_account_number', ?) ON CONFLICT (name) DO UPDATE SET value = excluded.value"
+
+
+class SQLiteStore:
+    """
+    Class for BankAccount state kept in a SQLite database.
+
+    Instance Variables-
+        path (string): Location of the database file
+        write_behind (bool): Whether changed accounts are flushed in batches (False commits every change at once)
+        flush_every (int): Number of dirty accounts that triggers a flush
+        flushes (int): Number of flushes written
+        listeners (list): Objects whose invalidate(account_number) and invalidate_all() are called when bans change
+    """
+
+    def __init__(self, path: str, write_behind: bool = True, flush_every: int = 1000, readers: int = 4):
+        #Checking input type
+        if not isinstance(flush_every, int) or not isinstance(readers, int):
+            raise CustomTypeError(f"Flush size and number of readers must be int, received {type(flush_every)} and {type(readers)}")
+
+        #Checking input values
+        if flush_every < 1 or readers < 1:
+            raise CustomValueError(f"Flush size and number of readers must be positive, received {flush_every} and {readers}")
+
+        self.path = path
+        self.write_behind = write_behind
+        self.flush_every = flush_every
+        self.flushes = 0
+        self.listeners = []
+        self._dirty = {}
+        self._lock = threading.RLock()
+
+        # Autocommit mode, transactions are opened explicitly around each batch
+        self._writer = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.executescript(SCHEMA)
+
+        self._readers = queue.Queue()
+
+        for _ in range(readers):
+            # Quoting the path, so names with ?, # or % are not read as parts of the URI
+            reader = sqlite3.connect(f"file:{pathname2url(path)}?mode=ro", uri=True, check_same_thread=False)
+            self._readers.put(reader)
+
+
+    @contextmanager
+    def _reader(self):
+        """
+        Lends a read-only connection from the pool, waiting if every connection is in use.
+        """
+        reader = self._readers.get()
+
+        try:
+            yield reader
+
+        finally:
+            self._readers.put(reader)
+
+
+    @staticmethod
+    def _row(account: BankAccount) -> tuple:
+        return (account.account_number, account.owner, account.balance, account.transaction_limit)
+
+
+    def mark_dirty(self, *accounts: BankAccount) -> None:
+        """
+        Method that records that accounts changed together. With write-behind the accounts are flushed
+        with the next batch, otherwise their rows are written and committed now. Either way the accounts
+        are written in the same transaction, so both sides of a transfer are saved or neither is.
+        """
+        with self._lock:
+            if not self.write_behind:
+                with self._transaction() as writer:
+                    writer.executemany(UPSERT_ACCOUNT, [self._row(account) for account in accounts])
+                    writer.execute(UPSERT_COUNTER, (BankAccount.account_number,))
+
+                return
+
+            for account in accounts:
+                self._dirty[account.account_number] = account
+
+            # Checking the batch size only once every account is marked, so a flush never splits them
+
+            if len(self._dirty) >= self.flush_every:
+                self.flush()
+
+
+    def flush(self) -> None:
+        """
+        Method that writes every dirty account and the account number counter in one transaction.
+        """
+        with self._lock:
+            rows = [self._row(account) for account in self._dirty.values()]
+
+            with self._transaction() as writer:
+                writer.executemany(UPSERT_ACCOUNT, rows)
+                writer.execute(UPSERT_COUNTER, (BankAccount.account_number,))
+
+            self._dirty.clear()
+            self.flushes += 1
+
+
+    @contextmanager
+    def _transaction(self):
+        writer = self._writer
+        writer.execute("BEGIN IMMEDIATE")
+
+        try:
+            yield writer
+
+        except BaseException:
+            writer.execute("ROLLBACK")
+            raise
+
+        writer.execute("COMMIT")
+
+
+    def ban(self, account_number: int, reason: str) -> None:
+        """
+        Method that records a ban. Bans are rare, so they are written at once.
+        """
+        with self._lock:
+            self._writer.execute("INSERT OR REPLACE INTO bans (account_number, reason) VALUES (?, ?)", (account_number, reason))
+
+        for listener in self.listeners:
+            listener.invalidate(account_number)
+
+
+    def unban_all(self) -> None:
+        with self._lock:
+            self._writer.execute("DELETE FROM bans")
+
+        for listener in self.listeners:
+            listener.invalidate_all()
+
+
+    def pending(self) -> int:
+        """
+        Method that returns the number of dirty accounts waiting to be flushed.
+        """
+        return len(self._dirty)
+
+
+    def is_pending(self, account_number: int) -> bool:
+        """
+        Method that returns whether an account has changes waiting to be flushed.
+        """
+        return account_number in self._dirty
+
+
+    def balance(self, account_number: int) -> float:
+        """
+        Method that returns the last flushed balance of an account, read through the reader pool.
+        """
+        with self._reader() as reader:
+            row = reader.execute("SELECT balance FROM accounts WHERE account_number = ?", (account_number,)).fetchone()
+
+        if row is None:
+            raise CustomKeyError(f"Account ({account_number}) does not exist", account_number=account_number)
+
+        return row[0]
+
+
+    @staticmethod
+    def _build(account_class: type, row: tuple) -> BankAccount:
+        """
+        Creates an account from its saved row, without adding a bonus or taking a new account number.
+        """
+        account_number, owner, balance, limit = row
+        account = account_class.__new__(account_class)
+        account.owner = owner
+        account.balance = balance
+        account.account_number = account_number
+        account.transaction_limit = limit
+        return account
+
+
+    def load_account(self, account_number: int, account_class: type = None) -> BankAccount:
+        """
+        Method that returns one account. An account waiting to be flushed is returned as is, otherwise
+        it is read from the database (as account_class, SQLiteBankAccount by default). Its ban is not
+        read, restore_ban does that.
+        """
+        with self._lock:
+            account = self._dirty.get(account_number)
+
+        if account is not None:
+            return account
+
+        with self._reader() as reader:
+            row = reader.execute("SELECT account_number, owner, balance, transaction_limit FROM accounts WHERE account_number = ?", (account_number,)).fetchone()
+
+        if row is None:
+            raise CustomKeyError(f"Account ({account_number}) does not exist", account_number=account_number)
+
+        return self._build(account_class or SQLiteBankAccount, row)
+
+
+    def restore_ban(self, account_number: int) -> None:
+        """
+        Method that copies the saved ban state of one account to BankAccount.banned_accounts.
+        """
+        with self._reader() as reader:
+            ban = reader.execute("SELECT reason FROM bans WHERE account_number = ?", (account_number,)).fetchone()
+
+        if ban is None:
+            BankAccount.banned_accounts.pop(account_number, None)
+
+        else:
+            BankAccount.banned_accounts[account_number] = ban[0]
+
+
+    def restore_bans(self) -> None:
+        """
+        Method that replaces BankAccount.banned_accounts with the saved bans.
+        """
+        with self._reader() as reader:
+            bans = reader.execute("SELECT account_number, reason FROM bans").fetchall()
+
+        BankAccount.banned_accounts.clear()
+        BankAccount.banned_accounts.update(bans)
+
+
+    def load(self, account_class: type = None) -> dict:
+        """
+        Method that restores the saved state: bans go to BankAccount.banned_accounts, the counter to
+        BankAccount.account_number, and the accounts are returned by account number as account_class
+        instances (SQLiteBankAccount by default) without adding a bonus or taking new numbers.
+        """
+        account_class = account_class or SQLiteBankAccount
+        accounts = {}
+
+        with self._reader() as reader:
+            rows = reader.execute("SELECT account_number, owner, balance, transaction_limit FROM accounts").fetchall()
+            counter = reader.execute("SELECT value FROM counters WHERE name = 'next_account_number'").fetchone()
+
+        for row in rows:
+            accounts[row[0]] = self._build(account_class, row)
+
+        self.restore_bans()
+
+        if counter is not None:
+            BankAccount.set_next_account_number(counter[0])
+
+        return accounts
+
+
+    def close(self) -> None:
+        """
+        Method that flushes the dirty accounts and closes every connection.
+        """
+        with self._lock:
+            if self._dirty:
+                self.flush()
+
+            self._writer.close()
+
+            while not self._readers.empty():
+                self._readers.get().close()
+
+
+    def __enter__(self) -> "SQLiteStore":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SQLiteBankAccount(BankAccount):
+    """
+    Class for a bank account whose state is saved to a SQLiteStore. Validation and error semantics
+    are the same as BankAccount.
+
+    Class Variables-
+        store (SQLiteStore): Store used by every SQLite account (None saves nothing)
+    """
+
+    store = None
+
+    # Set while a transfer runs, so its withdraw and deposit leave the saving to transfer_to
+    _in_transfer = False
+
+    def __init__(self, owner, balance):
+        """
+        Creates a new SQLiteBankAccount instance and saves it.
+
+        Arguments-
+            owner (string): Name of account owner
+            balance (int): non-negative starting account balance
+        """
+        super().__init__(owner, balance)
+        self._save()
+
+
+    def _save(self) -> None:
+        if SQLiteBankAccount.store is not None and not self._in_transfer:
+            SQLiteBankAccount.store.mark_dirty(self)
+
+
+    def deposit(self, amount: float | int) -> None:
+        super().deposit(amount)
+        self._save()
+
+
+    def withdraw(self, amount: float | int) -> None:
+        super().withdraw(amount)
+        self._save()
+
+
+    def transfer_to(self, target_account: BankAccount, amount: float | int) -> None:
+        """
+        Method that transfers a non-negative amount to another valid BankAccount instance, if enough
+        funds exist. Both accounts are saved together, so the debit is never written without the credit.
+        """
+        accounts = [self]
+
+        if isinstance(target_account, SQLiteBankAccount) and target_account is not self:
+            accounts.append(target_account)
+
+        for account in accounts:
+            account._in_transfer = True
+
+        try:
+            super().transfer_to(target_account, amount)
+
+        finally:
+            for account in accounts:
+                account._in_transfer = False
+
+        if SQLiteBankAccount.store is not None:
+            SQLiteBankAccount.store.mark_dirty(*accounts)
+
+
+    def set_transaction_limit(self, limit: float | int | None) -> None:
+        super().set_transaction_limit(limit)
+        self._save()
+
+
+    def ban_account(self, reason: str) -> None:
+        super().ban_account(reason)
+
+        if SQLiteBankAccount.store is not None:
+            SQLiteBankAccount.store.ban(self.account_number, reason)
+
+
+    @classmethod
+    def unban_all(cls) -> None:
+        super().unban_all()
+
+        if SQLiteBankAccount.store is not None:
+            SQLiteBankAccount.store.unban_all()
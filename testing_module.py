@@ -5,8 +5,48 @@ This program is for comprehensive automated testing of the BankAccount class by
 using unit testing (unittest module).
 """
 
+import asyncio
+import contextlib
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
 import unittest
 from bank import BankAccount 
+from account_store import AccountStore, AccountView
+import batch_engine
+from thread_safe_bank import ThreadSafeBankAccount
+from async_bank import AsyncAccountService
+import transaction_log
+from transaction_log import JournaledBankAccount, TransactionLog, read_log
+import snapshot
+import mapped_book
+from mapped_book import MappedBookReader, MappedBookWriter
+from money import CentsBankAccount, format_cents, to_cents
+from ban_registry import BanRegistry
+from fast_bank import FastBankAccount
+import request_processor
+from sharded_ledger import ShardedLedger, _ShardStore
+from account_allocator import AllocatedBankAccount, BlockAllocator
+from history import AccountHistory, HistoryBankAccount
+from book_metrics import BookMetrics, MeteredBankAccount
+from velocity_limits import RollingCounter, RollingWindows, VelocityBankAccount
+from instrumentation import Instrumentation, LatencyHistogram
+from results import STATUS_ERRORS, SUCCESS, Result, Status
+from idempotency import IdempotencyCache, IdempotentBankAccount
+from ledger import BONUS, EXTERNAL, Ledger, LedgerBankAccount
+from transactions import Transaction, VersionedBankAccount
+from sqlite_store import SQLiteBankAccount, SQLiteStore
+from account_cache import AccountCache
 from custom_errors import *
 
 class TestBankAccount(unittest.TestCase):
@@ -744,5 +784,2841 @@ class TestBankAccount(unittest.TestCase):
         self.assertEqual(expected6, str(account6), "Incorrect implentation of __str__ method for account6")
                 
 
+class TestAccountStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Setting up a store with the same accounts used for BankAccount tests.
+        """
+        self.store = AccountStore()
+        self.number1 = self.store.open_account("Tom Cruise", 1000)
+        self.number2 = self.store.open_account("Glen Powell", 987.50)
+        self.number3 = self.store.open_account("Robert Downey Jr.", 0)
+
+
+    def test_open_account(self):
+        """
+        4.1 Opening accounts in a store
+
+        Checking account numbers, bonus and validation when opening accounts in an AccountStore.
+        """
+        self.assertEqual([1045, 1046, 1047], [self.number1, self.number2, self.number3], 
+        f"Incorrect account numbers given by AccountStore.open_account, received {[self.number1, self.number2, self.number3]}")
+
+        self.assertEqual(1049.99, self.store[self.number1].balance, 
+        f"Opening balance in store is incorrect, expected $1049.99, received ${self.store[self.number1].balance}")
+
+        self.assertEqual(3, len(self.store), f"Expected 3 accounts in store, received {len(self.store)}")
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when opening a store account with the balance 'fifty'. Either no error or the incorrect error was raised."):
+            self.store.open_account("Rupert", "fifty")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when opening a store account with negative balance. Either no error or the incorrect error was raised."):
+            self.store.open_account("Adam", -2000)
+
+        with self.assertRaises(CustomKeyError, 
+        msg="Expected a key error to be raised when looking up an account that does not exist. Either no error or the incorrect error was raised."):
+            self.store[2000]
+
+
+    def test_store_operations(self):
+        """
+        4.2 Deposit, withdraw and transfer in a store
+
+        Checking balances after valid operations match the BankAccount results.
+        """
+        self.store.deposit(self.number1, 0.01)
+        self.assertEqual(1050, self.store[self.number1].balance, 
+        f"Store deposit failed to update balance correctly. Expected $1050, got ${self.store[self.number1].balance}")
+
+        self.store.withdraw(self.number2, 1037.49)
+        self.assertEqual(0.00, self.store[self.number2].balance, 
+        f"Store withdraw failed to update balance correctly. Expected $0.00, got ${self.store[self.number2].balance}")
+
+        self.store[self.number1].transfer_to(self.store[self.number3], 200)
+        self.assertEqual(850, self.store[self.number1].balance, 
+        f"Store transfer failed to debit account, expected $850, received ${self.store[self.number1].balance}")
+        self.assertEqual(249.99, self.store[self.number3].balance, 
+        f"Store transfer failed to credit account, expected $249.99, received ${self.store[self.number3].balance}")
+
+
+    def test_store_rejections(self):
+        """
+        4.3 Invalid operations in a store
+
+        Checking that a store raises the same errors as BankAccount for bans, limits and insufficient funds.
+        """
+        with self.assertRaises(AssertionError, 
+        msg="Expected an Assertion error to be raised when store account has insufficient balance. Either no error or the incorrect error was raised."):
+            self.store.withdraw(self.number3, 50.00)
+
+        self.store.set_transaction_limit(self.number1, 500.00)
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a Limit error to be raised when withdrawing more than the limit from store account. Either no error or the incorrect error was raised."):
+            self.store.withdraw(self.number1, 500.01)
+
+        self.store.ban_account(self.number2, "Insider Trading")
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an Operations error to be raised when transferring to a banned store account. Either no error or the incorrect error was raised."):
+            self.store.transfer(self.number1, self.number2, 10)
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when transferring to the same store account. Either no error or the incorrect error was raised."):
+            self.store.transfer(self.number1, self.number1, 10)
+
+        self.store.unban_all()
+        self.assertFalse(self.store.is_banned(self.number2), "Store account should not be banned after unban_all")
+
+
+    def test_account_view_str(self):
+        """
+        4.4 AccountView formatting
+
+        Checking that AccountView formats like BankAccount and holds no per instance dictionary.
+        """
+        view = self.store[self.number1]
+        view.set_transaction_limit(10)
+        view.ban_account("Suspicious activity")
+
+        expected = "Tom Cruise's account (1045): Balance=$1,049.99 | Limit=$10.00 | Banned=Yes | Ban Reason: Suspicious activity"
+        self.assertEqual(expected, str(view), "Incorrect implentation of __str__ method for AccountView")
+
+        self.assertFalse(hasattr(view, "__dict__"), "AccountView should use __slots__ and not have a __dict__")
+        self.assertIsInstance(view, AccountView, f"Store lookups should return AccountView, received {type(view)}")
+
+
+class TestBatchEngine(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Setting up a store with two accounts for batch posting.
+        """
+        self.store = AccountStore()
+        self.number1 = self.store.open_account("Tom Cruise", 1000)
+        self.number2 = self.store.open_account("Robert Downey Jr.", 0)
+
+
+    def test_valid_post_batch(self):
+        """
+        5.1 Valid batch posting
+
+        Checking that a batch of valid rows is applied in row order.
+        """
+        results = batch_engine.post_batch(self.store,
+            [self.number1, self.number2, self.number2],
+            [0.01, 200, 249.99],
+            [batch_engine.DEPOSIT, batch_engine.DEPOSIT, batch_engine.WITHDRAW])
+
+        self.assertEqual([batch_engine.OK] * 3, list(results), f"Expected every row to be posted, received {list(results)}")
+
+        self.assertEqual(1050, self.store[self.number1].balance, 
+        f"post_batch failed to update balance correctly. Expected $1050, got ${self.store[self.number1].balance}")
+
+        self.assertEqual(0, self.store[self.number2].balance, 
+        f"post_batch failed to update balance correctly. Expected $0, got ${self.store[self.number2].balance}")
+
+
+    def test_invalid_post_batch(self):
+        """
+        5.2 Invalid batch rows
+
+        Checking that every invalid row gets its own result code and does not stop the batch.
+        """
+        self.store.set_transaction_limit(self.number1, 500)
+        self.store.ban_account(self.number2, "Fraud")
+
+        results = batch_engine.post_batch(self.store,
+            [self.number1, self.number1, self.number1, self.number2, 3000, self.number1, self.number1, self.number1],
+            ["ten", -5, 2000, 10, 10, 501, 10, 10],
+            [batch_engine.DEPOSIT, batch_engine.DEPOSIT, batch_engine.WITHDRAW, batch_engine.DEPOSIT,
+             batch_engine.DEPOSIT, batch_engine.WITHDRAW, 9, batch_engine.WITHDRAW])
+
+        expected = [batch_engine.INVALID_TYPE, batch_engine.INVALID_VALUE, batch_engine.INSUFFICIENT_FUNDS, batch_engine.BANNED,
+                    batch_engine.UNKNOWN_ACCOUNT, batch_engine.LIMIT_EXCEEDED, batch_engine.INVALID_KIND, batch_engine.OK]
+        self.assertEqual(expected, list(results), f"Incorrect result codes from post_batch, received {list(results)}")
+
+        self.assertEqual(1039.99, self.store[self.number1].balance, 
+        f"Only the last row should have been posted, expected $1039.99, received ${self.store[self.number1].balance}")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when batch columns have different lengths. Either no error or the incorrect error was raised."):
+            batch_engine.post_batch(self.store, [self.number1], [1, 2], [batch_engine.DEPOSIT])
+
+
+    def test_transfer_batch_netting(self):
+        """
+        5.3 Netted transfer batch
+
+        Checking that a transfer may spend money received later in the batch, that only the
+        transfers an account can not cover are rejected, and that rejected rows get the reasons
+        transfer_to raises.
+        """
+        number3 = self.store.open_account("Glen Powell", 987.50)
+        self.store.set_transaction_limit(number3, 100)
+
+        results = batch_engine.transfer_batch(self.store,
+            [self.number2, self.number1, self.number2, number3, self.number1, self.number1, self.number2],
+            [self.number1, self.number2, number3, self.number1, self.number1, self.number2, self.number1],
+            [100, 500, 449.99, 150, 10, "ten", 1])
+
+        expected = [batch_engine.OK, batch_engine.OK, batch_engine.OK, batch_engine.LIMIT_EXCEEDED,
+                    batch_engine.INVALID_VALUE, batch_engine.INVALID_TYPE, batch_engine.INSUFFICIENT_FUNDS]
+        self.assertEqual(expected, list(results), f"Incorrect result codes from transfer_batch, received {list(results)}")
+
+        self.assertAlmostEqual(649.99, self.store[self.number1].balance, places=6, 
+        msg=f"transfer_batch failed to net account, expected $649.99, received ${self.store[self.number1].balance}")
+
+        self.assertAlmostEqual(0, self.store[self.number2].balance, places=6, 
+        msg=f"transfer_batch failed to net account, expected $0, received ${self.store[self.number2].balance}")
+
+        self.assertAlmostEqual(1487.48, self.store[number3].balance, places=6, 
+        msg=f"transfer_batch failed to credit account, expected $1487.48, received ${self.store[number3].balance}")
+
+        # Taking back the only transfer that funds number2 leaves its onward transfer unfunded too
+        results = batch_engine.transfer_batch(self.store,
+            [self.number1, self.number2, number3],
+            [self.number2, number3, self.number2],
+            [5000, 50, 20])
+
+        self.assertEqual([batch_engine.INSUFFICIENT_FUNDS, batch_engine.INSUFFICIENT_FUNDS, batch_engine.OK], list(results),
+        f"Incorrect result codes from transfer_batch, received {list(results)}")
+
+        self.store.ban_account(number3, "Fraud")
+        results = batch_engine.transfer_batch(self.store, [self.number1], [number3], [1])
+        self.assertEqual([batch_engine.BANNED], list(results), f"Expected transfer to banned account to be rejected, received {list(results)}")
+
+
+class TestThreadSafeBankAccount(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up two thread safe accounts.
+        """
+        ThreadSafeBankAccount.set_next_account_number(1045)
+        ThreadSafeBankAccount.unban_all()
+        self.account1 = ThreadSafeBankAccount("Tom Cruise", 1000)
+        self.account2 = ThreadSafeBankAccount("Glen Powell", 1000)
+
+
+    def _run_threads(self, target, threads=8):
+        """
+        Runs target in several threads and waits for all of them to finish.
+        """
+        pool = [threading.Thread(target=target) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive(), "Thread did not finish, possible deadlock")
+
+
+    def test_concurrent_deposits(self):
+        """
+        6.1 Concurrent deposits
+
+        Checking that deposits from several threads are never lost.
+        """
+        def deposit_many():
+            for _ in range(2000):
+                self.account1.deposit(1)
+
+        self._run_threads(deposit_many)
+
+        self.assertAlmostEqual(1049.99 + 16000, self.account1.balance, places=6, 
+        msg=f"Concurrent deposits were lost, expected ${1049.99 + 16000}, received ${self.account1.balance}")
+
+
+    def test_concurrent_account_numbers(self):
+        """
+        6.2 Concurrent account opening
+
+        Checking that accounts opened from several threads get unique account numbers.
+        """
+        opened = []
+
+        def open_many():
+            for _ in range(500):
+                opened.append(ThreadSafeBankAccount("Owner", 0).account_number)
+
+        self._run_threads(open_many)
+
+        self.assertEqual(len(opened), len(set(opened)), "Duplicate account numbers were handed out")
+        self.assertEqual(1047 + 4000, BankAccount.account_number, 
+        f"Account number counter is incorrect, expected {1047 + 4000}, received {BankAccount.account_number}")
+
+
+    def test_concurrent_transfers(self):
+        """
+        6.3 Concurrent opposite transfers
+
+        Checking that opposite transfers do not deadlock and that money is conserved.
+        """
+        def forward():
+            for _ in range(2000):
+                self.account1.transfer_to(self.account2, 0.1)
+
+        def backward():
+            for _ in range(2000):
+                self.account2.transfer_to(self.account1, 0.1)
+
+        pool = [threading.Thread(target=forward if index % 2 else backward) for index in range(8)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive(), "Transfer thread did not finish, possible deadlock")
+
+        self.assertAlmostEqual(1049.99 * 2, self.account1.balance + self.account2.balance, places=6, 
+        msg=f"Money was not conserved by concurrent transfers, received ${self.account1.balance + self.account2.balance}")
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when transferring to a non thread safe account. Either no error or the incorrect error was raised."):
+            self.account1.transfer_to(BankAccount("Rupert", 10), 5)
+
+
+    def test_subclass_class_methods(self):
+        """
+        6.4 Shared class state
+
+        Checking that class methods called on the subclass change the state shared with BankAccount.
+        """
+        self.account1.ban_account("Fraud")
+        self.assertTrue(self.account1.is_banned(), "ThreadSafeBankAccount ban was not recorded")
+
+        ThreadSafeBankAccount.unban_all()
+        self.assertFalse(self.account1.is_banned(), "ThreadSafeBankAccount.unban_all did not unban the account")
+
+        ThreadSafeBankAccount.set_next_account_number(2000)
+        self.assertEqual(2000, BankAccount("Rupert", 10).account_number, 
+        "ThreadSafeBankAccount.set_next_account_number did not set the shared counter")
+
+
+    def test_mixed_allocation_after_reset(self):
+        """
+        6.5 Account numbers shared with BankAccount
+
+        Checking that plain and thread safe accounts opened from several threads draw from one
+        counter, and that setting the next account number resets it.
+        """
+        opened = []
+
+        def open_many():
+            for index in range(500):
+                account_class = ThreadSafeBankAccount if index % 2 else BankAccount
+                opened.append(account_class("Owner", 0).account_number)
+
+        BankAccount.set_next_account_number(3000)
+        self._run_threads(open_many)
+
+        self.assertEqual(sorted(opened), list(range(3000, 3000 + len(opened))),
+        "Account numbers were skipped or handed out twice after the counter was reset")
+        self.assertEqual(3000 + len(opened), BankAccount.account_number,
+        f"Account number counter is incorrect, expected {3000 + len(opened)}, received {BankAccount.account_number}")
+
+        BankAccount.set_next_account_number(1045)
+        self.assertEqual(1045, ThreadSafeBankAccount("Rupert", 10).account_number,
+        "ThreadSafeBankAccount did not pick up the counter set through BankAccount")
+
+
+class TestAsyncAccountService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up accounts for the async service.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.account1 = BankAccount("Tom Cruise", 1000)
+        self.account2 = BankAccount("Robert Downey Jr.", 0)
+
+
+    async def test_async_operations(self):
+        """
+        7.1 Awaitable operations
+
+        Checking that concurrent awaited deposits, withdrawals and transfers are all applied.
+        """
+        async with AsyncAccountService(max_pending=8, max_batch=4) as service:
+            await asyncio.gather(*(service.deposit(self.account1, 1) for _ in range(100)))
+            await service.withdraw(self.account1, 100)
+            await service.transfer_to(self.account1, self.account2, 200)
+
+        self.assertEqual(849.99, self.account1.balance, 
+        f"AsyncAccountService did not apply every request, expected $849.99, received ${self.account1.balance}")
+
+        self.assertEqual(249.99, self.account2.balance, 
+        f"AsyncAccountService transfer was not credited, expected $249.99, received ${self.account2.balance}")
+
+        self.assertLess(service.batches, 100, f"Expected requests to be applied in micro-batches, received {service.batches} batches")
+
+
+    async def test_async_errors(self):
+        """
+        7.2 Errors from awaited operations
+
+        Checking that BankAccount errors are raised from the awaited call without stopping other requests.
+        """
+        service = AsyncAccountService()
+        self.account2.ban_account("Fraud")
+
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an Operations error to be raised when depositing to a banned account. Either no error or the incorrect error was raised."):
+            await service.deposit(self.account2, 10)
+
+        with self.assertRaises(AssertionError, 
+        msg="Expected an Assertion error to be raised when withdrawing more than the balance. Either no error or the incorrect error was raised."):
+            await service.withdraw(self.account1, 5000)
+
+        await service.deposit(self.account1, 0.01)
+        self.assertEqual(1050, self.account1.balance, f"Deposit after a failed request was not applied, received ${self.account1.balance}")
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when queueing for a non BankAccount. Either no error or the incorrect error was raised."):
+            await service.deposit("Tom Cruise", 10)
+
+        await service.close()
+
+
+    async def test_coalesced_batches(self):
+        """
+        7.3 Coalesced micro-batches
+
+        Checking that deposits and withdrawals applied in one micro-batch give the same balances and errors as applying them
+        one by one, and that raised errors do not hold the worker's frame.
+        """
+        reference = BankAccount("Robert Downey Jr.", 0)
+        reference.account_number = self.account2.account_number
+        requests = [("withdraw", 60), ("deposit", 20.1), ("withdraw", 60), ("withdraw", "5"), ("deposit", -1), ("withdraw", 10.1)]
+        expected = []
+
+        for operation, amount in requests:
+            try:
+                expected.append(getattr(reference, operation)(amount))
+
+            except CustomError as error:
+                expected.append(error)
+
+        async with AsyncAccountService() as service:
+            results = await asyncio.gather(*(getattr(service, operation)(self.account2, amount) for operation, amount in requests), return_exceptions=True)
+
+        self.assertEqual([(type(result), str(result)) for result in expected], [(type(result), str(result)) for result in results], 
+        f"Coalesced requests should be rejected like BankAccount rejects them, received {results}")
+        self.assertEqual(reference.balance, self.account2.balance, f"Incorrect balance after coalesced requests, received {self.account2.balance}")
+        self.assertEqual(1, service.batches, f"Expected the requests to be applied in one micro-batch, received {service.batches}")
+
+        account = ThreadSafeBankAccount("Glen Powell", 0)
+        service = AsyncAccountService()
+
+        for _ in range(2):
+            try:
+                await asyncio.gather(service.withdraw(account, 1000), service.deposit(account, 1))
+
+            except CustomInsufficientFundsError as error:
+                frames = [frame.f_code.co_name for frame, _ in traceback.walk_tb(error.__traceback__)]
+                traceback.clear_frames(error.__traceback__)
+
+            else:
+                self.fail("Expected an insufficient funds error to be raised when withdrawing more than the balance")
+
+            self.assertNotIn("_drain", frames, f"Errors should not hold the worker's frame, received frames {frames}")
+
+        await service.close()
+        self.assertEqual(51.99, account.balance, f"Requests after a cleared error should still be applied, received {account.balance}")
+
+
+class TestTransactionLog(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Setting up a temporary log used by all journaled accounts.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "bank.log")
+        self.log = TransactionLog(self.path, sync_policy=transaction_log.SYNC_GROUP, group_interval=0.001)
+
+        JournaledBankAccount.journal = self.log
+        JournaledBankAccount.set_next_account_number(1045)
+        JournaledBankAccount.unban_all()
+
+
+    def tearDown(self):
+        JournaledBankAccount.journal = None
+        self.log.close()
+        self.directory.cleanup()
+
+
+    def test_journaled_operations(self):
+        """
+        8.1 Journaled operations
+
+        Checking that every successful operation writes one record, and failed operations write none.
+        """
+        account1 = JournaledBankAccount("Tom Cruise", 1000)
+        account2 = JournaledBankAccount("Glen Powell", 987.50)
+
+        account1.deposit(0.01)
+        account1.transfer_to(account2, 200)
+        account2.set_transaction_limit(None)
+        account2.ban_account("Fraud")
+
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an Operations error to be raised when withdrawing from a banned account. Either no error or the incorrect error was raised."):
+            account2.withdraw(10)
+
+        self.log.flush()
+        records = list(read_log(self.path))
+
+        events = [record.event for record in records]
+        expected = [transaction_log.SET_NEXT_ACCOUNT_NUMBER, transaction_log.UNBAN_ALL, transaction_log.OPEN, transaction_log.OPEN,
+                    transaction_log.DEPOSIT, transaction_log.TRANSFER, transaction_log.SET_LIMIT, transaction_log.BAN]
+        self.assertEqual(expected, events, f"Incorrect events written to the transaction log, received {events}")
+
+        self.assertEqual(("Tom Cruise", 1000), (records[2].text, records[2].amount), 
+        f"OPEN record should hold the owner and opening balance, received {records[2]}")
+
+        self.assertEqual((1045, 1046, 200), (records[5].account_number, records[5].other, records[5].amount), 
+        f"TRANSFER record should hold both accounts and the amount, received {records[5]}")
+
+        self.assertEqual("Fraud", records[7].text, f"BAN record should hold the reason, received {records[7].text}")
+        self.assertEqual(self.log.lsn, records[-1].lsn, "Last record lsn should match the log lsn")
+
+
+    def test_torn_record(self):
+        """
+        8.2 Torn record at the end of the log
+
+        Checking that a partly written record is ignored when reading and cut off when the log is reopened.
+        """
+        account = JournaledBankAccount("Tom Cruise", 1000)
+        account.deposit(10)
+        self.log.flush()
+        good_end = self.log.lsn
+
+        with open(self.path, "ab") as file:
+            file.write(transaction_log.encode_record(transaction_log.DEPOSIT, 1045, 0, 5)[:-3])
+
+        self.assertEqual(4, len(list(read_log(self.path))), "Torn record should not be read from the log")
+
+        reopened = TransactionLog(self.path, sync_policy=transaction_log.SYNC_ALWAYS)
+        self.assertEqual(good_end, reopened.lsn, f"Reopened log should end at {good_end}, received {reopened.lsn}")
+
+        reopened.append(transaction_log.WITHDRAW, 1045, 0, 5)
+        reopened.close()
+        self.assertEqual(transaction_log.WITHDRAW, list(read_log(self.path))[-1].event, "Record appended after a torn tail was not readable")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised for an unknown sync policy. Either no error or the incorrect error was raised."):
+            TransactionLog(self.path, sync_policy="sometimes")
+
+
+    def test_read_from_offset(self):
+        """
+        8.3 Reading the log from an offset
+
+        Checking that records are read the same in small blocks, and that reading or reopening from an offset never looks before it.
+        """
+        account = JournaledBankAccount("Zoë Ärger", 1000)
+
+        for amount in range(1, 30):
+            account.deposit(amount)
+
+        self.log.flush()
+        records = list(read_log(self.path))
+        middle = records[10].lsn
+
+        block_size = transaction_log.READ_SIZE
+        transaction_log.READ_SIZE = 7
+
+        try:
+            self.assertEqual(records, list(read_log(self.path)), "Reading in blocks smaller than a record should give the same records")
+
+        finally:
+            transaction_log.READ_SIZE = block_size
+
+        # Damaging the head of the log, which reading from middle must not touch
+        with open(self.path, "r+b") as file:
+            file.write(b"\xff" * 16)
+
+        self.assertEqual([], list(read_log(self.path)), "A damaged first record should end the log when reading from the start")
+        self.assertEqual(records[11:], list(read_log(self.path, middle)), "Incorrect records read from the middle of the log")
+
+        reopened = TransactionLog(self.path, sync_policy=transaction_log.SYNC_NONE, start=middle)
+        self.assertEqual(records[-1].lsn, reopened.lsn, "Reopening from an offset should only check the log after it")
+        reopened.close()
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when opening a log from past its end. Either no error or the incorrect error was raised."):
+            TransactionLog(self.path, sync_policy=transaction_log.SYNC_NONE, start=records[-1].lsn + 1)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Setting up a journaled store in a temporary directory.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.directory.name, "bank.log")
+        self.snapshot_path = os.path.join(self.directory.name, "bank.snap")
+        self.log = TransactionLog(self.log_path, sync_policy=transaction_log.SYNC_NONE)
+        self.store = AccountStore(journal=self.log)
+
+
+    def tearDown(self):
+        self.log.close()
+        self.directory.cleanup()
+
+
+    def _state(self, store):
+        """
+        Returns everything a snapshot must preserve, for comparing two stores.
+        """
+        return (store.first_account_number, store.next_account_number, store.owners, list(store.balances),
+                list(store.limits), bytes(store.banned), store.ban_reasons, len(store))
+
+
+    def test_snapshot_round_trip(self):
+        """
+        9.1 Snapshot round trip
+
+        Checking that a loaded snapshot holds exactly the state of the store it was taken from.
+        """
+        number1 = self.store.open_account("Tom Cruise", 1000)
+        self.store.set_next_account_number(1100)
+        number2 = self.store.open_account("Zoë Ärger", 987.50)
+        self.store.set_transaction_limit(number1, 300)
+        self.store.ban_account(number2, "Insider Trading")
+
+        snapshot.write_snapshot(self.snapshot_path, self.store, 1234)
+        loaded, lsn = snapshot.load_snapshot(self.snapshot_path)
+
+        self.assertEqual(1234, lsn, f"Snapshot lsn was not preserved, received {lsn}")
+        self.assertEqual(self._state(self.store), self._state(loaded), "Loaded snapshot does not match the original store")
+        self.assertEqual(str(self.store[number2]), str(loaded[number2]), "Loaded account does not format like the original")
+
+
+    def test_recover_from_snapshot_and_log(self):
+        """
+        9.2 Recovery from snapshot and log tail
+
+        Checking that recovery loads the snapshot and replays only the records written after it.
+        """
+        number1 = self.store.open_account("Tom Cruise", 1000)
+        number2 = self.store.open_account("Glen Powell", 987.50)
+        self.store.deposit(number1, 0.01)
+
+        checkpointer = snapshot.Checkpointer(self.store, self.snapshot_path, interval=1)
+        self.assertTrue(checkpointer.maybe_checkpoint(), "Checkpointer should take a snapshot once the log has grown")
+        self.assertFalse(checkpointer.maybe_checkpoint(), "Checkpointer should not take a snapshot when the log has not grown")
+
+        self.store.transfer(number1, number2, 200)
+        batch_engine.post_batch(self.store, [number2, number1], [37.49, 5000], [batch_engine.WITHDRAW, batch_engine.WITHDRAW])
+        self.store.set_transaction_limit(number2, 10)
+        self.store.ban_account(number1, "Fraud")
+        number3 = self.store.open_account("Robert Downey Jr.", 0)
+        self.log.flush()
+
+        recovered, lsn = snapshot.recover(self.snapshot_path, self.log_path)
+
+        self.assertEqual(self.log.lsn, lsn, f"Recovery should reach the end of the log, expected {self.log.lsn}, received {lsn}")
+        self.assertEqual(self._state(self.store), self._state(recovered), "Recovered store does not match the original store")
+        self.assertEqual(49.99, recovered[number3].balance, f"Replayed account should get the bonus, received ${recovered[number3].balance}")
+
+
+class TestMappedBook(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Setting up a writer with two accounts in a temporary directory.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "book.map")
+        self.writer = MappedBookWriter(self.path, capacity=2)
+        self.number1 = self.writer.open_account("Tom Cruise", 1000)
+        self.number2 = self.writer.open_account("Glen Powell", 987.50)
+
+
+    def tearDown(self):
+        self.writer.close()
+        self.directory.cleanup()
+
+
+    def test_reader_sees_writes(self):
+        """
+        10.1 Reading published records
+
+        Checking that a reader sees every published change, including accounts added after the file grew.
+        """
+        reader = MappedBookReader(self.path)
+
+        self.writer.transfer(self.number1, self.number2, 200)
+        self.writer.set_transaction_limit(self.number1, 300)
+        self.writer.ban_account(self.number2, "Fraud")
+        number3 = self.writer.open_account("Robert Downey Jr.", 0)
+
+        self.assertEqual(mapped_book.AccountRecord(self.number1, "Tom Cruise", 849.99, 300, False), reader.read(self.number1), 
+        f"Incorrect record read for account1, received {reader.read(self.number1)}")
+
+        self.assertTrue(reader.read(self.number2).banned, "Reader should see the ban on account2")
+        self.assertEqual(49.99, reader.balance(number3), f"Reader should see the account added after growth, received ${reader.balance(number3)}")
+
+        with self.assertRaises(CustomKeyError, 
+        msg="Expected a key error to be raised when reading an account that does not exist. Either no error or the incorrect error was raised."):
+            reader.balance(5000)
+
+        reader.close()
+
+
+    def test_reader_in_other_process(self):
+        """
+        10.2 Reading from another process
+
+        Checking that a reader process sees balances written by the writer process.
+        """
+        def read_balance(path, account_number, queue):
+            with MappedBookReader(path) as reader:
+                queue.put(reader.balance(account_number))
+
+        self.writer.deposit(self.number1, 0.01)
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        process = context.Process(target=read_balance, args=(self.path, self.number1, queue))
+        process.start()
+        balance = queue.get(timeout=30)
+        process.join(timeout=30)
+
+        self.assertEqual(1050, balance, f"Reader process read an incorrect balance, expected $1050, received ${balance}")
+
+
+    def test_reader_retries_during_write(self):
+        """
+        10.3 Reading a record that is being changed
+
+        Checking that a reader never returns a record whose sequence number is odd.
+        """
+        offset = mapped_book.HEADER.size
+        reader = MappedBookReader(self.path, retries=10)
+
+        with open(self.path, "r+b") as file, mmap.mmap(file.fileno(), 0) as view:
+            (sequence,) = mapped_book.SEQUENCE.unpack_from(view, offset)
+            mapped_book.SEQUENCE.pack_into(view, offset, sequence + 1)
+
+            with self.assertRaises(CustomOperationError, 
+            msg="Expected an Operations error to be raised when a record stays mid write. Either no error or the incorrect error was raised."):
+                reader.balance(self.number1)
+
+            mapped_book.SEQUENCE.pack_into(view, offset, sequence)
+
+        self.assertEqual(1049.99, reader.balance(self.number1), f"Reader should succeed once the write has finished, received ${reader.balance(self.number1)}")
+        reader.close()
+
+
+class TestCentsBankAccount(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up cents accounts matching the BankAccount tests.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.account1 = CentsBankAccount("Tom Cruise", 1000)
+        self.account2 = CentsBankAccount("Glen Powell", 987.50)
+        self.account3 = CentsBankAccount("Robert Downey Jr.", 0)
+
+
+    def test_cents_conversion(self):
+        """
+        11.1 Converting and formatting cents
+
+        Checking conversion of dollar amounts to cents and formatting of cents as dollars.
+        """
+        self.assertEqual([104999, 4999, 10, 100000], [to_cents(1049.99), to_cents(49.99), to_cents(0.1), to_cents(1000)], 
+        "Incorrect conversion of dollars to cents")
+
+        self.assertEqual(["1,000,004,999.00", "0.05", "-12.30"], [format_cents(100000499900), format_cents(5), format_cents(-1230)], 
+        "Incorrect formatting of cents")
+
+        self.assertEqual(103749, self.account2.balance_cents, 
+        f"Opening balance in cents is incorrect, expected 103749, received {self.account2.balance_cents}")
+
+
+    def test_no_float_drift(self):
+        """
+        11.2 Exact balances
+
+        Checking that many small postings leave an exact balance, where float balances drift.
+        """
+        float_account = BankAccount("Float", 0)
+
+        for _ in range(1000):
+            self.account3.deposit(0.1)
+            float_account.deposit(0.1)
+
+        self.assertEqual(14999, self.account3.balance_cents, 
+        f"Cents balance drifted, expected 14999, received {self.account3.balance_cents}")
+
+        self.assertNotEqual(149.99, float_account.balance, "Float balance was expected to drift in this test")
+
+        self.account1.transfer_to(self.account3, 200)
+        self.account2.withdraw(1037.49)
+
+        self.assertEqual((84999, 34999, 0), (self.account1.balance_cents, self.account3.balance_cents, self.account2.balance_cents), 
+        "Incorrect balances in cents after transfer and withdrawal")
+
+
+    def test_cents_rejections(self):
+        """
+        11.3 Invalid operations in cents mode
+
+        Checking that cents accounts raise the same errors as BankAccount.
+        """
+        with self.assertRaises(AssertionError, 
+        msg="Expected an Assertion error to be raised when cents account has insufficient balance. Either no error or the incorrect error was raised."):
+            self.account3.withdraw(50.00)
+
+        self.account1.set_transaction_limit(500)
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a Limit error to be raised when transferring more than the limit. Either no error or the incorrect error was raised."):
+            self.account1.transfer_to(self.account2, 500.01)
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when transferring to a float account. Either no error or the incorrect error was raised."):
+            self.account1.transfer_to(BankAccount("Rupert", 10), 5)
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when depositing a negative amount. Either no error or the incorrect error was raised."):
+            self.account1.deposit(-0.01)
+
+        self.account2.ban_account("Suspicious activity")
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an Operations error to be raised when depositing to a banned cents account. Either no error or the incorrect error was raised."):
+            self.account2.deposit(10)
+
+
+    def test_cents_str(self):
+        """
+        11.4 Formatting cents accounts
+
+        Checking that cents accounts format exactly like BankAccount.
+        """
+        account = CentsBankAccount("CC", 10**7)
+        account.set_transaction_limit(10)
+        self.assertEqual("CC's account (1048): Balance=$10,000,049.99 | Limit=$10.00 | Banned=No", str(account), 
+        "Incorrect implentation of __str__ method for cents account")
+
+        self.account3.ban_account("Fraud")
+        self.assertEqual("Robert Downey Jr.'s account (1047): Balance=$49.99 | Limit=$N/A | Banned=Yes | Ban Reason: Fraud", str(self.account3), 
+        "Incorrect implentation of __str__ method for banned cents account")
+
+
+class TestBanRegistry(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up an empty ban registry.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.registry = BanRegistry()
+
+
+    def tearDown(self):
+        """
+        Putting the plain dictionary back as BankAccount.banned_accounts.
+        """
+        BankAccount.banned_accounts = {}
+
+
+    def test_ban_and_unban(self):
+        """
+        12.1 Banning and unbanning single accounts
+
+        Checking that the registry behaves like a dictionary of account number -> reason.
+        """
+        self.registry[1045] = "Fraud"
+        self.registry[1050] = "Chargebacks"
+        self.registry[1045] = "Identity theft"
+
+        self.assertEqual({1045: "Identity theft", 1050: "Chargebacks"}, dict(self.registry), 
+        f"Incorrect contents of ban registry, received {dict(self.registry)}")
+
+        self.assertTrue(self.registry.is_banned(1050), "Account 1050 should be banned")
+        self.assertFalse(self.registry.is_banned(1046), "Account 1046 should not be banned")
+        self.assertFalse(self.registry.is_banned(10**9), "Account beyond the bitmap should not be banned")
+
+        del self.registry[1045]
+        self.assertEqual([1050], list(self.registry), 
+        f"Incorrect accounts after unbanning, received {list(self.registry)}")
+
+        with self.assertRaises(KeyError, 
+        msg="Expected a key error to be raised when unbanning an account that is not banned. Either no error or the incorrect error was raised."):
+            del self.registry[1045]
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when banning an account number below the first account number. Either no error or the incorrect error was raised."):
+            self.registry[1044] = "Fraud"
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when banning with a non-string reason. Either no error or the incorrect error was raised."):
+            self.registry[1046] = 404
+
+
+    def test_reason_interning(self):
+        """
+        12.2 Interning ban reasons
+
+        Checking that each distinct reason is stored once, however many accounts share it.
+        """
+        self.registry.ban_many(range(1045, 11045), "Dormant")
+        self.registry.ban_many([20000, 20001], "Fraud")
+
+        self.assertEqual(["Dormant", "Fraud"], self.registry.reasons, 
+        f"Incorrect interned reasons, received {self.registry.reasons}")
+
+        self.assertEqual(10002, len(self.registry), 
+        f"Incorrect number of banned accounts, expected 10002, received {len(self.registry)}")
+
+        self.registry.unban_many([1045, 1046, 30000])
+        self.assertEqual(10000, len(self.registry), 
+        f"Incorrect number of banned accounts after unban_many, expected 10000, received {len(self.registry)}")
+
+
+    def test_ranges(self):
+        """
+        12.3 Banning and unbanning ranges
+
+        Checking ranges that start and stop part way through a byte of the bitmap.
+        """
+        self.registry[1046] = "Fraud"
+        self.registry.ban_range(1048, 1100, "Cohort")
+
+        self.assertEqual(53, len(self.registry), 
+        f"Incorrect number of banned accounts after ban_range, expected 53, received {len(self.registry)}")
+
+        self.assertEqual(list(range(1048, 1100)), [number for number in self.registry if self.registry[number] == "Cohort"], 
+        "Incorrect accounts banned by ban_range")
+
+        self.registry.unban_range(1043, 1050)
+        self.registry.unban_range(1090, 10**6)
+
+        self.assertEqual(list(range(1050, 1090)), list(self.registry), 
+        "Incorrect accounts left after unban_range")
+
+        self.assertEqual(40, len(self.registry), 
+        f"Incorrect number of banned accounts after unban_range, expected 40, received {len(self.registry)}")
+
+
+    def test_unban_reason(self):
+        """
+        12.4 Unbanning by reason
+
+        Checking that only accounts banned for the given reason are unbanned.
+        """
+        self.registry.ban_range(1045, 1145, "Dormant")
+        self.registry.ban_many([1050, 1200], "Fraud")
+
+        self.assertEqual(99, self.registry.unban_reason("Dormant"), 
+        "Incorrect number of accounts unbanned by reason")
+
+        self.assertEqual({1050: "Fraud", 1200: "Fraud"}, dict(self.registry), 
+        f"Incorrect contents after unbanning by reason, received {dict(self.registry)}")
+
+        self.assertEqual(0, self.registry.unban_reason("Unknown"), 
+        "Unbanning an unknown reason should unban no accounts")
+
+
+    def test_installed_registry(self):
+        """
+        12.5 Using the registry as BankAccount.banned_accounts
+
+        Checking that BankAccount bans, ban checks, formatting and unban_all work with an installed registry.
+        """
+        BankAccount.banned_accounts = self.registry
+        account1 = BankAccount("Tom Cruise", 1000)
+        account2 = BankAccount("Glen Powell", 987.50)
+
+        account1.ban_account("Suspicious behavior")
+        self.assertTrue(account1.is_banned(), "Account 1045 should be banned")
+        self.assertEqual("Tom Cruise's account (1045): Balance=$1,049.99 | Limit=$N/A | Banned=Yes | Ban Reason: Suspicious behavior", str(account1), 
+        "Incorrect implentation of __str__ method with a ban registry")
+
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an Operations error to be raised when transferring to a banned account. Either no error or the incorrect error was raised."):
+            account2.transfer_to(account1, 10)
+
+        BankAccount.unban_all()
+        self.assertIs(self.registry, BankAccount.banned_accounts, "unban_all should keep the installed registry")
+        self.assertEqual({}, BankAccount.banned_accounts, "unban_all should unban every account")
+
+        account2.transfer_to(account1, 10)
+        self.assertAlmostEqual(1059.99, account1.balance, places=6, 
+        msg=f"Incorrect balance after transfer, received {account1.balance}")
+
+
+class TestFastBankAccount(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up fast accounts matching the BankAccount tests.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        FastBankAccount.debug = False
+        self.account1 = FastBankAccount("Tom Cruise", 1000)
+        self.account2 = FastBankAccount("Glen Powell", 987.50)
+        self.account3 = FastBankAccount("Robert Downey Jr.", 0)
+
+
+    def tearDown(self):
+        FastBankAccount.debug = False
+
+
+    def test_same_results(self):
+        """
+        13.1 Matching BankAccount results
+
+        Checking that the fast path gives the same balances as BankAccount, with and without debug checks.
+        """
+        for debug in (False, True):
+            FastBankAccount.debug = debug
+            BankAccount.set_next_account_number(1045)
+            fast = [FastBankAccount("A", 100), FastBankAccount("B", 50)]
+            plain = [BankAccount("A", 100), BankAccount("B", 50)]
+
+            for account, other in (fast, plain):
+                account.deposit(25.5)
+                account.withdraw(10)
+                account.transfer_to(other, 30)
+                other.transfer_to(account, 0)
+
+            self.assertEqual([account.balance for account in plain], [account.balance for account in fast], 
+            f"Fast path balances differ from BankAccount with debug={debug}")
+
+        self.account3.transfer_to(BankAccount("Rupert", 0), 20)
+        self.assertAlmostEqual(29.99, self.account3.balance, places=6, 
+        msg=f"Incorrect balance after transfer to a BankAccount, received {self.account3.balance}")
+
+
+    def test_fast_errors(self):
+        """
+        13.2 Fast path errors
+
+        Checking that each request is rejected with the same errors as BankAccount.
+        """
+        self.account1.set_transaction_limit(100)
+
+        with self.assertRaises(CustomInsufficientFundsError, 
+        msg="Expected an insufficient funds error to be raised when withdrawing more than the balance. Either no error or the incorrect error was raised."):
+            self.account3.withdraw(50)
+
+        with self.assertRaises(AssertionError, 
+        msg="Expected an Assertion error to be raised when transferring more than the balance. Either no error or the incorrect error was raised."):
+            self.account3.transfer_to(self.account2, 50)
+
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a limit error to be raised when transferring more than the transaction limit. Either no error or the incorrect error was raised."):
+            self.account1.transfer_to(self.account2, 101)
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when depositing a string. Either no error or the incorrect error was raised."):
+            self.account1.deposit("10")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when transferring to the same account. Either no error or the incorrect error was raised."):
+            self.account1.transfer_to(self.account1, 10)
+
+        self.account2.ban_account("Fraud")
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an Operations error to be raised when transferring to a banned account. Either no error or the incorrect error was raised."):
+            self.account1.transfer_to(self.account2, 10)
+
+        self.assertAlmostEqual(1049.99, self.account1.balance, places=6, 
+        msg=f"Balance should not change after rejected requests, received {self.account1.balance}")
+
+
+    def test_debug_invariants(self):
+        """
+        13.3 Debug invariant checks
+
+        Checking that a broken invariant is only caught when debug checks are enabled.
+        """
+        self.account1.balance = -5
+        self.account1.deposit(1)
+
+        FastBankAccount.debug = True
+        with self.assertRaises(AssertionError, 
+        msg="Expected an Assertion error to be raised for a negative balance in debug mode. Either no error or the incorrect error was raised."):
+            self.account1.deposit(1)
+
+
+    def test_optimized_mode(self):
+        """
+        13.4 Running with python -O
+
+        Checking that insufficient funds are still rejected when assert statements are stripped.
+        """
+        code = (
+            "from bank import BankAccount\n"
+            "from custom_errors import CustomInsufficientFundsError\n"
+            "account = BankAccount('A', 0)\n"
+            "try:\n"
+            "    account.withdraw(100)\n"
+            "except CustomInsufficientFundsError:\n"
+            "    print(account.balance)\n"
+        )
+        result = subprocess.run([sys.executable, "-O", "-c", code], capture_output=True, text=True, 
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+
+        self.assertEqual("49.99", result.stdout.strip(), 
+        f"Withdrawal of insufficient funds should be rejected under python -O, output: {result.stdout}{result.stderr}")
+
+
+    def test_rejected_credit(self):
+        """
+        13.5 Target rejecting the credit
+
+        Checking that a transfer leaves the source balance unchanged when the target account's deposit raises.
+        """
+        self.account1.balance = 1e18
+        target = LedgerBankAccount("Rupert", 0)
+        lines = len(LedgerBankAccount.ledger)
+
+        # A ledger line holds at most 2**63 - 1 cents, so the ledger account rejects the credit after the debit checks passed
+        with self.assertRaises(OverflowError, 
+        msg="Expected an overflow error to be raised when the target can not record the credit. Either no error or the incorrect error was raised."):
+            self.account1.transfer_to(target, 1e17)
+
+        self.assertEqual(1e18, self.account1.balance, f"Source balance should be restored when the credit fails, received {self.account1.balance}")
+        self.assertEqual((4999, lines), (target.balance_cents, len(LedgerBankAccount.ledger)), "Target should not be credited")
+
+
+class TestRequestProcessor(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and writing a small request file with valid and invalid requests.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.directory.name, "requests.jsonl")
+        self.output_path = os.path.join(self.directory.name, "results.jsonl")
+
+        lines = [
+            '{"op": "open", "owner": "Tom Cruise", "balance": 1000, "id": "r1"}',
+            '{"op": "open", "owner": "Glen Powell", "balance": 0}',
+            '',
+            '{"op": "transfer", "account": 1045, "target": 1046, "amount": 100}',
+            '{"op": "withdraw", "account": 1046, "amount": 1000}',
+            '{"op": "set_limit", "account": 1045, "limit": 50}',
+            '{"op": "withdraw", "account": 1045, "amount": 60}',
+            '{"op": "ban", "account": 1046, "reason": "Fraud"}',
+            '{"op": "deposit", "account": 1046, "amount": 5}',
+            '{"op": "deposit", "account": 9999, "amount": 5}',
+            'not json',
+            '{"op": "fly"}',
+        ]
+
+        with open(self.input_path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def read_results(self) -> list:
+        with open(self.output_path) as file:
+            return [json.loads(line) for line in file]
+
+
+    def test_results(self):
+        """
+        14.1 Processing a request file
+
+        Checking the result written for every request, including rejected and unparsable requests.
+        """
+        processor = request_processor.process_file(self.input_path, self.output_path, chunk_lines=4)
+        results = self.read_results()
+
+        self.assertEqual([1, 2, 4, 5, 6, 7, 8, 9, 10, 11, 12], [result["line"] for result in results], 
+        "Every non-blank line should have exactly one result, in order")
+
+        self.assertEqual({"line": 1, "id": "r1", "ok": True, "account": 1045, "balance": 1049.99}, results[0], 
+        f"Incorrect result for opening an account, received {results[0]}")
+
+        errors = [result.get("error") for result in results if not result["ok"]]
+        self.assertEqual(["CustomInsufficientFundsError", "CustomLimitError", "CustomBannedError", "CustomKeyError", "CustomValueError", "CustomValueError"], errors, 
+        f"Incorrect errors for rejected requests, received {errors}")
+
+        self.assertEqual((11, 6), (processor.processed, processor.failed), 
+        f"Incorrect request counts, received {(processor.processed, processor.failed)}")
+
+        self.assertAlmostEqual(149.99, processor.accounts[1046].balance, places=6, 
+        msg=f"Incorrect final balance of Account 1046, received {processor.accounts[1046].balance}")
+
+
+    def test_process_pool(self):
+        """
+        14.2 Parsing in a process pool
+
+        Checking that parsing in a process pool gives the same results as parsing in process.
+        """
+        request_processor.process_file(self.input_path, self.output_path, chunk_lines=3)
+        expected = self.read_results()
+
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        request_processor.process_file(self.input_path, self.output_path, chunk_lines=3, workers=2)
+
+        self.assertEqual(expected, self.read_results(), 
+        "Results should not depend on the number of parsing processes")
+
+
+    def test_invalid_account_class(self):
+        """
+        14.3 Invalid account class
+
+        Checking that a processor only accepts BankAccount classes.
+        """
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when the account class is not a BankAccount class. Either no error or the incorrect error was raised."):
+            request_processor.RequestProcessor(dict)
+
+
+    def test_standard_output(self):
+        """
+        14.4 Writing results to standard output
+
+        Checking that the command line writes results to sys.stdout by default and leaves it open.
+        """
+        request_processor.process_file(self.input_path, self.output_path)
+        expected = self.read_results()
+
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        output, summary = io.StringIO(), io.StringIO()
+
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(summary):
+            self.assertEqual(0, request_processor.main([self.input_path]), "The command line should exit with status 0")
+
+        self.assertFalse(output.closed, "Standard output should be left open")
+        self.assertEqual(expected, [json.loads(line) for line in output.getvalue().splitlines()], 
+        "Results written to standard output should match the results written to a file")
+        self.assertEqual("Processed 11 requests, 6 failed\n", summary.getvalue(), f"Incorrect summary, received {summary.getvalue()!r}")
+
+
+class TestShardedLedger(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Starting a ledger with 3 shards and opening 6 accounts, two per shard.
+        """
+        self.ledger = ShardedLedger(3)
+        self.accounts = self.ledger.execute([("open", "Owner", 100)] * 6)
+
+
+    def tearDown(self):
+        self.ledger.close()
+
+
+    def test_matches_account_store(self):
+        """
+        15.1 Matching a single AccountStore
+
+        Checking that operations sent one at a time give the same results and balances as one AccountStore.
+        """
+        store = AccountStore()
+        for _ in range(6):
+            store.open_account("Owner", 100)
+
+        rng = random.Random(3)
+        operations = [("ban", 1050, "Fraud"), ("set_limit", 1046, 40), ("transfer", 1045, 1045, 1), ("deposit", 2000, 1), ("withdraw", 1045, "1")]
+
+        for _ in range(300):
+            source, target = 1045 + rng.randrange(6), 1045 + rng.randrange(6)
+            operations.append(rng.choice([("deposit", source, rng.randrange(50)), ("withdraw", source, rng.randrange(80)), 
+                                          ("transfer", source, target, rng.randrange(120))]))
+
+        methods = {"ban": store.ban_account, "set_limit": store.set_transaction_limit, "deposit": store.deposit, 
+                   "withdraw": store.withdraw, "transfer": store.transfer}
+
+        for operation in operations:
+            (result,) = self.ledger.execute([operation])
+            expected = None
+
+            try:
+                methods[operation[0]](*operation[1:])
+
+            except Exception as error:
+                expected = error
+
+            self.assertEqual((type(expected), str(expected)), (type(result), str(result)), 
+            f"Incorrect result for {operation}, expected {expected!r}, received {result!r}")
+
+        balances = [self.ledger.balance(account_number) for account_number in self.accounts]
+        self.assertEqual(list(store.balances), balances, 
+        f"Sharded balances differ from AccountStore balances, received {balances}")
+
+
+    def test_cross_shard_transfers(self):
+        """
+        15.2 Transfers between shards
+
+        Checking that failed transfers between shards return the money, report the same error as
+        AccountStore and that a batch conserves money.
+        """
+        self.ledger.ban_account(1046, "Fraud")
+
+        results = self.ledger.execute([
+            ("transfer", 1045, 1046, 10),
+            ("transfer", 1045, 1046, 10_000),
+            ("transfer", 1045, 1047, 10_000),
+            ("transfer", 1045, 1047, 30),
+            ("transfer", 1047, 9999, 1),
+        ])
+
+        self.assertEqual([CustomBannedError, CustomBannedError, CustomInsufficientFundsError, type(None), CustomKeyError], 
+        [type(result) for result in results], f"Incorrect results for transfers between shards, received {results}")
+
+        self.assertAlmostEqual(119.99, self.ledger.balance(1045), places=6, 
+        msg="Only the successful transfer should change the balance of Account 1045")
+        self.assertAlmostEqual(179.99, self.ledger.balance(1047), places=6, 
+        msg="Only the successful transfer should change the balance of Account 1047")
+
+        rng = random.Random(5)
+        batch = [("transfer", 1045 + rng.randrange(6), 1045 + rng.randrange(6), rng.randrange(60)) for _ in range(2000)]
+        self.ledger.execute(batch)
+
+        total = sum(self.ledger.balance(account_number) for account_number in self.accounts)
+        self.assertAlmostEqual(6 * 149.99, total, places=6, 
+        msg=f"Transfers between shards should conserve money, expected {6 * 149.99}, received {total}")
+
+
+    def test_batch_matches_account_store(self):
+        """
+        15.4 Rejected transfers between shards within a batch
+
+        Checking that a rejected transfer between shards holds no money, so later operations in the
+        same batch get the same results and balances as one AccountStore.
+        """
+        store = AccountStore()
+        for _ in range(6):
+            store.open_account("Owner", 100)
+
+        operations = [("ban", 1046, "Fraud"), ("transfer", 1045, 1046, 10), ("withdraw", 1045, 140), ("ban", 1047, "Fraud"),
+                      ("transfer", 1048, 1047, 100), ("withdraw", 1048, 149.99), ("transfer", 1049, 2000, 1), ("transfer", 1049, "1050", 1),
+                      ("ban", 1047, "Again"), ("unban_all",), ("transfer", 1050, 1046, 20), ("ban", 1049, 5), ("transfer", 1050, 1049, 20)]
+
+        methods = {"ban": store.ban_account, "withdraw": store.withdraw, "transfer": store.transfer, "unban_all": store.unban_all}
+        expected = []
+
+        for operation in operations:
+            try:
+                methods[operation[0]](*operation[1:])
+                expected.append(None)
+
+            except Exception as error:
+                expected.append(error)
+
+        results = self.ledger.execute(operations)
+
+        self.assertEqual([(type(error), str(error)) for error in expected], [(type(result), str(result)) for result in results], 
+        f"Incorrect results for the batch, expected {expected!r}, received {results!r}")
+
+        balances = [self.ledger.balance(account_number) for account_number in self.accounts]
+        self.assertEqual(list(store.balances), balances, f"Sharded balances differ from AccountStore balances, received {balances}")
+
+
+    def test_credits_in_batch_order(self):
+        """
+        15.5 Credits between shards in batch order
+
+        Checking that later operations in a batch see money moved between shards earlier in the
+        same batch, and that a shard only keeps columns for the accounts it owns.
+        """
+        store = AccountStore()
+        for _ in range(6):
+            store.open_account("Owner", 100)
+
+        operations = [("transfer", 1045, 1046, 100), ("withdraw", 1046, 100), ("transfer", 1046, 1047, 149.99), ("balance", 1047),
+                      ("transfer", 1047, 1048, 249.99), ("withdraw", 1048, 300), ("deposit", 1045, 1), ("transfer", 1048, 1045, 50)]
+
+        methods = {"withdraw": store.withdraw, "deposit": store.deposit, "transfer": store.transfer, 
+                   "balance": lambda account_number: store[account_number].balance}
+        expected = []
+
+        for operation in operations:
+            try:
+                expected.append(methods[operation[0]](*operation[1:]))
+
+            except Exception as error:
+                expected.append(error)
+
+        results = self.ledger.execute(operations)
+
+        self.assertEqual([(type(error), str(error)) for error in expected], [(type(result), str(result)) for result in results], 
+        f"Incorrect results for the batch, expected {expected!r}, received {results!r}")
+
+        balances = [self.ledger.balance(account_number) for account_number in self.accounts]
+        self.assertEqual(list(store.balances), balances, f"Sharded balances differ from AccountStore balances, received {balances}")
+
+        shard_store = _ShardStore(1, 3, 1045)
+        shard_store.open_at(1046, "Owner", 100)
+        shard_store.open_at(1049, "Owner", 100)
+
+        self.assertEqual(2, len(shard_store.owners), f"A shard should keep one row per owned account, received {len(shard_store.owners)}")
+        self.assertEqual([1046, 1049], [view.account_number for view in shard_store], "A shard should iterate its own accounts")
+        self.assertNotIn(1047, shard_store, "A shard should not report accounts of other shards")
+
+
+    def test_ledger_errors(self):
+        """
+        15.3 Ledger errors
+
+        Checking errors raised by single operations and by invalid or closed ledgers.
+        """
+        self.assertEqual([1045, 1046, 1047, 1048, 1049, 1050], self.accounts, 
+        f"Incorrect account numbers, received {self.accounts}")
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when opening an account with a non-string owner. Either no error or the incorrect error was raised."):
+            self.ledger.open_account(5, 100)
+
+        self.assertEqual(1051, self.ledger.open_account("Owner", 0), 
+        "A rejected opening should not use up an account number")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised for zero shards. Either no error or the incorrect error was raised."):
+            ShardedLedger(0)
+
+        self.ledger.close()
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an Operations error to be raised when using a closed ledger. Either no error or the incorrect error was raised."):
+            self.ledger.deposit(1045, 1)
+
+
+class TestBlockAllocator(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and creating a high-water mark file in a temporary directory.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "accounts.hwm")
+
+
+    def tearDown(self):
+        AllocatedBankAccount.allocator = None
+        self.directory.cleanup()
+
+
+    def test_blocks(self):
+        """
+        16.1 Reserving blocks
+
+        Checking that allocators sharing a file get disjoint blocks, and that numbers continue after a restart.
+        """
+        worker1 = BlockAllocator(self.path, block_size=10)
+        worker2 = BlockAllocator(self.path, block_size=10)
+
+        numbers1 = [worker1.allocate() for _ in range(15)]
+        numbers2 = [worker2.allocate() for _ in range(5)]
+
+        self.assertEqual(list(range(1045, 1060)), numbers1, f"Incorrect numbers from first allocator, received {numbers1}")
+        self.assertEqual(list(range(1065, 1070)), numbers2, 
+        f"Second allocator should use its own block, received {numbers2}")
+
+        restarted = BlockAllocator(self.path, block_size=10)
+        self.assertEqual(1075, restarted.allocate(), "Allocator after a restart should start after the high-water mark")
+        self.assertEqual(1085, restarted.high_water_mark, f"Incorrect high-water mark, received {restarted.high_water_mark}")
+        self.assertEqual(1, restarted.blocks, f"Incorrect number of reserved blocks, received {restarted.blocks}")
+
+
+    def test_processes(self):
+        """
+        16.2 Allocating from several processes
+
+        Checking that processes sharing a file never hand out the same account number.
+        """
+        def allocate(path, queue):
+            allocator = BlockAllocator(path, block_size=7)
+            queue.put([allocator.allocate() for _ in range(200)])
+
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        processes = [context.Process(target=allocate, args=(self.path, queue)) for _ in range(4)]
+
+        for process in processes:
+            process.start()
+
+        numbers = [number for _ in processes for number in queue.get(timeout=30)]
+
+        for process in processes:
+            process.join(timeout=30)
+
+        self.assertEqual(800, len(set(numbers)), "Account numbers from different processes must be unique")
+
+
+    def test_allocated_accounts(self):
+        """
+        16.3 Opening accounts with an allocator
+
+        Checking that AllocatedBankAccount numbers come from the allocator and that set_next_account_number still resets them.
+        """
+        self.assertEqual(1045, AllocatedBankAccount("Tom Cruise", 1000).account_number, 
+        "Without an allocator, accounts should use the BankAccount counter")
+
+        AllocatedBankAccount.allocator = BlockAllocator(self.path, block_size=100)
+        AllocatedBankAccount.set_next_account_number(5000)
+        accounts = [AllocatedBankAccount("Owner", 10) for _ in range(3)]
+
+        self.assertEqual([5000, 5001, 5002], [account.account_number for account in accounts], 
+        "Incorrect account numbers from the allocator")
+
+        self.assertEqual(1046, BankAccount("Glen Powell", 0).account_number, 
+        "Allocated accounts should not use the BankAccount counter")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when setting the next account number below 1045. Either no error or the incorrect error was raised."):
+            AllocatedBankAccount.set_next_account_number(1000)
+
+        AllocatedBankAccount.set_next_account_number(1045)
+        self.assertEqual(1045, AllocatedBankAccount("Owner", 10).account_number, 
+        "set_next_account_number should reset the allocator")
+
+
+class TestAccountHistory(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and creating a temporary directory for spill files.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.directory = tempfile.TemporaryDirectory()
+
+
+    def tearDown(self):
+        HistoryBankAccount.history_directory = None
+        HistoryBankAccount.history_memory_limit = 100_000
+        self.directory.cleanup()
+
+
+    def test_time_range_queries(self):
+        """
+        17.1 Querying postings by time
+
+        Checking postings between two times and balances as of a time.
+        """
+        history = AccountHistory(1045)
+
+        for timestamp, amount in ((10, 100), (20, 50), (20, -30), (35, 5)):
+            history.record(transaction_log.DEPOSIT, amount, (history.balances[-1] if history.balances else 0) + amount, 0, timestamp)
+
+        self.assertEqual([20, 20, 35], [posting.timestamp for posting in history.postings(15, 35)], 
+        "Incorrect postings between times 15 and 35")
+
+        self.assertEqual([], history.postings(36, 100), "There should be no postings after the last one")
+
+        self.assertEqual([0.0, 100, 120, 120, 125], [history.balance_at(time) for time in (5, 10, 20, 34.9, 1000)], 
+        "Incorrect balances as of times 5, 10, 20, 34.9 and 1000")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when recording a posting earlier than the last one. Either no error or the incorrect error was raised."):
+            history.record(transaction_log.DEPOSIT, 1, 126, 0, 30)
+
+
+    def test_spill_to_disk(self):
+        """
+        17.2 Spilling older postings to disk
+
+        Checking that queries give the same answers when older postings have been moved to disk.
+        """
+        history = AccountHistory(1045, os.path.join(self.directory.name, "1045.history"), memory_limit=8)
+        expected = []
+        balance = 0
+
+        for index in range(100):
+            balance += index
+            history.record(transaction_log.DEPOSIT, index, balance, 7, index // 3)
+            expected.append((index // 3, balance))
+
+        self.assertLessEqual(len(history.timestamps), 8, f"History keeps {len(history.timestamps)} postings in memory, limit is 8")
+        self.assertEqual(100, len(history), f"Incorrect number of postings, received {len(history)}")
+
+        found = [(posting.timestamp, posting.balance) for posting in history.postings(5, 30)]
+        self.assertEqual([entry for entry in expected if 5 <= entry[0] <= 30], found, 
+        "Incorrect postings spanning spilled and in-memory postings")
+
+        self.assertEqual([balance for time, balance in expected if time <= 12][-1], history.balance_at(12.5), 
+        "Incorrect balance as of a time in the spilled postings")
+        history.close()
+
+        # Spilled histories only open their file while it is read or written
+        descriptors = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+        histories = [AccountHistory(number, os.path.join(self.directory.name, f"{number}.history"), memory_limit=2) for number in range(2000, 2050)]
+
+        for history in histories:
+            for index in range(5):
+                history.record(transaction_log.DEPOSIT, 1, index, 0, index)
+
+        self.assertEqual([4] * 50, [history.spilled for history in histories], "Every history should have spilled postings")
+
+        if descriptors is not None:
+            self.assertEqual(descriptors, len(os.listdir("/proc/self/fd")), "Spilled histories should not keep their files open")
+
+
+    def test_history_bank_account(self):
+        """
+        17.3 Recording account operations
+
+        Checking that successful operations are recorded once, with the balance after each, and failed ones are not.
+        """
+        HistoryBankAccount.history_directory = self.directory.name
+        HistoryBankAccount.history_memory_limit = 3
+        account1 = HistoryBankAccount("Tom Cruise", 1000)
+        account2 = HistoryBankAccount("Glen Powell", 0)
+
+        account1.deposit(50)
+        account1.withdraw(20)
+        account1.transfer_to(account2, 30)
+
+        with self.assertRaises(AssertionError, 
+        msg="Expected an Assertion error to be raised when withdrawing more than the balance. Either no error or the incorrect error was raised."):
+            account2.withdraw(1000)
+
+        postings = account1.history.postings(0, time.time() + 1)
+        self.assertEqual([transaction_log.OPEN, transaction_log.DEPOSIT, transaction_log.WITHDRAW, transaction_log.TRANSFER], 
+        [posting.kind for posting in postings], f"Incorrect postings for Account 1045, received {postings}")
+
+        self.assertEqual((-30, 1046), (postings[-1].amount, postings[-1].counterparty), 
+        "Transfer should be recorded with a negative amount and the target account")
+
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, "1045.history")), 
+        "Postings beyond the memory limit should be spilled to disk")
+
+        self.assertEqual([account1.balance, account2.balance], [account1.history.balance_at(time.time() + 1), account2.history.balance_at(time.time() + 1)], 
+        "Latest balance in the history should match the account balance")
+
+
+    def test_transfer_after_clock_set_back(self):
+        """
+        17.4 Transfers when the clock is set back
+
+        Checking that a transfer after a later posting on either side is recorded on both sides in time order.
+        """
+        account1 = HistoryBankAccount("Tom Cruise", 1000)
+        account2 = HistoryBankAccount("Glen Powell", 0)
+        later = time.time() + 1000
+        account2.history.record(transaction_log.DEPOSIT, 0, account2.balance, 0, later)
+
+        account1.transfer_to(account2, 30)
+
+        self.assertEqual((later, later), (account1.history.last_timestamp(), account2.history.last_timestamp()), 
+        "Transfer should be recorded no earlier than the last posting of either account")
+        self.assertEqual([account1.balance, account2.balance], [account1.history.balance_at(later), account2.history.balance_at(later)], 
+        "Histories should match the account balances after the transfer")
+
+
+class TestBookMetrics(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and giving metered accounts fresh metrics.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        MeteredBankAccount.metrics = BookMetrics((0, 100, 1_000))
+        self.accounts = [MeteredBankAccount("Owner", balance) for balance in (0, 50, 500, 5_000, 950)]
+
+
+    def test_aggregates_follow_operations(self):
+        """
+        18.1 Keeping aggregates up to date
+
+        Checking totals, histogram and top balances against a full scan after random operations.
+        """
+        metrics = MeteredBankAccount.metrics
+        outside = BankAccount("Outside", 1_000)
+        rng = random.Random(11)
+
+        for _ in range(500):
+            account, other = rng.sample(self.accounts, 2)
+            operation = rng.randrange(4)
+
+            try:
+                if operation == 0:
+                    account.deposit(rng.randrange(300))
+                elif operation == 1:
+                    account.withdraw(rng.randrange(300))
+                elif operation == 2:
+                    account.transfer_to(other, rng.randrange(300))
+                else:
+                    outside.transfer_to(account, rng.randrange(10))
+            except AssertionError:
+                pass
+
+        balances = [account.balance for account in self.accounts]
+
+        self.assertAlmostEqual(sum(balances), metrics.total_balance, places=6, 
+        msg=f"Incorrect total balance, expected {sum(balances)}, received {metrics.total_balance}")
+
+        expected_histogram = [(0, sum(balance < 100 for balance in balances)), (100, sum(100 <= balance < 1_000 for balance in balances)), 
+                              (1_000, sum(balance >= 1_000 for balance in balances))]
+        self.assertEqual(expected_histogram, metrics.histogram(), f"Incorrect histogram, received {metrics.histogram()}")
+
+        expected_top = sorted(((account.account_number, account.balance) for account in self.accounts), key=lambda entry: (entry[1], entry[0]), reverse=True)[:3]
+        self.assertEqual(expected_top, metrics.top(3), f"Incorrect top balances, received {metrics.top(3)}")
+        self.assertEqual(5, metrics.account_count, f"Incorrect account count, received {metrics.account_count}")
+
+        self.accounts[0].deposit(10**6)
+        self.assertEqual((self.accounts[0].account_number, self.accounts[0].balance), metrics.top(1)[0], 
+        f"Changes after a read should be taken in by the next read, received {metrics.top(1)}")
+
+
+    def test_ban_counts(self):
+        """
+        18.2 Counting banned accounts
+
+        Checking the banned account count after bans, a failed ban and unban_all.
+        """
+        metrics = MeteredBankAccount.metrics
+        self.accounts[0].ban_account("Fraud")
+        self.accounts[1].ban_account("Fraud")
+
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an Operations error to be raised when banning an account twice. Either no error or the incorrect error was raised."):
+            self.accounts[1].ban_account("Again")
+
+        self.assertEqual(2, metrics.banned_count, f"Incorrect banned count, received {metrics.banned_count}")
+
+        MeteredBankAccount.unban_all()
+        self.assertEqual(0, metrics.banned_count, f"Incorrect banned count after unban_all, received {metrics.banned_count}")
+
+        self.accounts[2].ban_account("Fraud")
+        BankAccount.unban_all()
+        self.assertEqual(0, metrics.banned_count, f"Incorrect banned count after BankAccount.unban_all, received {metrics.banned_count}")
+
+
+    def test_invalid_metrics(self):
+        """
+        18.3 Invalid metrics arguments
+
+        Checking errors for invalid bucket edges and top counts.
+        """
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised for bucket edges that do not start at 0. Either no error or the incorrect error was raised."):
+            BookMetrics((10, 100))
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised for a non-integer top count. Either no error or the incorrect error was raised."):
+            MeteredBankAccount.metrics.top("3")
+
+        self.assertEqual([], MeteredBankAccount.metrics.top(0), "Top 0 accounts should be empty")
+
+
+class TestVelocityLimits(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up a velocity account with a controllable clock.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.now = 1_000_000.0
+        VelocityBankAccount.clock = lambda: self.now
+        self.account1 = VelocityBankAccount("Tom Cruise", 1000)
+        self.account2 = VelocityBankAccount("Glen Powell", 987.50)
+
+
+    def tearDown(self):
+        VelocityBankAccount.clock = time.monotonic
+
+
+    def test_amount_window(self):
+        """
+        19.1 Rolling amount limit
+
+        Checking that withdrawals and transfers share an hourly amount limit that frees up as the window rolls.
+        """
+        self.account1.set_velocity_limit(3600, max_amount=500)
+        self.account1.withdraw(200)
+        self.account1.transfer_to(self.account2, 250)
+
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a limit error to be raised when exceeding the rolling amount limit. Either no error or the incorrect error was raised."):
+            self.account1.withdraw(100)
+
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a limit error to be raised when a transfer exceeds the rolling amount limit. Either no error or the incorrect error was raised."):
+            self.account1.transfer_to(self.account2, 51)
+
+        self.assertAlmostEqual(599.99, self.account1.balance, places=6, 
+        msg=f"Rejected requests should not change the balance, received {self.account1.balance}")
+
+        self.account2.withdraw(900)
+
+        self.now += 3600
+        self.account1.withdraw(100)
+        self.assertAlmostEqual(499.99, self.account1.balance, places=6, 
+        msg=f"Withdrawal should be allowed after the window has rolled, received {self.account1.balance}")
+
+
+    def test_count_and_multiple_windows(self):
+        """
+        19.2 Rolling count limit and several windows
+
+        Checking a count limit per minute together with a daily amount limit, and that failed withdrawals are not counted.
+        """
+        self.account1.set_velocity_limit(60, max_count=2)
+        self.account1.set_velocity_limit(86_400, max_amount=300)
+
+        self.account1.withdraw(250)
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when withdrawing a negative amount. Either no error or the incorrect error was raised."):
+            self.account1.withdraw(-5)
+
+        self.account1.withdraw(10)
+
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a limit error to be raised when exceeding the rolling count limit. Either no error or the incorrect error was raised."):
+            self.account1.withdraw(10)
+
+        self.now += 60
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a limit error to be raised when exceeding the daily amount limit. Either no error or the incorrect error was raised."):
+            self.account1.withdraw(50)
+
+        self.account1.set_velocity_limit(86_400)
+        self.account1.withdraw(50)
+        self.assertEqual([60], list(self.account1.velocity_limits), "Removing a limit should drop its window")
+
+
+    def test_rolling_counter(self):
+        """
+        19.3 Ring buckets
+
+        Checking that the counter only keeps the buckets of the current window.
+        """
+        counter = RollingCounter(60, buckets=6)
+
+        for second in range(0, 120, 5):
+            counter.advance(second)
+            counter.add(1)
+
+        self.assertEqual(12, counter.total_count, f"Window of 6 buckets of 10s should hold 12 transactions, received {counter.total_count}")
+        counter.advance(10_000)
+        self.assertEqual((0, 0.0), (counter.total_count, counter.total_amount), "An idle counter should be empty")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised for a window that is not positive. Either no error or the incorrect error was raised."):
+            self.account1.set_velocity_limit(0, max_amount=10)
+
+
+    def test_shared_windows(self):
+        """
+        19.4 Windows in shared columns
+
+        Checking that windows are rows of the shared columns, that released rows are reused empty, and that
+        accounts keep the windows they were opened with.
+        """
+        self.account1.set_velocity_limit(60, max_count=1)
+        windows = RollingWindows(4)
+        VelocityBankAccount.windows = windows
+
+        try:
+            account3 = VelocityBankAccount("Rupert", 100)
+            account4 = VelocityBankAccount("Adam", 100)
+            account3.set_velocity_limit(3600, max_amount=50)
+            account3.set_velocity_limit(60, max_count=5)
+            account3.withdraw(20)
+
+        finally:
+            VelocityBankAccount.windows = RollingWindows(VelocityBankAccount.buckets)
+
+        self.assertEqual(((0, 1), [20.0, 20.0]), (account3.velocity_rows, list(windows.total_amounts)), "Each window should be a row of the shared columns")
+
+        account3.set_velocity_limit(3600)
+        account4.set_velocity_limit(86_400, max_amount=10)
+        self.assertEqual(((1,), (0,)), (account3.velocity_rows, account4.velocity_rows), "A removed window's row should be reused")
+        self.assertEqual((0.0, 0), (windows.total_amounts[0], windows.total_counts[0]), "A reused row should start empty")
+
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a limit error to be raised when exceeding the limit of a reused row. Either no error or the incorrect error was raised."):
+            account4.withdraw(11)
+
+        del account3
+        self.assertEqual(([10, None], [None, None], 2), (windows.max_amounts, windows.max_counts, len(windows.window_seconds)), 
+        "A deleted account should release its rows")
+
+        self.account1.withdraw(1)
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a limit error to be raised by a window set before the columns were replaced. Either no error or the incorrect error was raised."):
+            self.account1.withdraw(1)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up instrumentation and accounts.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.instrumentation = Instrumentation()
+        self.account1 = BankAccount("Tom Cruise", 1000)
+        self.account2 = BankAccount("Glen Powell", 987.50)
+
+
+    def tearDown(self):
+        self.instrumentation.disable()
+
+
+    def test_counts_and_errors(self):
+        """
+        20.1 Call and error counts
+
+        Checking that enabled instrumentation counts calls and errors by class, and that disabling restores BankAccount.
+        """
+        original_withdraw = BankAccount.withdraw
+
+        with self.instrumentation as instrumentation:
+            self.account1.deposit(100)
+            self.account1.withdraw(50)
+            self.account1.transfer_to(self.account2, 25)
+
+            with self.assertRaises(CustomValueError, 
+            msg="Expected a value error to be raised when depositing a negative amount. Either no error or the incorrect error was raised."):
+                self.account1.deposit(-1)
+
+            with self.assertRaises(CustomInsufficientFundsError, 
+            msg="Expected an insufficient funds error to be raised when withdrawing more than the balance. Either no error or the incorrect error was raised."):
+                self.account2.withdraw(10**6)
+
+        snapshot = instrumentation.snapshot()
+        operations = snapshot["operations"]
+
+        self.assertFalse(snapshot["enabled"], "Instrumentation should be disabled after the with block")
+        self.assertIs(original_withdraw, BankAccount.withdraw, "Disabling should restore the original method")
+        self.assertEqual((3, 3, 1), (operations["deposit"]["count"], operations["withdraw"]["count"], operations["transfer_to"]["count"]),
+                         "Deposits and withdrawals inside the transfer should be counted")
+        self.assertEqual({"CustomValueError": 1}, operations["deposit"]["errors"], f"Received {operations['deposit']['errors']}")
+        self.assertEqual({"CustomInsufficientFundsError": 1}, operations["withdraw"]["errors"], f"Received {operations['withdraw']['errors']}")
+
+        self.account1.deposit(1)
+        self.assertEqual(3, instrumentation.histograms["deposit"].count, "Disabled instrumentation should not record")
+
+
+    def test_histogram(self):
+        """
+        20.2 Latency histogram precision
+
+        Checking that percentiles are within the bucket precision of the exact values.
+        """
+        histogram = LatencyHistogram(sub_bucket_bits=5)
+        rng = random.Random(3)
+        values = [rng.randrange(10**7) for _ in range(5_000)]
+
+        for value in values:
+            histogram.record(value)
+
+        values.sort()
+
+        for percent in (50, 90, 99):
+            exact = values[-(-len(values) * percent // 100) - 1]
+            self.assertLessEqual(abs(histogram.percentile(percent) - exact), exact / 32,
+                                 f"p{percent} should be within 1/32 of {exact}, received {histogram.percentile(percent)}")
+
+        self.assertEqual((values[0], values[-1], len(values)), (histogram.minimum, histogram.percentile(100), sum(count for _, count in histogram.buckets())),
+                         "Minimum, maximum and bucket counts should match the recorded values")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised for a percentile above 100. Either no error or the incorrect error was raised."):
+            histogram.percentile(101)
+
+
+    def test_export_and_subclass(self):
+        """
+        20.3 Text export and subclasses
+
+        Checking the Prometheus text export, instrumenting a subclass, and that enabling twice is rejected.
+        """
+        self.instrumentation.enable(FastBankAccount)
+        fast = FastBankAccount("Miles Teller", 10)
+        fast.deposit(5)
+        fast.is_banned()
+
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an operation error to be raised when enabling instrumentation twice. Either no error or the incorrect error was raised."):
+            self.instrumentation.enable()
+
+        self.account1.deposit(5)
+        self.instrumentation.disable()
+        self.assertNotIn("is_banned", FastBankAccount.__dict__, "Disabling should remove wrappers of inherited methods")
+
+        text = self.instrumentation.export_text()
+        self.assertIn('bank_operations_total{operation="deposit"} 1', text, "Only the subclass deposit should be counted")
+        self.assertIn('bank_operations_total{operation="is_banned"} 1', text, "Inherited methods should be counted")
+        self.assertIn('bank_operation_latency_seconds_count{operation="deposit"} 1', text, "Histogram count should be exported")
+
+
+    def test_try_methods(self):
+        """
+        20.4 Instrumented try_ methods
+
+        Checking that the try_ methods of an instrumented class go through the instrumented operations, rejections included.
+        """
+        with self.instrumentation as instrumentation:
+            self.assertTrue(self.account1.try_deposit(100), "Instrumented deposit should succeed")
+            self.assertEqual(Status.INSUFFICIENT_FUNDS, self.account2.try_withdraw(10**6).status, "Instrumented withdrawal should be rejected")
+            self.assertTrue(self.account1.try_transfer_to(self.account2, 25), "Instrumented transfer should succeed")
+
+        operations = instrumentation.snapshot()["operations"]
+        counts = {name: operations[name]["count"] for name in ("deposit", "withdraw", "transfer_to")}
+
+        self.assertEqual({"deposit": 2, "withdraw": 2, "transfer_to": 1}, counts, f"try_ calls should be counted, received {counts}")
+        self.assertEqual({"CustomInsufficientFundsError": 1}, operations["withdraw"]["errors"], "Rejected try_ calls should be counted as errors")
+        self.assertAlmostEqual(1124.99, self.account1.balance, places=6, msg=f"Instrumented try_ calls should change the balance, received {self.account1.balance}")
+        self.assertAlmostEqual(1062.49, self.account2.balance, places=6, msg=f"Instrumented transfer should credit the target, received {self.account2.balance}")
+
+
+class TestResults(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up accounts.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.account1 = BankAccount("Tom Cruise", 1000)
+        self.account2 = BankAccount("Glen Powell", 987.50)
+
+
+    def tearDown(self):
+        VelocityBankAccount.clock = time.monotonic
+
+
+    def test_try_methods(self):
+        """
+        21.1 Result mode
+
+        Checking that the try_ methods return the status of every rejection with the message the raising methods use.
+        """
+        self.account1.set_transaction_limit(500)
+        self.account2.ban_account("Fraud")
+
+        cases = [
+            (lambda: self.account1.try_deposit("100"), lambda: self.account1.deposit("100"), Status.INVALID_TYPE),
+            (lambda: self.account1.try_deposit(-1), lambda: self.account1.deposit(-1), Status.INVALID_VALUE),
+            (lambda: self.account1.try_withdraw(2000), lambda: self.account1.withdraw(2000), Status.INSUFFICIENT_FUNDS),
+            (lambda: self.account1.try_withdraw(600), lambda: self.account1.withdraw(600), Status.LIMIT_EXCEEDED),
+            (lambda: self.account2.try_withdraw(10), lambda: self.account2.withdraw(10), Status.BANNED),
+            (lambda: self.account1.try_transfer_to(self.account1, 10), lambda: self.account1.transfer_to(self.account1, 10), Status.INVALID_VALUE),
+            (lambda: self.account1.try_transfer_to(self.account2, 10), lambda: self.account1.transfer_to(self.account2, 10), Status.BANNED),
+        ]
+
+        for try_operation, operation, status in cases:
+            result = try_operation()
+            self.assertFalse(result, f"Expected a rejected result, received {result}")
+            self.assertEqual(status, result.status, f"Expected {status.name}, received {result.status.name}")
+
+            with self.assertRaises(STATUS_ERRORS[status]) as raised:
+                operation()
+
+            self.assertEqual(str(raised.exception), result.detail, "Result detail should match the raised message")
+            self.assertIs(type(raised.exception), type(result.error()), "Result error should match the raised error")
+
+        self.assertAlmostEqual(1049.99, self.account1.balance, places=6, msg="Rejected operations should not change the balance")
+        self.assertIs(SUCCESS, self.account1.try_withdraw(49.99), "Successful operations should return the shared success result")
+        self.assertEqual(1000, self.account1.balance, f"Successful withdrawal should change the balance, received {self.account1.balance}")
+
+        with self.assertRaises(CustomLimitError, 
+        msg="Expected a limit error to be raised by raise_for_status on a limit rejection. Either no error or the incorrect error was raised."):
+            self.account1.try_withdraw(600).raise_for_status()
+
+
+    def test_structured_fields(self):
+        """
+        21.2 Structured error fields
+
+        Checking that errors from BankAccount and AccountStore carry account number, amount and limit, also through pickling.
+        """
+        self.account1.set_transaction_limit(100)
+
+        with self.assertRaises(CustomLimitError) as raised:
+            self.account1.transfer_to(self.account2, 150)
+
+        error = pickle.loads(pickle.dumps(raised.exception))
+        self.assertEqual((1045, 150, 100), (error.account_number, error.amount, error.limit), "Limit error should carry its fields")
+
+        store = AccountStore()
+        account_number = store.open_account("Miles Teller", 10)
+
+        with self.assertRaises(CustomInsufficientFundsError) as raised:
+            store.withdraw(account_number, 100)
+
+        self.assertEqual((account_number, 100, None), (raised.exception.account_number, raised.exception.amount, raised.exception.limit),
+                         "Insufficient funds error should carry its fields")
+
+        with self.assertRaises(CustomKeyError) as raised:
+            store.deposit(9999, 1)
+
+        self.assertEqual(9999, raised.exception.account_number, "Unknown account error should carry the account number")
+
+
+    def test_status_codes(self):
+        """
+        21.3 Shared status codes
+
+        Checking that batch engine result codes are Status codes, and that errors raised by subclass checks become results.
+        """
+        store = AccountStore()
+        account_number = store.open_account("Miles Teller", 10)
+        results = batch_engine.post_batch(store, [account_number, account_number], [5, 1000], [batch_engine.DEPOSIT, batch_engine.WITHDRAW])
+
+        self.assertEqual([Status.OK, Status.INSUFFICIENT_FUNDS], [Status(code) for code in results], f"Received {list(results)}")
+        self.assertIs(CustomInsufficientFundsError, batch_engine.RESULT_ERRORS[batch_engine.INSUFFICIENT_FUNDS], "Batch engine errors should follow the statuses")
+
+        now = 0.0
+        VelocityBankAccount.clock = lambda: now
+        limited = VelocityBankAccount("Jennifer Connelly", 1000)
+        limited.set_velocity_limit(3600, max_count=1)
+
+        self.assertTrue(limited.try_withdraw(10), "First withdrawal should succeed")
+        result = limited.try_withdraw(10)
+        self.assertEqual(Status.LIMIT_EXCEEDED, result.status, f"Velocity limit should be reported as a limit, received {result}")
+        self.assertIn("rolling limit", result.detail, f"Detail should come from the raised error, received {result.detail}")
+        self.assertEqual((limited.account_number, 10, 1), (result.account_number, result.amount, result.limit), 
+        f"Velocity limit results should carry the account number, amount and limit, received {result.account_number}, {result.amount}, {result.limit}")
+
+
+    def test_error_fields_of_subclasses(self):
+        """
+        21.4 Error fields of other account types
+
+        Checking that CentsBankAccount, FastBankAccount and ShardedLedger rejections carry account number, amount and limit.
+        """
+        cents = CentsBankAccount("Miles Teller", 10)
+        fast = FastBankAccount("Jennifer Connelly", 10)
+        fast.set_transaction_limit(5)
+        BankAccount.banned_accounts[self.account2.account_number] = "Fraud"
+
+        results = [cents.try_withdraw(100), fast.try_withdraw(6), fast.try_transfer_to(self.account2, 1), fast.try_deposit("5")]
+        fields = [(result.status, result.account_number, result.amount, result.limit) for result in results]
+
+        self.assertEqual([(Status.INSUFFICIENT_FUNDS, cents.account_number, 100, None), (Status.LIMIT_EXCEEDED, fast.account_number, 6, 5),
+                          (Status.BANNED, self.account2.account_number, 1, None), (Status.INVALID_TYPE, fast.account_number, "5", None)], 
+                         fields, f"Incorrect result fields, received {fields}")
+
+        with ShardedLedger(2) as ledger:
+            ledger.execute([("open", "Owner", 0)] * 2)
+            (error,) = ledger.execute([("transfer", 1045, 1046, 100)])
+
+        self.assertEqual((1045, 100), (error.account_number, error.amount), 
+        f"Sharded transfer errors should carry the account number and amount, received {error.account_number}, {error.amount}")
+
+
+    def test_error_statuses(self):
+        """
+        21.5 Status of every error
+
+        Checking that every error class has its own status, and that an error turned into a Result and back keeps its class.
+        """
+        cases = [
+            (CustomTypeError, Status.INVALID_TYPE),
+            (CustomValueError, Status.INVALID_VALUE),
+            (CustomKeyError, Status.UNKNOWN_ACCOUNT),
+            (CustomBannedError, Status.BANNED),
+            (CustomInsufficientFundsError, Status.INSUFFICIENT_FUNDS),
+            (CustomLimitError, Status.LIMIT_EXCEEDED),
+            (CustomOperationError, Status.NOT_ALLOWED),
+            (CustomConflictError, Status.CONFLICT),
+            (CustomAttributeError, Status.INVALID_ATTRIBUTE),
+            (CustomError, Status.ERROR),
+        ]
+
+        for error_class, status in cases:
+            result = Result.from_error(error_class("Rejected {amount}", account_number=1045, amount=5, limit=1))
+            self.assertEqual(status, result.status, f"Expected {status.name} for {error_class.__name__}, received {result.status.name}")
+            self.assertEqual("Rejected {amount}", result.detail, f"Result detail should be the error message, received {result.detail}")
+
+            error = result.error()
+            self.assertIs(error_class, type(error), f"Expected {error_class.__name__} back from the result, received {type(error).__name__}")
+            self.assertEqual((1045, 5, 1), (error.account_number, error.amount, error.limit), f"{error_class.__name__} should keep its fields")
+
+        self.assertEqual(len(Status) - 2, len(set(STATUS_ERRORS.values())), "Every error class should have one status, apart from INVALID_KIND")
+
+        self.account1.ban_account("Fraud")
+
+        with self.assertRaises(CustomOperationError) as raised:
+            self.account1.ban_account("Fraud")
+
+        self.assertEqual(Status.NOT_ALLOWED, Result.from_error(raised.exception).status, "Operation errors that are not bans should not be reported as bans")
+        self.assertEqual(Status.BANNED, self.account1.try_deposit(1).status, "Operations on a banned account should be reported as bans")
+
+
+    def test_cents_try_methods(self):
+        """
+        21.6 Result mode of CentsBankAccount
+
+        Checking that the try_ methods of CentsBankAccount accept the same amounts as the raising methods, which round to cents.
+        """
+        # Opening balance of 10 plus the bonus gives 5999 cents, 59.994 rounds to the whole balance
+        account1 = CentsBankAccount("Miles Teller", 10)
+        account2 = CentsBankAccount("Jennifer Connelly", 10)
+        ledger_account = LedgerBankAccount("Glen Powell", 10)
+
+        result = account1.try_withdraw(59.994)
+        self.assertTrue(result, f"Withdrawal that rounds to the whole balance should succeed, received {result}")
+        self.assertEqual(0, account1.balance_cents, f"Incorrect balance after the withdrawal, received {account1.balance_cents}")
+
+        result = account2.try_transfer_to(account1, 59.994)
+        self.assertTrue(result, f"Transfer that rounds to the whole balance should succeed, received {result}")
+        self.assertEqual((5999, 0), (account1.balance_cents, account2.balance_cents), "Incorrect balances after the transfer")
+
+        result = account1.try_withdraw(59.996)
+        self.assertEqual(Status.INSUFFICIENT_FUNDS, result.status, f"Withdrawal over the balance should be rejected, received {result}")
+
+        result = ledger_account.try_withdraw(59.994)
+        self.assertTrue(result, f"Ledger account withdrawal that rounds to the whole balance should succeed, received {result}")
+        self.assertEqual([], LedgerBankAccount.reconcile([ledger_account]), "Ledger account try_withdraw should post to the ledger")
+
+
+class TestIdempotency(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up idempotent accounts with a fresh cache and a controllable clock.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.now = 0.0
+        IdempotencyCache.clock = lambda: self.now
+        IdempotentBankAccount.idempotency_cache = IdempotencyCache(capacity=3, ttl_seconds=60)
+        self.account1 = IdempotentBankAccount("Tom Cruise", 1000)
+        self.account2 = IdempotentBankAccount("Glen Powell", 987.50)
+
+
+    def tearDown(self):
+        IdempotencyCache.clock = time.monotonic
+        IdempotentBankAccount.idempotency_cache = IdempotencyCache()
+
+
+    def test_retries(self):
+        """
+        22.1 Retried operations
+
+        Checking that retried deposits, withdrawals and transfers are applied once and rejections are replayed.
+        """
+        for _ in range(3):
+            self.account1.deposit(100, idempotency_key="deposit-1")
+            self.account1.transfer_to(self.account2, 50, idempotency_key="transfer-1")
+
+        self.assertAlmostEqual(1099.99, self.account1.balance, places=6, msg=f"Retries should not post again, received {self.account1.balance}")
+        self.assertAlmostEqual(1087.49, self.account2.balance, places=6, msg=f"Retried transfer should credit once, received {self.account2.balance}")
+
+        for _ in range(2):
+            with self.assertRaises(CustomInsufficientFundsError, 
+            msg="Expected an insufficient funds error to be replayed for a retried withdrawal. Either no error or the incorrect error was raised."):
+                self.account1.withdraw(5000, idempotency_key="withdraw-1")
+
+        self.account1.deposit(10_000)
+        with self.assertRaises(CustomInsufficientFundsError, 
+        msg="Expected the original rejection to be replayed after the balance changed. Either no error or the incorrect error was raised."):
+            self.account1.withdraw(5000, idempotency_key="withdraw-1")
+
+        self.account1.withdraw(10)
+        self.account1.withdraw(10)
+        self.assertAlmostEqual(11079.99, self.account1.balance, places=6, msg="Operations without a key should always be applied")
+
+
+    def test_key_reuse(self):
+        """
+        22.2 Key reuse for another operation
+
+        Checking that a key used again for a different operation or account is rejected.
+        """
+        self.account1.deposit(100, idempotency_key="key")
+
+        for operation in (lambda: self.account1.deposit(200, idempotency_key="key"), lambda: self.account2.deposit(100, idempotency_key="key"),
+                          lambda: self.account1.withdraw(100, idempotency_key="key")):
+            with self.assertRaises(CustomValueError, 
+            msg="Expected a value error to be raised when reusing a key for a different operation. Either no error or the incorrect error was raised."):
+                operation()
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised for a key that is not a string. Either no error or the incorrect error was raised."):
+            self.account1.deposit(100, idempotency_key=7)
+
+        self.assertAlmostEqual(1149.99, self.account1.balance, places=6, msg=f"Rejected reuse should not post, received {self.account1.balance}")
+
+
+    def test_eviction(self):
+        """
+        22.3 Expiry and capacity
+
+        Checking that keys expire after the time to live and the oldest keys are dropped at capacity.
+        """
+        cache = IdempotentBankAccount.idempotency_cache
+        self.account1.deposit(1, idempotency_key="a")
+        self.now = 30
+        self.account1.deposit(1, idempotency_key="b")
+        self.account1.deposit(1, idempotency_key="c")
+        self.account1.deposit(1, idempotency_key="d")
+
+        self.assertEqual((3, 1), (len(cache), cache.evictions), "The oldest key should be dropped at capacity")
+
+        self.now = 60
+        self.account1.deposit(1, idempotency_key="b")
+        self.account1.deposit(1, idempotency_key="a")
+
+        self.now = 95
+        self.account1.deposit(1, idempotency_key="c")
+
+        self.assertAlmostEqual(1055.99, self.account1.balance, places=6, 
+                               msg=f"Expired and evicted keys should post again, received {self.account1.balance}")
+        self.assertEqual(["a", "c"], list(cache._entries), "Expired keys should be dropped from the front")
+
+
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up ledger accounts on a fresh ledger.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        LedgerBankAccount.ledger = Ledger()
+        self.account1 = LedgerBankAccount("Tom Cruise", 1000)
+        self.account2 = LedgerBankAccount("Glen Powell", 987.50)
+
+
+    def test_postings(self):
+        """
+        23.1 Balanced postings
+
+        Checking that openings, deposits, withdrawals and transfers post balanced entries that reproduce every balance.
+        """
+        self.account1.deposit(100.25)
+        self.account1.withdraw(50)
+        self.account1.transfer_to(self.account2, 25.10)
+
+        with self.assertRaises(CustomInsufficientFundsError, 
+        msg="Expected an insufficient funds error to be raised when withdrawing more than the balance. Either no error or the incorrect error was raised."):
+            self.account2.withdraw(5000)
+
+        ledger = LedgerBankAccount.ledger
+        balances = ledger.materialize()
+
+        self.assertEqual(5, len(ledger), f"Expected 2 openings and 3 operations, received {len(ledger)} entries")
+        self.assertEqual((107514, 106259), (balances[1045], balances[1046]), f"Ledger balances should match the accounts, received {balances}")
+        self.assertEqual(-2 * 4999, balances[BONUS], "Bonuses should be posted against the bonus account")
+        self.assertEqual(-(100000 + 98750 + 10025 - 5000), balances[EXTERNAL], "Outside money should be posted against the external account")
+        self.assertEqual([], LedgerBankAccount.reconcile([self.account1, self.account2]), "Cached balances should match the ledger")
+        self.assertEqual({"entries": 5, "lines": 12, "total": 0, "unbalanced_entries": []}, ledger.trial_balance(), "The ledger should balance")
+
+
+    def test_incremental_materialization(self):
+        """
+        23.2 Incremental balances
+
+        Checking that materialized balances catch up on new lines only and match a full rebuild.
+        """
+        ledger = LedgerBankAccount.ledger
+        ledger.materialize()
+
+        for _ in range(10):
+            self.account1.transfer_to(self.account2, 1)
+
+        self.assertEqual(ledger.balance(1046), ledger.rebuild()[1046], "Incremental and rebuilt balances should agree")
+        self.assertEqual(98750 + 4999 + 1000, ledger.balance(1046), f"Received {ledger.balance(1046)}")
+
+        # Changing a cached balance without posting is caught by reconciliation
+        self.account2.balance_cents += 1
+        self.assertEqual([1046], LedgerBankAccount.reconcile([self.account1, self.account2]), "Unposted changes should be reported")
+
+
+    def test_unbalanced(self):
+        """
+        23.3 Unbalanced entries
+
+        Checking that unbalanced entries are rejected, and that the trial balance finds lines changed afterwards.
+        """
+        ledger = LedgerBankAccount.ledger
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when posting an unbalanced entry. Either no error or the incorrect error was raised."):
+            ledger.post(transaction_log.DEPOSIT, [(1045, 100), (EXTERNAL, -99)])
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when transferring to an account outside the ledger. Either no error or the incorrect error was raised."):
+            self.account1.transfer_to(CentsBankAccount("Miles Teller", 10), 1)
+
+        self.account1.deposit(1)
+        ledger.cents[-1] += 1
+
+        self.assertEqual([2], ledger.trial_balance()["unbalanced_entries"], "The changed entry should be reported")
+
+
+    def test_ledger_is_source(self):
+        """
+        23.4 Balances derived from the ledger
+
+        Checking that an operation that can not be posted changes no balance, and that cached balances
+        can be rebuilt from the ledger.
+        """
+        ledger = LedgerBankAccount.ledger
+        lines = len(ledger.cents)
+
+        # 10**17 dollars is more cents than a ledger line holds
+        with self.assertRaises(OverflowError, 
+        msg="Expected an overflow error to be raised when posting more cents than a line holds. Either no error or the incorrect error was raised."):
+            self.account1.deposit(10**17)
+
+        self.assertEqual((104999, lines), (self.account1.balance_cents, len(ledger.cents)), "A failed posting should change neither the balance nor the ledger")
+        self.assertEqual(len(ledger.entry_ends), len(ledger.entry_kinds), "A failed posting should not leave a partial entry")
+
+        self.account1.transfer_to(self.account2, 10)
+        self.account1.balance_cents = 0
+        self.account2.balance_cents += 500
+
+        LedgerBankAccount.rebuild_balances([self.account1, self.account2])
+        self.assertEqual((103999, 98750 + 4999 + 1000), (self.account1.balance_cents, self.account2.balance_cents), 
+        "Rebuilt balances should be the sums of the ledger lines")
+        self.assertEqual([], LedgerBankAccount.reconcile([self.account1, self.account2]), "Rebuilt balances should match the ledger")
+
+
+class TestTransactions(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up versioned accounts.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.payer = VersionedBankAccount("Tom Cruise", 1000)
+        self.payees = [VersionedBankAccount(owner, 0) for owner in ("Glen Powell", "Miles Teller", "Monica Barbaro")]
+
+
+    def test_all_or_nothing(self):
+        """
+        24.1 All-or-nothing
+
+        Checking that a fee split commits every transfer, and that an error halfway leaves every account unchanged.
+        """
+        with Transaction() as transaction:
+            for payee in self.payees:
+                transaction.transfer(self.payer, payee, 100)
+
+            self.assertAlmostEqual(749.99, transaction.balance(self.payer), places=6, msg="The transaction should see its own transfers")
+            self.assertAlmostEqual(1049.99, self.payer.balance, places=6, msg="Other readers should not see uncommitted transfers")
+
+        self.assertAlmostEqual(749.99, self.payer.balance, places=6, msg=f"Committed transfers should be applied, received {self.payer.balance}")
+        self.assertEqual([149.99] * 3, [round(payee.balance, 2) for payee in self.payees], "Every payee should be credited")
+
+        with self.assertRaises(CustomOperationError,
+        msg="Expected an operation error to be raised when using a committed transaction on an account it already used. Either no error or the incorrect error was raised."):
+            transaction.deposit(self.payer, 1)
+
+        self.assertAlmostEqual(749.99, self.payer.balance, places=6,
+        msg="A committed transaction should not change the account again")
+
+        self.payees[1].ban_account("Fraud")
+
+        with self.assertRaises(CustomOperationError, 
+        msg="Expected an operation error to be raised when transferring to a banned account. Either no error or the incorrect error was raised."):
+            with Transaction() as transaction:
+                for payee in self.payees:
+                    transaction.transfer(self.payer, payee, 100)
+
+        self.assertAlmostEqual(749.99, self.payer.balance, places=6, msg="A failed transaction should change nothing")
+        self.assertAlmostEqual(149.99, self.payees[0].balance, places=6, msg="A failed transaction should change nothing")
+
+
+    def test_conflict_and_retry(self):
+        """
+        24.2 Conflicts
+
+        Checking that a transaction whose account changed after its snapshot does not commit, and that run retries it.
+        """
+        with self.assertRaises(CustomConflictError, 
+        msg="Expected a conflict error to be raised when an account changed during the transaction. Either no error or the incorrect error was raised."):
+            with Transaction() as transaction:
+                transaction.withdraw(self.payer, 1000)
+                self.payer.withdraw(50)
+
+        self.assertAlmostEqual(999.99, self.payer.balance, places=6, msg="A conflicted transaction should change nothing")
+
+        attempts = []
+
+        def payroll(transaction):
+            attempts.append(transaction)
+            transaction.transfer(self.payer, self.payees[0], transaction.balance(self.payer) / 2)
+
+            # Another thread pays in between the first attempt's snapshot and its commit
+            if len(attempts) == 1:
+                self.payer.deposit(0.01)
+
+            return len(attempts)
+
+        self.assertEqual(2, Transaction.run(payroll), "The conflicted attempt should be run again")
+        self.assertAlmostEqual(500, self.payer.balance, places=6, msg=f"The retry should see the new balance, received {self.payer.balance}")
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised for an account without versions. Either no error or the incorrect error was raised."):
+            Transaction().deposit(BankAccount("Val Kilmer", 10), 1)
+
+
+    def test_concurrent_transactions(self):
+        """
+        24.3 Concurrent transactions
+
+        Checking that money is conserved when threads run overlapping transactions.
+        """
+        accounts = [VersionedBankAccount("Owner", 1000) for _ in range(6)]
+        total = sum(account.balance for account in accounts)
+
+        def worker(seed):
+            rng = random.Random(seed)
+
+            for _ in range(200):
+                chosen = rng.sample(accounts, 3)
+                Transaction.run(lambda transaction: [transaction.transfer(chosen[0], target, 1) for target in chosen[1:]], retries=1_000)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertAlmostEqual(total, sum(account.balance for account in accounts), places=6, msg="Transactions should conserve money")
+        self.assertEqual(4 * 200 * 3, sum(account.version for account in accounts), "Every committed transaction should bump every account it wrote")
+
+
+class TestSQLiteStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up a store in a temporary directory.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "bank.db")
+        self.store = SQLiteStore(self.path, flush_every=4)
+        SQLiteBankAccount.store = self.store
+
+
+    def tearDown(self):
+        SQLiteBankAccount.store = None
+        self.store.close()
+        BankAccount.unban_all()
+        self.directory.cleanup()
+
+
+    def test_round_trip(self):
+        """
+        25.1 Saving and loading
+
+        Checking that accounts, limits, bans and the account number counter survive closing and reopening the store.
+        """
+        account1 = SQLiteBankAccount("Tom Cruise", 1000)
+        account2 = SQLiteBankAccount("Glen Powell", 987.50)
+        account1.transfer_to(account2, 100)
+        account1.set_transaction_limit(250)
+        account2.ban_account("Fraud")
+        self.store.close()
+
+        BankAccount.unban_all()
+        BankAccount.set_next_account_number(2000)
+        self.store = SQLiteStore(self.path)
+        accounts = self.store.load()
+
+        self.assertEqual([1045, 1046], sorted(accounts), f"Expected both accounts to be loaded, received {sorted(accounts)}")
+        self.assertEqual(("Tom Cruise", 949.99, 250), (accounts[1045].owner, round(accounts[1045].balance, 2), accounts[1045].transaction_limit),
+                         "Owner, balance and limit should be restored")
+        self.assertEqual({1046: "Fraud"}, dict(BankAccount.banned_accounts), "Bans should be restored")
+        self.assertEqual(1047, SQLiteBankAccount("Miles Teller", 0).account_number, "The account number counter should be restored")
+
+
+    def test_write_behind(self):
+        """
+        25.2 Write-behind batches
+
+        Checking that changes are flushed in batches, and that readers only see flushed balances.
+        """
+        account = SQLiteBankAccount("Tom Cruise", 1000)
+        account.deposit(1)
+
+        self.assertEqual(1, self.store.pending(), "Repeated changes to an account should be flushed once")
+
+        with self.assertRaises(CustomKeyError, 
+        msg="Expected a key error to be raised when reading an account that was not flushed. Either no error or the incorrect error was raised."):
+            self.store.balance(account.account_number)
+
+        others = [SQLiteBankAccount("Owner", 10) for _ in range(3)]
+        self.assertEqual((0, 1), (self.store.pending(), self.store.flushes), "Reaching the batch size should flush")
+        self.assertAlmostEqual(1050.99, self.store.balance(account.account_number), places=6, msg="Flushed balance should be readable")
+
+        results = []
+        readers = [threading.Thread(target=lambda: results.append(self.store.balance(others[0].account_number))) for _ in range(8)]
+
+        for reader in readers:
+            reader.start()
+
+        for reader in readers:
+            reader.join()
+
+        self.assertEqual([59.99] * 8, [round(balance, 2) for balance in results], "Pooled readers should read concurrently")
+
+
+    def test_write_through(self):
+        """
+        25.3 Write-through mode
+
+        Checking that without write-behind every change is committed at once, and that invalid settings are rejected.
+        """
+        self.store.close()
+        self.store = SQLiteStore(self.path, write_behind=False)
+        SQLiteBankAccount.store = self.store
+
+        account = SQLiteBankAccount("Tom Cruise", 1000)
+        account.withdraw(49.99)
+
+        self.assertEqual(0, self.store.pending(), "Write-through should leave nothing pending")
+        self.assertEqual(1000, self.store.balance(account.account_number), "Write-through changes should be readable at once")
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised for a batch size below 1. Either no error or the incorrect error was raised."):
+            SQLiteStore(self.path, flush_every=0)
+
+
+    def test_transfer_and_restore(self):
+        """
+        25.4 Transfers, ban restores and reader paths
+
+        Checking that a flush never splits a transfer, that loading an account leaves the bans alone
+        until they are restored, and that readers open paths with URI characters.
+        """
+        account1 = SQLiteBankAccount("Tom Cruise", 1000)
+        account2 = SQLiteBankAccount("Glen Powell", 0)
+        self.store.flush()
+
+        # Three more dirty accounts put the batch size between the transfer's debit and its credit
+        for _ in range(3):
+            SQLiteBankAccount("Owner", 0)
+
+        account1.transfer_to(account2, 100)
+
+        self.assertEqual((0, 2), (self.store.pending(), self.store.flushes), "The transfer should have triggered one flush")
+        self.assertAlmostEqual(1099.98, self.store.balance(account1.account_number) + self.store.balance(account2.account_number), places=6,
+        msg="The flushed debit and credit should add up to the money in both accounts")
+
+        account2.ban_account("Fraud")
+        self.store.flush()
+        BankAccount.banned_accounts.clear()
+
+        self.store.load_account(account2.account_number)
+        self.assertEqual({}, dict(BankAccount.banned_accounts), "Loading an account should not change the bans")
+
+        self.store.restore_ban(account2.account_number)
+        self.assertEqual({account2.account_number: "Fraud"}, dict(BankAccount.banned_accounts), "restore_ban should copy the saved ban")
+
+        directory = os.path.join(self.directory.name, "50% #1?")
+        os.mkdir(directory)
+
+        with SQLiteStore(os.path.join(directory, "bank.db"), write_behind=False) as store:
+            SQLiteBankAccount.store = store
+            account = SQLiteBankAccount("Miles Teller", 10)
+            self.assertAlmostEqual(59.99, store.balance(account.account_number), places=6, msg="Readers should open a path with URI characters")
+
+        SQLiteBankAccount.store = self.store
+
+
+class TestAccountCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Resetting class methods and setting up saved accounts and a cache of two accounts.
+        """
+        BankAccount.set_next_account_number(1045)
+        BankAccount.unban_all()
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SQLiteStore(os.path.join(self.directory.name, "bank.db"))
+        SQLiteBankAccount.store = self.store
+        self.numbers = [SQLiteBankAccount(owner, 100).account_number for owner in ("Tom Cruise", "Glen Powell", "Miles Teller")]
+        self.store.flush()
+        self.cache = AccountCache(self.store, capacity=2)
+
+
+    def tearDown(self):
+        SQLiteBankAccount.store = None
+        self.cache.close()
+        self.store.close()
+        BankAccount.unban_all()
+        self.directory.cleanup()
+
+
+    def test_lru(self):
+        """
+        26.1 Least recently used eviction
+
+        Checking hits, misses and that the least recently used account is dropped.
+        """
+        first = self.cache.get(1045)
+        self.cache.get(1046)
+        self.assertIs(first, self.cache.get(1045), "A hit should return the cached object")
+
+        self.cache.get(1047)
+
+        self.assertEqual((False, True, True), (1046 in self.cache, 1045 in self.cache, 1047 in self.cache), "The least recently used account should be dropped")
+        self.assertEqual({"size": 2, "hits": 1, "misses": 3, "hit_rate": 0.25, "evictions": 1, "write_backs": 0, "invalidations": 0},
+                         self.cache.stats(), f"Received {self.cache.stats()}")
+
+        with self.assertRaises(CustomKeyError, 
+        msg="Expected a key error to be raised when getting an account that does not exist. Either no error or the incorrect error was raised."):
+            self.cache.get(9999)
+
+
+    def test_write_back(self):
+        """
+        26.2 Write-back of changed accounts
+
+        Checking that a changed account that is dropped before it is flushed keeps its balance.
+        """
+        self.cache.get(1045).deposit(50)
+        self.cache.get(1046)
+        self.cache.get(1047)
+
+        self.assertEqual(1, self.cache.write_backs, "The dropped account was waiting to be flushed")
+        self.assertAlmostEqual(199.99, self.cache.get(1045).balance, places=6, msg="Reloading should not read the stale row")
+
+        self.store.flush()
+        self.cache.invalidate_all()
+        self.assertAlmostEqual(199.99, self.cache.get(1045).balance, places=6, msg="The flushed balance should be read back")
+
+
+    def test_ban_invalidation(self):
+        """
+        26.3 Ban invalidation
+
+        Checking that banning and unbanning drop cached accounts and bans are read through on a miss.
+        """
+        account = self.cache.get(1046)
+        self.cache.get(1047)
+        account.ban_account("Fraud")
+
+        self.assertNotIn(1046, self.cache, "Banning should drop the account")
+        self.assertEqual(1, self.cache.invalidations, "One account should be invalidated")
+
+        BankAccount.banned_accounts.clear()
+        self.assertTrue(self.cache.get(1046).is_banned(), "The ban should be read with the account")
+
+        SQLiteBankAccount.unban_all()
+        self.assertEqual(0, len(self.cache), "Unbanning everyone should drop every account")
+
+
+class TestBulkOpening(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Setting up a store with one account opened the usual way.
+        """
+        self.store = AccountStore()
+        self.store.open_account("Tom Cruise", 1000)
+
+
+    def test_open_accounts(self):
+        """
+        27.1 Opening accounts from columns
+
+        Checking that bulk opened accounts get a contiguous block of numbers and the same state as open_account.
+        """
+        numbers = self.store.open_accounts(["Glen Powell", "Miles Teller", "Jennifer Connelly"], [987.50, 0, 12])
+
+        self.assertEqual(range(1046, 1049), numbers, f"Incorrect account numbers given by open_accounts, received {numbers}")
+        self.assertEqual([1037.49, 49.99, 61.99], [self.store[number].balance for number in numbers], "The bonus has not been correctly gifted")
+        self.assertEqual("Miles Teller", self.store[1047].owner, f"Incorrect owner, received {self.store[1047].owner}")
+        self.assertEqual(4, len(self.store), f"Expected 4 accounts in store, received {len(self.store)}")
+
+        self.assertEqual(1049, self.store.open_account("Robert Downey Jr.", 0), "open_account should continue after the bulk opened block")
+        self.assertEqual(range(1050, 1050), self.store.open_accounts([], []), "Opening no accounts should return an empty range")
+
+        reference = AccountStore()
+        reference.open_account("Tom Cruise", 1000)
+        for owner, balance in zip(["Glen Powell", "Miles Teller", "Jennifer Connelly"], [987.50, 0, 12]):
+            reference.open_account(owner, balance)
+
+        self.assertEqual(list(reference.balances), list(self.store.balances[:4]), "Bulk opened balances should match open_account")
+
+
+    def test_rejected_columns(self):
+        """
+        27.2 Invalid columns
+
+        Checking that invalid columns raise the same errors as open_account and open no accounts.
+        """
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when the columns have different lengths. Either no error or the incorrect error was raised."):
+            self.store.open_accounts(["Rupert", "Adam"], [10])
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when opening a store account with the balance 'fifty'. Either no error or the incorrect error was raised."):
+            self.store.open_accounts(["Rupert", "Adam"], [10, "fifty"])
+
+        with self.assertRaises(CustomTypeError, 
+        msg="Expected a type error to be raised when opening a store account with a numeric owner. Either no error or the incorrect error was raised."):
+            self.store.open_accounts(["Rupert", 7], [10, 20])
+
+        with self.assertRaises(CustomValueError, 
+        msg="Expected a value error to be raised when opening a store account with negative balance. Either no error or the incorrect error was raised."):
+            self.store.open_accounts(["Rupert", "Adam"], [10, -2000])
+
+        with self.assertRaises(OverflowError, 
+        msg="Expected an overflow error to be raised when an opening balance is too large for a float. Either no error or the incorrect error was raised."):
+            self.store.open_accounts(["Rupert", "Adam"], [10, 10**400])
+
+        self.assertEqual((1, 1046), (len(self.store), self.store.next_account_number), "Rejected columns should not open any account")
+        self.assertEqual((1, 1, 1), (len(self.store.owners), len(self.store.balances), len(self.store.limits)), "Rejected columns should not change any column")
+        self.assertEqual(1046, self.store.open_account("Rupert", 10), "Opening an account after rejected columns should succeed")
+
+        with self.assertRaises(OverflowError, 
+        msg="Expected an overflow error to be raised when a single opening balance is too large for a float. Either no error or the incorrect error was raised."):
+            self.store.open_account("Adam", 10**400)
+
+        self.assertEqual((2, 1047), (len(self.store), self.store.next_account_number), "A rejected opening should not open an account")
+        self.assertEqual((2, 2, 2), (len(self.store.owners), len(self.store.balances), len(self.store.limits)), "A rejected opening should not change any column")
+
+        numbers = self.store.open_accounts(("Adam", "Miles Teller"), (True, 5))
+        self.assertEqual(50.99, self.store[numbers[0]].balance, "Subclasses of int should be accepted like open_account accepts them")
+
+
+    def test_journaled_open_accounts(self):
+        """
+        27.3 Replaying bulk opened accounts
+
+        Checking that every bulk opened account is written to the journal and replays to the same store.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, "bank.log")
+
+            with TransactionLog(log_path, sync_policy=transaction_log.SYNC_NONE) as log:
+                store = AccountStore(journal=log)
+                store.open_accounts(["Tom Cruise", "Glen Powell"], [1000, 987.50])
+
+            replayed = AccountStore()
+            snapshot.replay(replayed, log_path)
+
+        self.assertEqual((store.owners, list(store.balances)), (replayed.owners, list(replayed.balances)), "Replayed store does not match the original store")
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
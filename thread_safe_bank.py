@@ -0,0 +1,81 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class ThreadSafeBankAccount, a BankAccount that can be shared between threads.
+Every account has its own lock, so operations on different accounts never wait for each other.
+Transfers lock both accounts in account number order, so two opposite transfers can not deadlock.
+Account numbers come from BankAccount's itertools.count, so opening accounts takes no lock.
+"""
+
+import threading
+
+from bank import BankAccount
+from custom_errors import *
+
+class ThreadSafeBankAccount(BankAccount):
+    """
+    Class for a bank account that is safe to use from multiple threads. Validation and error
+    semantics are the same as BankAccount.
+
+    Class Variables-
+        ban_lock (Lock): Guards the banned accounts dictionary shared with BankAccount
+
+    Instance Variables-
+        lock (RLock): Per account lock held while the account's state changes
+    """
+
+    ban_lock = threading.Lock()
+
+    def __init__(self, owner, balance):
+        """
+        Creates a new ThreadSafeBankAccount instance.
+
+        Arguments-
+            owner (string): Name of account owner
+            balance (int): non-negative starting account balance
+        """
+        self.lock = threading.RLock()
+        super().__init__(owner, balance)
+
+
+    def ban_account(self, reason: str) -> None:
+        # Checking and recording the ban happen together, so an account can not be banned twice
+        with ThreadSafeBankAccount.ban_lock:
+            super().ban_account(reason)
+
+
+    @classmethod
+    def unban_all(cls) -> None:
+        with cls.ban_lock:
+            super().unban_all()
+
+
+    def deposit(self, amount: float | int) -> None:
+        with self.lock:
+            super().deposit(amount)
+
+
+    def withdraw(self, amount: float | int) -> None:
+        with self.lock:
+            super().withdraw(amount)
+
+
+    def transfer_to(self, target_account: "ThreadSafeBankAccount", amount: float | int) -> None:
+        """
+        Method that transfers a non-negative amount to another ThreadSafeBankAccount instance,
+        if enough funds exist. Both accounts stay locked for the whole transfer.
+        """
+        #Checking input type
+        if not isinstance(target_account, ThreadSafeBankAccount):
+            raise CustomTypeError("Target must be a ThreadSafeBankAccount instance")
+
+        # Locking in a fixed global order avoids deadlocks between opposite transfers
+        first, second = sorted((self, target_account), key=lambda account: (account.account_number, id(account)))
+
+        with first.lock, second.lock:
+            super().transfer_to(target_account, amount)
+
+
+    def set_transaction_limit(self, limit: float | int | None) -> None:
+        with self.lock:
+            super().set_transaction_limit(limit)
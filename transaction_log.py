@@ -0,0 +1,355 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class TransactionLog, an append-only write-ahead log of account events in a
+compact binary format, and class JournaledBankAccount, a BankAccount that writes every successful
+operation to the log. Group commit lets many records share one fsync, so durability does not cap
+throughput at disk sync latency.
+"""
+
+import math
+import os
+import struct
+import threading
+import zlib
+from collections import namedtuple
+
+from bank import BankAccount
+from custom_errors import *
+
+# Event types
+OPEN = 1
+DEPOSIT = 2
+WITHDRAW = 3
+TRANSFER = 4
+BAN = 5
+UNBAN_ALL = 6
+SET_LIMIT = 7
+SET_NEXT_ACCOUNT_NUMBER = 8
+
+# Sync policies
+SYNC_ALWAYS = "always"      # fsync before every append returns
+SYNC_GROUP = "group"        # background thread fsyncs groups of records
+SYNC_NONE = "none"          # records are left to the operating system to write back
+
+# Record layout: crc32, event type, account number, other account number, amount, text length, then the text.
+# The crc covers everything after itself, so a torn record at the end of the log is detected.
+RECORD = struct.Struct("<IBqqdH")
+
+# Bytes read from the log file at a time
+READ_SIZE = 1 << 20
+
+LogRecord = namedtuple("LogRecord", ["lsn", "event", "account_number", "other", "amount", "text"])
+
+
+def encode_record(event: int, account_number: int = 0, other: int = 0, amount: float = 0.0, text: str = "") -> bytes:
+    """
+    Function that encodes one event as a log record.
+    """
+    payload = text.encode("utf-8")
+
+    if len(payload) > 0xFFFF:
+        raise CustomValueError(f"Log record text must be at most 65535 bytes, received {len(payload)}")
+
+    body = RECORD.pack(0, event, account_number, other, amount, len(payload))[4:] + payload
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+
+def read_log(path: str, start: int = 0):
+    """
+    Generator that yields the LogRecords of the log at path from byte offset start.
+    Stops at the end of the log, or at the first torn or corrupt record.
+    The lsn of a record is the byte offset just after it.
+    """
+    with open(path, "rb") as file:
+        # Reading from start in blocks, so replaying a tail never reads or holds the rest of the log
+        file.seek(start)
+        data = file.read(READ_SIZE)
+        base = start
+        position = 0
+
+        while True:
+            end = position + RECORD.size
+
+            if end <= len(data):
+                crc, event, account_number, other, amount, length = RECORD.unpack_from(data, position)
+                end += length
+
+            if end > len(data):
+                # The next record runs past the block, keeping its start and reading on
+                more = file.read(max(READ_SIZE, end - len(data)))
+
+                if not more:
+                    return
+
+                data = data[position:] + more
+                base += position
+                position = 0
+                continue
+
+            if zlib.crc32(data[position + 4:end]) != crc:
+                return
+
+            text = data[position + RECORD.size:end].decode("utf-8")
+            yield LogRecord(base + end, event, account_number, other, amount, text)
+            position = end
+
+
+class TransactionLog:
+    """
+    Class for an append-only binary log of account events.
+
+    Instance Variables-
+        path (string): Location of the log file
+        sync_policy (string): One of SYNC_ALWAYS, SYNC_GROUP or SYNC_NONE
+        group_size (int): Number of pending records that triggers a group commit
+        group_interval (float): Longest time in seconds a record waits for a group commit
+        lsn (int): Log sequence number (byte offset) after the last appended record
+        durable_lsn (int): Log sequence number up to which the log has been fsynced
+    """
+
+    def __init__(self, path: str, sync_policy: str = SYNC_GROUP, group_size: int = 256, group_interval: float = 0.005, start: int = 0):
+        """
+        Opens the log at path for appending, creating it if needed. A torn record at the end
+        of an existing log (left by a crash during a write) is cut off. Records before start are
+        known to be complete (for example, covered by a snapshot), so only the log from start is
+        checked, which is the tail that recovery replays anyway.
+        """
+        #Checking input values
+        if sync_policy not in (SYNC_ALWAYS, SYNC_GROUP, SYNC_NONE):
+            raise CustomValueError(f"Sync policy must be one of {SYNC_ALWAYS}, {SYNC_GROUP} or {SYNC_NONE}, received {sync_policy}")
+
+        if group_size < 1 or group_interval <= 0:
+            raise CustomValueError(f"Group size and interval must be positive, received {group_size} and {group_interval}")
+
+        self.path = path
+        self.sync_policy = sync_policy
+        self.group_size = group_size
+        self.group_interval = group_interval
+
+        end = start
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        if start > size:
+            raise CustomValueError(f"Log {path} ends at {size}, before the start {start}")
+
+        if size:
+            for record in read_log(path, start):
+                end = record.lsn
+
+        self._file = open(path, "ab")
+        self._file.truncate(end)
+
+        self.lsn = end
+        self.durable_lsn = end
+        self._buffer = bytearray()
+        self._pending = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._flusher = None
+
+        if sync_policy == SYNC_GROUP:
+            self._flusher = threading.Thread(target=self._group_commit, daemon=True)
+            self._flusher.start()
+
+
+    def append(self, event: int, account_number: int = 0, other: int = 0, amount: float = 0.0, text: str = "") -> int:
+        """
+        Method that appends one event to the log and returns its log sequence number.
+        With SYNC_ALWAYS the record is durable when this returns, otherwise use wait_durable.
+        """
+        record = encode_record(event, account_number, other, amount, text)
+
+        with self._condition:
+            if self._closed:
+                raise CustomOperationError(f"Transaction log {self.path} is closed")
+
+            self._buffer += record
+            self.lsn += len(record)
+            self._pending += 1
+            lsn = self.lsn
+
+            if self.sync_policy == SYNC_GROUP and self._pending >= self.group_size:
+                self._condition.notify_all()
+
+        if self.sync_policy == SYNC_ALWAYS:
+            self._sync(lsn, fsync=True)
+
+        elif self.sync_policy == SYNC_NONE and len(self._buffer) >= 1 << 16:
+            self._sync(lsn, fsync=False)
+
+        return lsn
+
+
+    def _sync(self, lsn: int, fsync: bool) -> None:
+        """
+        Writes every buffered record to the file and, if fsync is True, makes the log durable
+        up to at least lsn. Appends can continue while the file is being written, and records that
+        were appended by other threads in the meantime share the same fsync.
+        """
+        with self._io_lock:
+            if fsync and self.durable_lsn >= lsn:
+                return
+
+            with self._condition:
+                buffer, written_lsn = self._buffer, self.lsn
+                self._buffer = bytearray()
+                self._pending = 0
+
+            if buffer:
+                self._file.write(buffer)
+                self._file.flush()
+
+            if fsync:
+                os.fsync(self._file.fileno())
+
+                with self._condition:
+                    self.durable_lsn = max(self.durable_lsn, written_lsn)
+                    self._condition.notify_all()
+
+
+    def _group_commit(self) -> None:
+        """
+        Background thread for SYNC_GROUP. Writes and fsyncs all pending records as one group,
+        either when group_size records are pending or group_interval has passed.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or self._pending >= self.group_size, self.group_interval)
+
+                if self._closed:
+                    return
+
+                lsn = self.lsn
+
+            if self.durable_lsn < lsn:
+                self._sync(lsn, fsync=True)
+
+
+    def wait_durable(self, lsn: int) -> None:
+        """
+        Method that waits until the record with log sequence number lsn has been fsynced.
+        """
+        if self.sync_policy != SYNC_GROUP:
+            self._sync(lsn, fsync=True)
+            return
+
+        with self._condition:
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self.durable_lsn >= lsn or self._closed)
+
+
+    def flush(self) -> None:
+        """
+        Method that writes and fsyncs every appended record.
+        """
+        self._sync(self.lsn, fsync=True)
+
+
+    def close(self) -> None:
+        """
+        Method that flushes the log and closes the file.
+        """
+        with self._condition:
+            if self._closed:
+                return
+
+            self._closed = True
+            self._condition.notify_all()
+
+        if self._flusher is not None:
+            self._flusher.join()
+
+        self._sync(self.lsn, fsync=True)
+        self._file.close()
+
+
+    def __enter__(self) -> "TransactionLog":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JournaledBankAccount(BankAccount):
+    """
+    Class for a bank account that records every successful operation in a TransactionLog.
+    A transfer is recorded as a single TRANSFER event rather than a withdrawal and a deposit.
+
+    Class Variables-
+        journal (TransactionLog): Log written by all journaled accounts (None disables logging)
+    """
+
+    journal = None
+
+    def __init__(self, owner, balance):
+        """
+        Creates a new JournaledBankAccount instance and records an OPEN event.
+
+        Arguments-
+            owner (string): Name of account owner
+            balance (int): non-negative starting account balance (before the bonus)
+        """
+        self._journal_paused = False
+        super().__init__(owner, balance)
+        self._log(OPEN, self.account_number, 0, balance, owner)
+
+
+    def _log(self, event: int, account_number: int = 0, other: int = 0, amount: float = 0.0, text: str = "") -> None:
+        if JournaledBankAccount.journal is not None and not self._journal_paused:
+            JournaledBankAccount.journal.append(event, account_number, other, amount, text)
+
+
+    @classmethod
+    def set_next_account_number(cls, next_account_number: int) -> None:
+        super().set_next_account_number(next_account_number)
+
+        if JournaledBankAccount.journal is not None:
+            JournaledBankAccount.journal.append(SET_NEXT_ACCOUNT_NUMBER, 0, next_account_number)
+
+
+    @classmethod
+    def unban_all(cls) -> None:
+        super().unban_all()
+
+        if JournaledBankAccount.journal is not None:
+            JournaledBankAccount.journal.append(UNBAN_ALL)
+
+
+    def ban_account(self, reason: str) -> None:
+        super().ban_account(reason)
+        self._log(BAN, self.account_number, 0, 0.0, reason)
+
+
+    def deposit(self, amount: float | int) -> None:
+        super().deposit(amount)
+        self._log(DEPOSIT, self.account_number, 0, amount)
+
+
+    def withdraw(self, amount: float | int) -> None:
+        super().withdraw(amount)
+        self._log(WITHDRAW, self.account_number, 0, amount)
+
+
+    def transfer_to(self, target_account: BankAccount, amount: float | int) -> None:
+        # Pausing the journal of both accounts, so the inner withdrawal and deposit are not logged
+        paused = [account for account in (self, target_account) if isinstance(account, JournaledBankAccount)]
+
+        for account in paused:
+            account._journal_paused = True
+
+        try:
+            super().transfer_to(target_account, amount)
+
+        finally:
+            for account in paused:
+                account._journal_paused = False
+
+        self._log(TRANSFER, self.account_number, target_account.account_number, amount)
+
+
+    def set_transaction_limit(self, limit: float | int | None) -> None:
+        super().set_transaction_limit(limit)
+        self._log(SET_LIMIT, self.account_number, 0, math.nan if limit is None else limit)
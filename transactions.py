@@ -0,0 +1,263 @@
+"""
+Name- Suveer Dhawan
+
+This program creates class Transaction, an all-or-nothing group of deposits, withdrawals and transfers
+over any number of accounts, and class VersionedBankAccount, a ThreadSafeBankAccount with a version
+number that changes on every committed change. A transaction works on snapshots: the first time it uses
+an account it copies the balance and version, and every operation is checked and applied to the copies.
+Nothing is locked while the transaction runs. On commit the accounts it used are locked in account
+number order, and if none of their versions changed the new balances are written at once; otherwise
+the transaction is a conflict and can be run again. Transactions over different accounts never wait
+for each other.
+"""
+
+from custom_errors import *
+from thread_safe_bank import ThreadSafeBankAccount
+
+class VersionedBankAccount(ThreadSafeBankAccount):
+    """
+    Class for a thread safe bank account whose version increases on every change that can affect
+    a transaction (balance, ban or transaction limit).
+
+    Instance Variables-
+        version (int): Number of changes made to the account
+    """
+
+    def __init__(self, owner, balance):
+        """
+        Creates a new VersionedBankAccount instance.
+
+        Arguments-
+            owner (string): Name of account owner
+            balance (int): non-negative starting account balance
+        """
+        self.version = 0
+        super().__init__(owner, balance)
+
+
+    def deposit(self, amount: float | int) -> None:
+        with self.lock:
+            super().deposit(amount)
+            self.version += 1
+
+
+    def withdraw(self, amount: float | int) -> None:
+        with self.lock:
+            super().withdraw(amount)
+            self.version += 1
+
+
+    def transfer_to(self, target_account: "VersionedBankAccount", amount: float | int) -> None:
+        #Checking input type
+        if not isinstance(target_account, VersionedBankAccount):
+            raise CustomTypeError("Target must be a VersionedBankAccount instance")
+
+        first, second = sorted((self, target_account), key=lambda account: (account.account_number, id(account)))
+
+        # The locks are reentrant, so ThreadSafeBankAccount.transfer_to can take them again
+        with first.lock, second.lock:
+            super().transfer_to(target_account, amount)
+            self.version += 1
+            target_account.version += 1
+
+
+    def ban_account(self, reason: str) -> None:
+        with self.lock:
+            super().ban_account(reason)
+            self.version += 1
+
+
+    def set_transaction_limit(self, limit: float | int | None) -> None:
+        with self.lock:
+            super().set_transaction_limit(limit)
+            self.version += 1
+
+
+class Transaction:
+    """
+    Class for an optimistic transaction over VersionedBankAccounts. Operations are checked like
+    BankAccount.deposit, BankAccount.withdraw and BankAccount.transfer_to and raise the same errors,
+    and only change the transaction's copies of the balances. Used as a context manager, the
+    transaction commits when the block ends and is discarded when the block raises.
+
+    Instance Variables-
+        committed (bool): Whether the transaction has been committed
+    """
+
+    def __init__(self):
+        self.committed = False
+        self._versions = {}
+        self._balances = {}
+        self._written = set()
+
+
+    def _use(self, account: VersionedBankAccount) -> None:
+        """
+        Takes the snapshot of an account the first time the transaction uses it.
+        """
+        if self.committed:
+            raise CustomOperationError("Transaction has already been committed")
+
+        if account in self._versions:
+            return
+
+        #Checking input type
+        if not isinstance(account, VersionedBankAccount):
+            raise CustomTypeError(f"Transaction accounts must be VersionedBankAccount instances, received {type(account)}")
+
+        with account.lock:
+            self._versions[account] = account.version
+            self._balances[account] = account.balance
+
+
+    def balance(self, account: VersionedBankAccount) -> float:
+        """
+        Method that returns the balance of account as seen by the transaction.
+        """
+        self._use(account)
+        return self._balances[account]
+
+
+    def deposit(self, account: VersionedBankAccount, amount: float | int) -> None:
+        self._use(account)
+
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Deposit amount must be int or float, received {type(amount)}", account_number=account.account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Deposit amount must be greater than 0, received {amount}", account_number=account.account_number, amount=amount)
+
+        #Checking if account is banned
+        if account.is_banned():
+            raise CustomBannedError(f"Deposits restricted to Account ({account.account_number}) as it Banned", account_number=account.account_number, amount=amount)
+
+        self._balances[account] += amount
+        self._written.add(account)
+
+
+    def _debit(self, account: VersionedBankAccount, amount: float | int, action: str) -> None:
+        """
+        Checks that account can pay amount and takes it from the transaction's copy of the balance.
+        """
+        #Checking sufficient balance
+        if amount > self._balances[account]:
+            raise CustomInsufficientFundsError(f"{action} cannot be completed as insufficient funds in Account ({account.account_number})", account_number=account.account_number, amount=amount)
+
+        #Checking transaction limits
+        if account.transaction_limit is not None and amount > account.transaction_limit:
+            raise CustomLimitError(f"{action} amount ${amount} exceeds maximum transaction limit ${account.transaction_limit}",
+                                   account_number=account.account_number, amount=amount, limit=account.transaction_limit)
+
+        self._balances[account] -= amount
+        self._written.add(account)
+
+
+    def withdraw(self, account: VersionedBankAccount, amount: float | int) -> None:
+        self._use(account)
+
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Withdrawal amount must be int or float, received {type(amount)}", account_number=account.account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Withdrawal amount must be greater than 0, received {amount}", account_number=account.account_number, amount=amount)
+
+        #Checking if account is banned
+        if account.is_banned():
+            raise CustomBannedError(f"Withdrawal restricted from Account ({account.account_number}) as it Banned", account_number=account.account_number, amount=amount)
+
+        self._debit(account, amount, "Withdrawal")
+
+
+    def transfer(self, source_account: VersionedBankAccount, target_account: VersionedBankAccount, amount: float | int) -> None:
+        self._use(source_account)
+        self._use(target_account)
+
+        #Checking input type
+        if not isinstance(amount, (int, float)):
+            raise CustomTypeError(f"Transfer amount must be int or float, received {type(amount)}", account_number=source_account.account_number, amount=amount)
+
+        #Ensuring that target account is different from sending account
+        if source_account is target_account:
+            raise CustomValueError("Sender and receiver accounts must be different", account_number=source_account.account_number, amount=amount)
+
+        #Checking input values
+        if amount < 0:
+            raise CustomValueError(f"Transfer amount must be greater than 0, received {amount}", account_number=source_account.account_number, amount=amount)
+
+        #Checking if either account is banned
+        if source_account.is_banned():
+            raise CustomBannedError(f"Transfer restricted from Account ({source_account.account_number}) as it Banned", account_number=source_account.account_number, amount=amount)
+
+        if target_account.is_banned():
+            raise CustomBannedError(f"Transfer restricted to Account ({target_account.account_number}) as it Banned", account_number=target_account.account_number, amount=amount)
+
+        self._debit(source_account, amount, "Transfer")
+        self._balances[target_account] += amount
+        self._written.add(target_account)
+
+
+    def commit(self) -> None:
+        """
+        Method that writes the transaction's balances if no account it used has changed since its
+        snapshot, and raises CustomConflictError otherwise (nothing is written then).
+        """
+        if self.committed:
+            raise CustomOperationError("Transaction has already been committed")
+
+        accounts = sorted(self._versions, key=lambda account: (account.account_number, id(account)))
+        locked = []
+
+        try:
+            # Locking in the same global order as ThreadSafeBankAccount.transfer_to avoids deadlocks
+            for account in accounts:
+                account.lock.acquire()
+                locked.append(account)
+
+            for account in accounts:
+                if account.version != self._versions[account]:
+                    raise CustomConflictError(f"Account ({account.account_number}) changed during the transaction", account_number=account.account_number)
+
+            for account in self._written:
+                account.balance = self._balances[account]
+                account.version += 1
+
+        finally:
+            for account in reversed(locked):
+                account.lock.release()
+
+        self.committed = True
+
+
+    def __enter__(self) -> "Transaction":
+        return self
+
+
+    def __exit__(self, error_type, error, traceback) -> None:
+        if error_type is None:
+            self.commit()
+
+
+    @classmethod
+    def run(cls, body, retries: int = 10):
+        """
+        Class method that runs body(transaction) in a new transaction and commits it, running it
+        again on a conflict up to retries more times. Returns what body returned. Errors raised by
+        body abort the transaction and are raised as is.
+        """
+        for _ in range(retries + 1):
+            transaction = cls()
+
+            try:
+                with transaction:
+                    result = body(transaction)
+
+            except CustomConflictError:
+                continue
+
+            return result
+
+        raise CustomConflictError(f"Transaction still conflicted after {retries} retries")
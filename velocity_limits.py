@@ -0,0 +1,337 @@
+"""
+Name- Suveer Dhawan
+
+This program adds rolling-window (velocity) limits to the banking system. RollingWindows keeps the
+total amount and number of transactions of every window in a small ring of time buckets, so
+checking and recording a transaction takes constant time and a fixed amount of memory. The
+windows of all accounts share typed array columns indexed by row, so a window costs a few hundred
+bytes instead of a set of objects. VelocityBankAccount enforces any number of windowed limits
+(for example hourly and daily) on withdrawals and transfers and raises CustomLimitError when one
+would be exceeded.
+"""
+
+import time
+from array import array
+
+from bank import BankAccount
+from custom_errors import *
+
+class RollingWindows:
+    """
+    Class for many rolling windows with the same number of buckets, kept in shared columns. Row i of
+    the per window columns, and items i * buckets to (i + 1) * buckets of the bucket columns, hold
+    window i. A window covers its current bucket and the buckets - 1 before it, so the oldest
+    transaction counted is between window_seconds * (buckets - 1) / buckets and window_seconds old.
+    Rows of released windows are reused.
+
+    Instance Variables-
+        buckets (int): Number of ring buckets per window
+        window_seconds (list): Window length per row, as given
+        max_amounts (list): Amount limit per row (None when there is no amount limit)
+        max_counts (list): Count limit per row (None when there is no count limit)
+        bucket_seconds (array of float): Length of one bucket in seconds, per row
+        epochs (array of int): Number of the current bucket since the start of the clock, per row
+        total_amounts (array of float): Amount in the window, per row
+        total_counts (array of int): Number of transactions in the window, per row
+        amounts (array of float): Amount per bucket
+        counts (array of int): Number of transactions per bucket
+    """
+
+    def __init__(self, buckets: int = 12):
+        self.buckets = buckets
+        self.window_seconds = []
+        self.max_amounts = []
+        self.max_counts = []
+        self.bucket_seconds = array("d")
+        self.epochs = array("q")
+        self.total_amounts = array("d")
+        self.total_counts = array("q")
+        self.amounts = array("d")
+        self.counts = array("I")
+        self._free = []
+        self._empty_amounts = array("d", bytes(8 * buckets))
+        self._empty_counts = array("I", bytes(array("I").itemsize * buckets))
+
+
+    def allocate(self, window_seconds: float | int, max_amount: float | int | None = None, max_count: int | None = None) -> int:
+        """
+        Method that adds an empty window and returns its row.
+        """
+        if self._free:
+            row = self._free.pop()
+            self.window_seconds[row] = window_seconds
+            self.max_amounts[row] = max_amount
+            self.max_counts[row] = max_count
+            self.bucket_seconds[row] = window_seconds / self.buckets
+            self.epochs[row] = 0
+            self.total_amounts[row] = 0.0
+            self.total_counts[row] = 0
+            start = row * self.buckets
+            self.amounts[start:start + self.buckets] = self._empty_amounts
+            self.counts[start:start + self.buckets] = self._empty_counts
+            return row
+
+        self.window_seconds.append(window_seconds)
+        self.max_amounts.append(max_amount)
+        self.max_counts.append(max_count)
+        self.bucket_seconds.append(window_seconds / self.buckets)
+        self.epochs.append(0)
+        self.total_amounts.append(0.0)
+        self.total_counts.append(0)
+        self.amounts.extend(self._empty_amounts)
+        self.counts.extend(self._empty_counts)
+        return len(self.window_seconds) - 1
+
+
+    def release(self, row: int) -> None:
+        """
+        Method that frees a row for the next allocated window.
+        """
+        self.max_amounts[row] = self.max_counts[row] = None
+        self._free.append(row)
+
+
+    def advance(self, row: int, now: float) -> None:
+        """
+        Method that moves the window in row forward to now, emptying the buckets that fell out of it.
+        At most one pass over the ring, however long the window was idle.
+        """
+        epoch = int(now // self.bucket_seconds[row])
+        previous = self.epochs[row]
+
+        if epoch <= previous:
+            return
+
+        buckets = self.buckets
+        start = row * buckets
+        amounts, counts = self.amounts, self.counts
+
+        if epoch - previous >= buckets:
+            amounts[start:start + buckets] = self._empty_amounts
+            counts[start:start + buckets] = self._empty_counts
+            self.total_amounts[row] = 0.0
+            self.total_counts[row] = 0
+
+        else:
+            for slot in range(previous + 1, epoch + 1):
+                amounts[start + slot % buckets] = 0.0
+                counts[start + slot % buckets] = 0
+
+            # Summing the ring again rather than subtracting, so the total never drifts
+            self.total_amounts[row] = sum(amounts[start:start + buckets])
+            self.total_counts[row] = sum(counts[start:start + buckets])
+
+        self.epochs[row] = epoch
+
+
+    def add(self, row: int, amount: float | int) -> None:
+        """
+        Method that records a transaction in the current bucket of the window in row. Call advance first.
+        """
+        slot = row * self.buckets + self.epochs[row] % self.buckets
+        self.amounts[slot] += amount
+        self.counts[slot] += 1
+        self.total_amounts[row] += amount
+        self.total_counts[row] += 1
+
+
+class RollingCounter:
+    """
+    Class for the amount and count of transactions in one rolling window, a view of a row of RollingWindows.
+
+    Instance Variables-
+        windows (RollingWindows): Columns that hold the window
+        row (int): Row of the window
+    """
+
+    __slots__ = ("windows", "row")
+
+    def __init__(self, window_seconds: float, buckets: int = 12):
+        self.windows = RollingWindows(buckets)
+        self.row = self.windows.allocate(window_seconds)
+
+
+    @classmethod
+    def view(cls, windows: RollingWindows, row: int) -> "RollingCounter":
+        """
+        Class method that returns a counter over an existing row of windows.
+        """
+        counter = cls.__new__(cls)
+        counter.windows = windows
+        counter.row = row
+        return counter
+
+
+    @property
+    def total_amount(self) -> float:
+        return self.windows.total_amounts[self.row]
+
+
+    @property
+    def total_count(self) -> int:
+        return self.windows.total_counts[self.row]
+
+
+    def advance(self, now: float) -> None:
+        self.windows.advance(self.row, now)
+
+
+    def add(self, amount: float | int) -> None:
+        self.windows.add(self.row, amount)
+
+
+class VelocityBankAccount(BankAccount):
+    """
+    Class for a bank account with rolling-window limits on the total amount and number of
+    withdrawals and transfers. Velocity limits are checked before the other checks of a
+    withdrawal or transfer, and only successful ones are counted.
+
+    Class Variables-
+        clock (function): Returns the current time in seconds
+        buckets (int): Number of ring buckets per window
+        windows (RollingWindows): Windows that new velocity accounts keep their limits in
+
+    Instance Variables-
+        windows (RollingWindows): Windows the account's limits are kept in (the class windows when it was opened)
+        velocity_rows (tuple): Rows of the account's windows, in the order they were set
+    """
+
+    clock = time.monotonic
+    buckets = 12
+    windows = RollingWindows(buckets)
+
+    def __init__(self, owner, balance):
+        """
+        Creates a new VelocityBankAccount instance without velocity limits.
+
+        Arguments-
+            owner (string): Name of account owner
+            balance (int): non-negative starting account balance
+        """
+        self.windows = VelocityBankAccount.windows
+        self.velocity_rows = ()
+        self._velocity_paused = False
+        super().__init__(owner, balance)
+
+
+    def __del__(self):
+        # Returning the account's rows to the shared windows
+        for row in self.velocity_rows:
+            self.windows.release(row)
+
+
+    @property
+    def velocity_limits(self) -> dict:
+        """
+        (max_amount, max_count, RollingCounter) per window length in seconds.
+        """
+        windows = self.windows
+        return {windows.window_seconds[row]: (windows.max_amounts[row], windows.max_counts[row], RollingCounter.view(windows, row)) 
+                for row in self.velocity_rows}
+
+
+    def set_velocity_limit(self, window_seconds: float | int, max_amount: float | int | None = None, max_count: int | None = None) -> None:
+        """
+        Method to limit the total amount and/or number of withdrawals and transfers per rolling
+        window of window_seconds. If both limits are None, removes the window.
+        """
+        #Checking input type
+        if not isinstance(window_seconds, (int, float)):
+            raise CustomTypeError(f"Window length must be a number, received {type(window_seconds)}")
+
+        if max_amount is not None and not isinstance(max_amount, (int, float)):
+            raise CustomTypeError(f"Rolling amount limit must be a number, received {type(max_amount)}")
+
+        if max_count is not None and not isinstance(max_count, int):
+            raise CustomTypeError(f"Rolling count limit must be int, received {type(max_count)}")
+
+        #Checking input values
+        if window_seconds <= 0:
+            raise CustomValueError(f"Window length must be positive, received {window_seconds}")
+
+        if (max_amount is not None and max_amount < 0) or (max_count is not None and max_count < 0):
+            raise CustomValueError(f"Rolling limits must be non-negative, received {max_amount} and {max_count}")
+
+        windows = self.windows
+        rows = self.velocity_rows
+        index = next((index for index, row in enumerate(rows) if windows.window_seconds[row] == window_seconds), None)
+
+        if max_amount is None and max_count is None:
+            if index is not None:
+                windows.release(rows[index])
+                self.velocity_rows = rows[:index] + rows[index + 1:]
+            return
+
+        # Keeping what has been counted so far when a window's limits change
+        if index is not None:
+            windows.max_amounts[rows[index]] = max_amount
+            windows.max_counts[rows[index]] = max_count
+
+        else:
+            self.velocity_rows = rows + (windows.allocate(window_seconds, max_amount, max_count),)
+
+
+    def _check_velocity(self, amount, action: str) -> None:
+        """
+        Raises CustomLimitError if amount would exceed any rolling window limit.
+        Amounts that are not valid are left to the checks of BankAccount.
+        """
+        if not self.velocity_rows or not isinstance(amount, (int, float)) or amount < 0:
+            return
+
+        now = VelocityBankAccount.clock()
+        windows = self.windows
+        bucket_seconds, epochs, total_amounts, total_counts = windows.bucket_seconds, windows.epochs, windows.total_amounts, windows.total_counts
+
+        for row in self.velocity_rows:
+            # Advancing only windows whose current bucket has ended
+            if now // bucket_seconds[row] > epochs[row]:
+                windows.advance(row, now)
+
+            max_amount = windows.max_amounts[row]
+            max_count = windows.max_counts[row]
+
+            if max_amount is not None and total_amounts[row] + amount > max_amount:
+                raise CustomLimitError(f"{action} amount ${amount} exceeds rolling limit ${max_amount} per {windows.window_seconds[row]}s, ${total_amounts[row]} already used",
+                                       account_number=self.account_number, amount=amount, limit=max_amount)
+
+            if max_count is not None and total_counts[row] + 1 > max_count:
+                raise CustomLimitError(f"{action} exceeds rolling limit of {max_count} transactions per {windows.window_seconds[row]}s", account_number=self.account_number, amount=amount, limit=max_count)
+
+
+    def _count_velocity(self, amount: float | int) -> None:
+        windows = self.windows
+        buckets, epochs, amounts, counts, total_amounts, total_counts = windows.buckets, windows.epochs, windows.amounts, windows.counts, windows.total_amounts, windows.total_counts
+
+        # Same as RollingWindows.add for every row, with the columns looked up once
+        for row in self.velocity_rows:
+            slot = row * buckets + epochs[row] % buckets
+            amounts[slot] += amount
+            counts[slot] += 1
+            total_amounts[row] += amount
+            total_counts[row] += 1
+
+
+    def withdraw(self, amount: float | int) -> None:
+        if self._velocity_paused:
+            super().withdraw(amount)
+            return
+
+        self._check_velocity(amount, "Withdrawal")
+        super().withdraw(amount)
+        self._count_velocity(amount)
+
+
+    def transfer_to(self, target_account: BankAccount, amount: float | int) -> None:
+        self._check_velocity(amount, "Transfer")
+
+        # Pausing the velocity checks of the inner withdrawal, so the transfer is counted once
+        self._velocity_paused = True
+
+        try:
+            super().transfer_to(target_account, amount)
+
+        finally:
+            self._velocity_paused = False
+
+        self._count_velocity(amount)